@@ -0,0 +1,38 @@
+from aiogram import Router
+from aiogram.types import Message
+from aiogram.filters import Command, CommandObject
+
+from services.database import AsyncDatabase
+from middlewares.profiler_middleware import ProfilerMiddleware
+from handlers.dispute_handlers import is_admin
+
+router = Router()
+
+@router.message(Command("profile"))
+async def profile_command(message: Message, command: CommandObject, db: AsyncDatabase, profiler: ProfilerMiddleware):
+    """/profile on [доля] — включить, /profile off — выключить и записать профиль.
+    В режиме webhook с несколькими воркерами команда действует на принявший ее процесс;
+    все воркеры переключает SIGUSR2 главному процессу"""
+    if not await is_admin(db, message.from_user.id, message.chat.id):
+        return
+    
+    action, _, rate = (command.args or "").strip().partition(" ")
+    if action == "on":
+        try:
+            sample_rate = float(rate) if rate else None
+        except ValueError:
+            await message.answer("Использование: /profile on [доля апдейтов от 0 до 1]")
+            return
+        if not profiler.enable(sample_rate):
+            await message.answer("Профилирование уже включено")
+            return
+        await message.answer(f"🔬 Профилирование включено, доля апдейтов: {profiler.sample_rate:.2f}")
+    elif action == "off":
+        if not profiler.enabled:
+            await message.answer("Профилирование не включено")
+            return
+        path = profiler.disable()
+        await message.answer(f"🔬 Профиль записан: {path.name}" if path else "🔬 Профилирование выключено, семплов нет")
+    else:
+        state = f"включено, доля {profiler.sample_rate:.2f}" if profiler.enabled else "выключено"
+        await message.answer(f"Профилирование {state}.\nИспользование: /profile on [доля] | off")
\ No newline at end of file
@@ -0,0 +1,97 @@
+from aiogram import Router, F
+from aiogram.types import Message, CallbackQuery
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+
+from services.chat_relay import ChatRelay
+from keyboards.callbacks import OrderAction, OrderCallback
+from keyboards.chat_kb import get_chat_kb, get_chat_history_kb
+from keyboards.common import get_main_menu_kb
+from handlers.order_actions import order_action
+
+router = Router()
+
+class ChatStates(StatesGroup):
+    IN_CHAT = State()
+
+async def enter_chat(message: Message, state: FSMContext, chat_relay: ChatRelay, order_id: str, user_id: int):
+    peer_id = await chat_relay.open_chat(order_id, user_id)
+    if peer_id is None:
+        await message.answer("⚠️ Чат по этому заказу недоступен")
+        return
+    
+    await state.set_state(ChatStates.IN_CHAT)
+    await state.update_data(chat_order_id=order_id, chat_peer_id=peer_id)
+    await message.answer(
+        f"💬 *Чат по заказу* `{order_id}`\n\n"
+        "Все ваши сообщения, файлы и фото пересылаются собеседнику.\n"
+        "Выйти из чата — /stop",
+        reply_markup=get_chat_kb(order_id),
+        parse_mode="Markdown"
+    )
+
+@order_action(OrderAction.CHAT)
+async def open_order_chat(
+    callback: CallbackQuery,
+    order_callback: OrderCallback,
+    state: FSMContext,
+    chat_relay: ChatRelay
+):
+    await callback.answer()
+    await enter_chat(callback.message, state, chat_relay, order_callback.order_id, callback.from_user.id)
+
+@router.message(Command("chat"))
+async def chat_command(message: Message, command: CommandObject, state: FSMContext, chat_relay: ChatRelay):
+    if not command.args:
+        await message.answer("Использование: /chat <ID заказа>")
+        return
+    await enter_chat(message, state, chat_relay, command.args.strip(), message.from_user.id)
+
+@router.message(Command("stop"), ChatStates.IN_CHAT)
+async def leave_chat_command(message: Message, state: FSMContext):
+    await state.clear()
+    await message.answer("Вы вышли из чата", reply_markup=get_main_menu_kb())
+
+@router.callback_query(F.data == "chat_leave")
+async def leave_chat(callback: CallbackQuery, state: FSMContext):
+    await callback.answer()
+    await state.clear()
+    await callback.message.answer("Вы вышли из чата", reply_markup=get_main_menu_kb())
+
+@router.callback_query(F.data.startswith("chat_history:"))
+async def show_chat_history(callback: CallbackQuery, chat_relay: ChatRelay):
+    await callback.answer()
+    _, order_id, before = callback.data.split(":")
+    user_id = callback.from_user.id
+    if await chat_relay.open_chat(order_id, user_id) is None:
+        await callback.message.answer("⚠️ История этого чата недоступна")
+        return
+    
+    page = await chat_relay.history(order_id, int(before) if before else None)
+    lines = [f"📜 История чата по заказу {order_id}", ""]
+    for record in reversed(page.messages):
+        author = "Вы" if record.user_id == user_id else "Собеседник"
+        text = record.message or ""
+        if record.is_file:
+            text = f"📎 {text}".strip()
+        lines.append(f"{record.created_at} · {author}: {text}")
+    if not page.messages:
+        lines.append("Сообщений пока нет")
+    
+    markup = get_chat_history_kb(order_id, page.next_before)
+    if before:
+        await callback.message.edit_text("\n".join(lines), reply_markup=markup)
+    else:
+        await callback.message.answer("\n".join(lines), reply_markup=markup)
+
+# Команды не пересылаются, а идут дальше — в роутеры споров и администратора
+@router.message(ChatStates.IN_CHAT, ~F.text.startswith("/"))
+async def relay_chat_message(message: Message, state: FSMContext, chat_relay: ChatRelay):
+    data = await state.get_data()
+    relayed = await chat_relay.relay(message, data["chat_order_id"], data["chat_peer_id"])
+    if relayed is None:
+        await state.clear()
+        await message.answer("⚠️ Чат по этому заказу закрыт", reply_markup=get_main_menu_kb())
+    elif not relayed:
+        await message.answer("⚠️ В чат можно отправлять только текст, файлы и фото")
\ No newline at end of file
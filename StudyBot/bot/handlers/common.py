@@ -4,7 +4,7 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
 from models.user import User
-from services.database import Database
+from services.database import AsyncDatabase
 from keyboards.common import get_main_menu_kb
 from keyboards.common import get_back_kb
 from aiogram.utils.keyboard import InlineKeyboardButton, InlineKeyboardMarkup   
@@ -12,7 +12,7 @@ from aiogram.utils.keyboard import InlineKeyboardButton, InlineKeyboardMarkup
 router = Router()
 
 @router.message(Command("start"))
-async def start(message: Message, db: Database):
+async def start(message: Message, db: AsyncDatabase):
     user = message.from_user
     db_user = User(
         user_id=user.id,
@@ -20,7 +20,7 @@ async def start(message: Message, db: Database):
         first_name=user.first_name,
         last_name=user.last_name
     )
-    db.add_user(db_user)
+    await db.add_user(db_user)
     
     await message.answer(
         "🔹 *STUDY TIPS*\n_Решаем, пишем, спасаем — пока ты отдыхаешь!_\n\n"
@@ -0,0 +1,136 @@
+from aiogram import Router, F
+from aiogram.types import Message, CallbackQuery
+from aiogram.filters import Command, CommandObject
+
+from models.dispute import Dispute
+from services.database import AsyncDatabase
+from services.dispute_service import DisputeService
+from keyboards.callbacks import OrderAction, OrderCallback
+from keyboards.admin_kb import get_dispute_resolve_kb
+from handlers.order_actions import order_action
+from config.constants import UserRole
+from config.settings import ADMIN_CHAT_ID
+
+router = Router()
+
+async def is_admin(db: AsyncDatabase, user_id: int, chat_id: int) -> bool:
+    if chat_id == ADMIN_CHAT_ID:
+        return True
+    user = await db.get_user(user_id)
+    return bool(user) and user.role == UserRole.ADMIN.value
+
+async def show_dispute(message: Message, dispute: Dispute, db: AsyncDatabase):
+    order = await db.get_order(dispute.order_id)
+    await message.answer(
+        f"⚖️ *Спор* `{dispute.dispute_id}` *взят в работу*\n\n"
+        f"📚 *Заказ:* `{dispute.order_id}` · {order.subject if order else '—'}\n"
+        f"💰 *Бюджет:* {order.budget if order else '—'} руб\n"
+        f"📝 *Причина:* {dispute.reason or '—'}",
+        reply_markup=get_dispute_resolve_kb(dispute.dispute_id),
+        parse_mode="Markdown"
+    )
+
+@order_action(OrderAction.DISPUTE)
+async def open_dispute_from_card(
+    callback: CallbackQuery,
+    order_callback: OrderCallback,
+    db: AsyncDatabase,
+    dispute_service: DisputeService
+):
+    # Карточку видят не только участники заказа — проверка та же, что у /dispute
+    order = await db.get_order(order_callback.order_id)
+    user_id = callback.from_user.id
+    if not order or (
+        user_id not in (order.client_id, order.executor_id)
+        and not await is_admin(db, user_id, callback.message.chat.id)
+    ):
+        await callback.answer("Открыть спор могут только участники заказа", show_alert=True)
+        return
+    
+    dispute = await dispute_service.open_dispute(
+        order_callback.order_id, callback.from_user.id, "Открыт из карточки заказа"
+    )
+    if not dispute:
+        await callback.answer("Спор по этому заказу открыть нельзя", show_alert=True)
+        return
+    await callback.answer("Спор открыт и поставлен в очередь", show_alert=True)
+
+@router.message(Command("dispute"))
+async def open_dispute_command(
+    message: Message,
+    command: CommandObject,
+    db: AsyncDatabase,
+    dispute_service: DisputeService
+):
+    order_id, _, reason = (command.args or "").strip().partition(" ")
+    if not order_id:
+        await message.answer("Использование: /dispute <ID заказа> <причина>")
+        return
+    
+    order = await db.get_order(order_id)
+    if not order or message.from_user.id not in (order.client_id, order.executor_id):
+        await message.answer("⚠️ Заказ не найден")
+        return
+    
+    dispute = await dispute_service.open_dispute(order_id, message.from_user.id, reason.strip() or None)
+    if not dispute:
+        await message.answer("⚠️ По заказу в текущем статусе нельзя открыть спор")
+        return
+    await message.answer("⚖️ Спор открыт. Администратор рассмотрит его в порядке очереди.")
+
+@order_action(OrderAction.TAKE_DISPUTE)
+async def take_dispute(
+    callback: CallbackQuery,
+    order_callback: OrderCallback,
+    db: AsyncDatabase,
+    dispute_service: DisputeService
+):
+    if not await is_admin(db, callback.from_user.id, callback.message.chat.id):
+        await callback.answer("Споры разбирают администраторы", show_alert=True)
+        return
+    
+    dispute = await dispute_service.claim_for_order(callback.from_user.id, order_callback.order_id)
+    if not dispute:
+        await callback.answer("Спор уже взят другим администратором", show_alert=True)
+        return
+    await callback.answer()
+    await show_dispute(callback.message, dispute, db)
+
+@router.message(Command("next_dispute"))
+async def next_dispute_command(message: Message, db: AsyncDatabase, dispute_service: DisputeService):
+    if not await is_admin(db, message.from_user.id, message.chat.id):
+        return
+    dispute = await dispute_service.claim_next(message.from_user.id)
+    if not dispute:
+        await message.answer("Открытых споров нет")
+        return
+    await show_dispute(message, dispute, db)
+
+@router.callback_query(F.data == "next_dispute")
+async def next_dispute(callback: CallbackQuery, db: AsyncDatabase, dispute_service: DisputeService):
+    if not await is_admin(db, callback.from_user.id, callback.message.chat.id):
+        await callback.answer("Споры разбирают администраторы", show_alert=True)
+        return
+    
+    dispute = await dispute_service.claim_next(callback.from_user.id)
+    if not dispute:
+        await callback.answer("Открытых споров нет", show_alert=True)
+        return
+    await callback.answer()
+    await show_dispute(callback.message, dispute, db)
+
+@router.callback_query(F.data.startswith("dispute:"))
+async def resolve_dispute(callback: CallbackQuery, dispute_service: DisputeService):
+    _, outcome, dispute_id = callback.data.split(":")
+    try:
+        resolved = await dispute_service.resolve(dispute_id, callback.from_user.id, outcome)
+    except ValueError:
+        # Заказ уже вышел из спора: повторное нажатие или решение другого администратора
+        await callback.answer("Спор по этому заказу уже разрешен", show_alert=True)
+        return
+    if not resolved:
+        await callback.answer("Спор уже закрыт или взят другим администратором", show_alert=True)
+        return
+    
+    await callback.message.edit_reply_markup(reply_markup=None)
+    await callback.answer("Решение по спору сохранено", show_alert=True)
\ No newline at end of file
@@ -0,0 +1,40 @@
+from typing import Any, Callable, Dict, Union
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.filters import Filter
+from aiogram.types import CallbackQuery
+
+from keyboards.callbacks import OrderAction, OrderCallback
+
+router = Router()
+
+# Действие -> обработчик; заполняется декоратором order_action из модулей хендлеров
+_handlers: Dict[OrderAction, CallableObject] = {}
+
+
+def order_action(action: OrderAction) -> Callable:
+    """Регистрирует обработчик действия с заказом.
+
+    Обработчик получает callback и order_callback, а также любые зависимости
+    диспетчера по имени аргумента — как обычный хендлер aiogram.
+    """
+    def decorator(handler: Callable) -> Callable:
+        _handlers[action] = CallableObject(handler)
+        return handler
+    return decorator
+
+
+class OrderCallbackFilter(Filter):
+    async def __call__(self, callback: CallbackQuery) -> Union[bool, Dict[str, Any]]:
+        payload = OrderCallback.unpack(callback.data)
+        return {"order_callback": payload} if payload else False
+
+
+@router.callback_query(OrderCallbackFilter())
+async def dispatch_order_action(callback: CallbackQuery, order_callback: OrderCallback, **data: Any):
+    handler = _handlers.get(order_callback.action)
+    if handler is None:
+        await callback.answer("Действие пока недоступно", show_alert=True)
+        return
+    await handler.call(callback, order_callback=order_callback, **data)
\ No newline at end of file
@@ -1,21 +1,58 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from typing import Optional
 
 from models.order import Order
 from services.order_service import OrderService
+from services.database import AsyncDatabase
+from services.attachments import AttachmentStore
+from services.order_index import ActiveOrderIndex
+from services.rating_service import RatingService
 from keyboards.order_kb import (
     get_order_type_kb,
     get_order_confirmation_kb,
-    get_back_kb,
-    get_order_actions_kb
+    get_order_actions_kb,
+    get_orders_page_kb,
+    get_browse_kb,
+    get_step_kb
 )
-from config.constants import OrderStatus
-from config.settings import MAX_ORDERS_PER_USER
+from keyboards.common import get_back_kb
+from keyboards.callbacks import OrderAction, OrderCallback
+from handlers.order_actions import order_action
+from config.constants import OrderStatus, UserRole, ORDER_TYPES, BUDGET_RANGES
+from config.settings import MAX_ORDERS_PER_USER, ORDERS_PAGE_SIZE, ADMIN_CHAT_ID, SEARCH_RESULTS_LIMIT
 
 router = Router()
 
+# Подсказки шагов анкеты: одни и те же при движении вперед и по кнопке "Назад"
+TYPE_PROMPT = "📌 *Выберите тип работы:*"
+SUBJECT_PROMPT = (
+    "📚 *Шаг 1 из 5: Укажите предмет/дисциплину*\n\n"
+    "Пример:\n_Математика_\n_Теория вероятностей_\n_Программирование на Python_"
+)
+DESCRIPTION_PROMPT = (
+    "📝 *Шаг 2 из 5: Опишите задание подробно*\n\n"
+    "Пример:\n_Решить 5 задач по теории вероятностей из учебника Петрова_\n"
+    "_Написать курсовую по экономике, 25-30 страниц_"
+)
+DEADLINE_PROMPT = (
+    "⏰ *Шаг 3 из 5: Укажите срок выполнения*\n\n"
+    "Пример:\n_до 20 мая_\n_в течение 3 дней_\n_срочно, сегодня до 18:00_"
+)
+BUDGET_PROMPT = (
+    "💰 *Шаг 4 из 5: Укажите ваш бюджет*\n\n"
+    "Пример:\n_1500 руб_\n_2000 рублей_\n_3000₽_"
+)
+FILE_PROMPT = (
+    "📎 *Шаг 5 из 5: Прикрепите файл с заданием (если есть)*\n\n"
+    "Форматы: PDF, DOCX, TXT\n"
+    "Максимальный размер: 5 МБ\n\n"
+    "Если файла нет, нажмите 'Пропустить'"
+)
+
 class OrderStates(StatesGroup):
     SELECTING_ORDER_TYPE = State()
     ENTERING_SUBJECT = State()
@@ -30,13 +67,12 @@ async def create_order(
     callback: CallbackQuery, 
     state: FSMContext,
     order_service: OrderService,
-    db: Database
+    db: AsyncDatabase
 ):
     await callback.answer()
     user = callback.from_user
     
-    active_orders = db.get_user_orders(user.id, OrderStatus.ACTIVE.value)
-    if len(active_orders) >= MAX_ORDERS_PER_USER:
+    if await db.get_active_order_count(user.id) >= MAX_ORDERS_PER_USER:
         from keyboards.common import get_main_menu_kb
         await callback.message.edit_text(
             f"⚠️ Вы достигли лимита активных заказов ({MAX_ORDERS_PER_USER})\n\n"
@@ -47,7 +83,7 @@ async def create_order(
     
     await state.set_state(OrderStates.SELECTING_ORDER_TYPE)
     await callback.message.edit_text(
-        "📌 *Выберите тип работы:*",
+        TYPE_PROMPT,
         reply_markup=get_order_type_kb(),
         parse_mode="Markdown"
     )
@@ -59,8 +95,7 @@ async def set_order_type(callback: CallbackQuery, state: FSMContext):
     await state.update_data(order_type=order_type)
     await state.set_state(OrderStates.ENTERING_SUBJECT)
     await callback.message.edit_text(
-        "📚 *Шаг 1 из 5: Укажите предмет/дисциплину*\n\n"
-        "Пример:\n_Математика_\n_Теория вероятностей_\n_Программирование на Python_",
+        SUBJECT_PROMPT,
         reply_markup=get_back_kb("back_to_types"),
         parse_mode="Markdown"
     )
@@ -71,15 +106,9 @@ async def enter_subject(message: Message, state: FSMContext):
     await state.update_data(subject=subject)
     await state.set_state(OrderStates.ENTERING_DESCRIPTION)
     
-    from aiogram.utils.keyboard import ReplyKeyboardBuilder
-    builder = ReplyKeyboardBuilder()
-    builder.button(text="🔙 Назад")
-    
     await message.answer(
-        "📝 *Шаг 2 из 5: Опишите задание подробно*\n\n"
-        "Пример:\n_Решить 5 задач по теории вероятностей из учебника Петрова_\n"
-        "_Написать курсовую по экономике, 25-30 страниц_",
-        reply_markup=builder.as_markup(resize_keyboard=True, one_time_keyboard=True),
+        DESCRIPTION_PROMPT,
+        reply_markup=get_step_kb(),
         parse_mode="Markdown"
     )
 
@@ -89,14 +118,9 @@ async def enter_description(message: Message, state: FSMContext):
     await state.update_data(description=description)
     await state.set_state(OrderStates.ENTERING_DEADLINE)
     
-    from aiogram.utils.keyboard import ReplyKeyboardBuilder
-    builder = ReplyKeyboardBuilder()
-    builder.button(text="🔙 Назад")
-    
     await message.answer(
-        "⏰ *Шаг 3 из 5: Укажите срок выполнения*\n\n"
-        "Пример:\n_до 20 мая_\n_в течение 3 дней_\n_срочно, сегодня до 18:00_",
-        reply_markup=builder.as_markup(resize_keyboard=True, one_time_keyboard=True),
+        DEADLINE_PROMPT,
+        reply_markup=get_step_kb(),
         parse_mode="Markdown"
     )
 
@@ -106,14 +130,9 @@ async def enter_deadline(message: Message, state: FSMContext):
     await state.update_data(deadline=deadline)
     await state.set_state(OrderStates.ENTERING_BUDGET)
     
-    from aiogram.utils.keyboard import ReplyKeyboardBuilder
-    builder = ReplyKeyboardBuilder()
-    builder.button(text="🔙 Назад")
-    
     await message.answer(
-        "💰 *Шаг 4 из 5: Укажите ваш бюджет*\n\n"
-        "Пример:\n_1500 руб_\n_2000 рублей_\n_3000₽_",
-        reply_markup=builder.as_markup(resize_keyboard=True, one_time_keyboard=True),
+        BUDGET_PROMPT,
+        reply_markup=get_step_kb(),
         parse_mode="Markdown"
     )
 
@@ -124,71 +143,49 @@ async def enter_budget(message: Message, state: FSMContext):
         if budget <= 0:
             raise ValueError
     except (ValueError, TypeError):
-        from aiogram.utils.keyboard import ReplyKeyboardBuilder
-        builder = ReplyKeyboardBuilder()
-        builder.button(text="🔙 Назад")
-        
         await message.answer(
             "Пожалуйста, введите корректную сумму (только цифры, больше 0)",
-            reply_markup=builder.as_markup(resize_keyboard=True, one_time_keyboard=True)
+            reply_markup=get_step_kb()
         )
         return
     
     await state.update_data(budget=budget)
     await state.set_state(OrderStates.UPLOADING_FILE)
     
-    from aiogram.utils.keyboard import ReplyKeyboardBuilder
-    builder = ReplyKeyboardBuilder()
-    builder.button(text="Пропустить")
-    builder.button(text="🔙 Назад")
-    
     await message.answer(
-        "📎 *Шаг 5 из 5: Прикрепите файл с заданием (если есть)*\n\n"
-        "Форматы: PDF, DOCX, TXT\n"
-        "Максимальный размер: 5 МБ\n\n"
-        "Если файла нет, нажмите 'Пропустить'",
-        reply_markup=builder.as_markup(resize_keyboard=True, one_time_keyboard=True),
+        FILE_PROMPT,
+        reply_markup=get_step_kb(skip=True),
         parse_mode="Markdown"
     )
 
 @router.message(OrderStates.UPLOADING_FILE, F.document)
-async def handle_file_upload(message: Message, state: FSMContext, bot: Bot):
-    from config.settings import UPLOAD_FOLDER, MAX_FILE_SIZE_MB, FILE_TYPES
+async def handle_file_upload(message: Message, state: FSMContext, attachments: AttachmentStore):
+    from config.settings import MAX_FILE_SIZE_MB, FILE_TYPES
     from pathlib import Path
-    import uuid
     
-    file = await bot.get_file(message.document.file_id)
     file_ext = Path(message.document.file_name).suffix.lower()
     
     if file_ext not in FILE_TYPES:
-        from aiogram.utils.keyboard import ReplyKeyboardBuilder
-        builder = ReplyKeyboardBuilder()
-        builder.button(text="Пропустить")
-        builder.button(text="🔙 Назад")
-        
         await message.answer(
             f"⚠️ Неподдерживаемый формат файла. Разрешены: {', '.join(FILE_TYPES)}",
-            reply_markup=builder.as_markup(resize_keyboard=True, one_time_keyboard=True)
+            reply_markup=get_step_kb(skip=True)
         )
         return
     
-    if message.document.file_size > MAX_FILE_SIZE_MB * 1024 * 1024:
-        from aiogram.utils.keyboard import ReplyKeyboardBuilder
-        builder = ReplyKeyboardBuilder()
-        builder.button(text="Пропустить")
-        builder.button(text="🔙 Назад")
-        
+    if (message.document.file_size or 0) > MAX_FILE_SIZE_MB * 1024 * 1024:
         await message.answer(
             f"⚠️ Файл слишком большой. Максимальный размер: {MAX_FILE_SIZE_MB} МБ",
-            reply_markup=builder.as_markup(resize_keyboard=True, one_time_keyboard=True)
+            reply_markup=get_step_kb(skip=True)
         )
         return
     
-    file_name = f"{uuid.uuid4()}{file_ext}"
-    file_path = UPLOAD_FOLDER / file_name
-    await bot.download_file(file.file_path, destination=file_path)
-    
-    await state.update_data(file_path=str(file_path))
+    # Файл скачивается в фоне, анкета продолжается сразу
+    attachments.start_ingest(message.document.file_unique_id, message.document.file_id, file_ext)
+    await state.update_data(
+        file_unique_id=message.document.file_unique_id,
+        file_id=message.document.file_id,
+        file_ext=file_ext
+    )
     await confirm_order(message, state)
 
 @router.message(OrderStates.UPLOADING_FILE, F.text == "Пропустить")
@@ -220,18 +217,30 @@ async def confirm_order(message: Message, state: FSMContext):
     )
 
 @router.callback_query(F.data == "final_confirm", OrderStates.CONFIRMING_ORDER)
-async def final_confirm_order(callback: CallbackQuery, state: FSMContext, order_service: OrderService):
+async def final_confirm_order(
+    callback: CallbackQuery,
+    state: FSMContext,
+    order_service: OrderService,
+    attachments: AttachmentStore
+):
     await callback.answer()
     data = await state.get_data()
     user = callback.from_user
     
+    file_path = None
+    if data.get('file_unique_id'):
+        try:
+            file_path = str(await attachments.result(data['file_unique_id'], data['file_id'], data['file_ext']))
+        except Exception:
+            await callback.message.answer("⚠️ Не удалось сохранить прикрепленный файл, заказ будет создан без него")
+    
     order_data = {
         'type': data['order_type'],
         'subject': data['subject'],
         'description': data['description'],
         'deadline': data['deadline'],
         'budget': data['budget'],
-        'file_path': data.get('file_path'),
+        'file_path': file_path,
         'client_id': user.id
     }
     
@@ -260,44 +269,186 @@ async def final_confirm_order(callback: CallbackQuery, state: FSMContext, order_
     )
     await state.clear()
 
-@router.callback_query(F.data.startswith("accept_"))
-async def accept_order(callback: CallbackQuery, order_service: OrderService):
+# Списки заказов: заказчик видит свои заказы, исполнитель — взятые им
+ORDER_LIST_SCOPES = {
+    "my_orders": ("client_id", "📋 *Мои заказы*"),
+    "my_jobs": ("executor_id", "👨‍💻 *Заказы в работе у меня*")
+}
+
+@router.callback_query(F.data.in_(ORDER_LIST_SCOPES) | F.data.startswith(("my_orders:", "my_jobs:")))
+async def show_orders_page(callback: CallbackQuery, db: AsyncDatabase):
+    await callback.answer()
+    scope, _, after = callback.data.partition(":")
+    column, title = ORDER_LIST_SCOPES[scope]
+    
+    page = await db.get_orders_page({column: callback.from_user.id}, after or None)
+    lines = [title, ""]
+    for order in page.orders:
+        emoji, _ = order.type_display
+        lines.append(
+            f"{order.status_display} · {emoji} {order.subject} · {order.budget} руб\n"
+            f"🆔 `{order.order_id}`"
+        )
+    if not page.orders:
+        lines.append("Заказов пока нет")
+    
+    await callback.message.edit_text(
+        "\n".join(lines),
+        reply_markup=get_orders_page_kb(scope, page.next_after, first_page=not after),
+        parse_mode="Markdown"
+    )
+
+# Лента активных заказов для исполнителей, обслуживается из ActiveOrderIndex
+def render_browse(
+    order_index: ActiveOrderIndex,
+    order_type: Optional[str],
+    subject: Optional[str],
+    budget: Optional[str]
+) -> tuple:
+    orders = order_index.search(order_type, subject, budget, limit=ORDERS_PAGE_SIZE)
+    
+    filters = []
+    if order_type:
+        filters.append(ORDER_TYPES.get(order_type, ("✏️", order_type))[1])
+    if subject:
+        filters.append(subject)
+    if budget:
+        filters.append(BUDGET_RANGES[budget][0])
+    
+    lines = ["🔎 *Активные заказы*" + (f" ({', '.join(filters)})" if filters else ""), ""]
+    for order in orders:
+        emoji, type_display = order.type_display
+        lines.append(f"{emoji} {type_display} · {order.subject} · {order.budget} руб · ⏰ {order.deadline}")
+    if not orders:
+        lines.append("Подходящих заказов нет")
+    
+    return "\n".join(lines), get_browse_kb(orders, order_type, budget)
+
+@router.message(Command("browse"))
+async def browse_orders(
+    message: Message,
+    command: CommandObject,
+    state: FSMContext,
+    order_index: ActiveOrderIndex
+):
+    subject = command.args.strip() if command.args else None
+    await state.update_data(browse_subject=subject)
+    text, markup = render_browse(order_index, None, subject, None)
+    await message.answer(text, reply_markup=markup, parse_mode="Markdown")
+
+@router.callback_query(F.data.startswith("browse:"))
+async def browse_orders_filter(callback: CallbackQuery, state: FSMContext, order_index: ActiveOrderIndex):
+    await callback.answer()
+    _, order_type, budget = callback.data.split(":")
+    order_type = order_type if order_type in ORDER_TYPES else None
+    budget = budget if budget in BUDGET_RANGES else None
+    
+    data = await state.get_data()
+    subject = data.get("browse_subject") if order_type or budget else None
+    if not subject:
+        await state.update_data(browse_subject=None)
+    
+    text, markup = render_browse(order_index, order_type, subject, budget)
+    await callback.message.edit_text(text, reply_markup=markup, parse_mode="Markdown")
+
+@router.message(Command("search"))
+async def search_orders(message: Message, command: CommandObject, db: AsyncDatabase):
+    user = await db.get_user(message.from_user.id)
+    role = user.role if user else None
+    is_admin = message.chat.id == ADMIN_CHAT_ID or role == UserRole.ADMIN.value
+    if not is_admin and role != UserRole.EXECUTOR.value:
+        await message.answer("⚠️ Поиск заказов доступен исполнителям и администраторам")
+        return
+    
+    if not command.args:
+        await message.answer("Использование: /search <слова из предмета или описания>")
+        return
+    
+    # Исполнителям показываем только заказы, которые еще можно взять
+    status = None if is_admin else OrderStatus.ACTIVE.value
+    hits = await db.search_orders(command.args, status, limit=SEARCH_RESULTS_LIMIT)
+    if not hits:
+        await message.answer("Ничего не найдено")
+        return
+    
+    lines = [f"🔎 *Результаты поиска:* {command.args}", ""]
+    for hit in hits:
+        order = hit.order
+        emoji, _ = order.type_display
+        lines.append(
+            f"{emoji} {order.status_display} · {order.budget} руб\n"
+            f"{hit.snippet}\n"
+            f"🆔 `{order.order_id}`\n"
+        )
+    await message.answer("\n".join(lines), parse_mode="Markdown")
+
+@order_action(OrderAction.ACCEPT)
+async def accept_order(callback: CallbackQuery, order_callback: OrderCallback, order_service: OrderService):
     await callback.answer()
-    order_id = callback.data.split("_")[1]
     executor_id = callback.from_user.id
     
-    success = await order_service.accept_order(order_id, executor_id)
+    success = await order_service.accept_order(order_callback.order_id, executor_id)
     if not success:
         await callback.answer("Не удалось принять заказ", show_alert=True)
         return
     
     await callback.answer("Вы успешно приняли заказ!", show_alert=True)
 
-@router.callback_query(F.data.startswith("complete_"))
-async def complete_order(callback: CallbackQuery, order_service: OrderService):
+@order_action(OrderAction.PROGRESS)
+async def start_order_work(callback: CallbackQuery, order_callback: OrderCallback, order_service: OrderService):
+    await callback.answer()
+
+    success = await order_service.start_work(order_callback.order_id)
+    if not success:
+        await callback.answer("Не удалось перевести заказ в работу", show_alert=True)
+        return
+
+    await callback.answer("Заказ переведен в работу!", show_alert=True)
+
+@order_action(OrderAction.REVIEW)
+async def send_order_to_review(callback: CallbackQuery, order_callback: OrderCallback, order_service: OrderService):
+    await callback.answer()
+
+    success = await order_service.send_to_review(order_callback.order_id)
+    if not success:
+        await callback.answer("Не удалось отправить заказ на проверку", show_alert=True)
+        return
+
+    await callback.answer("Заказ отправлен на проверку!", show_alert=True)
+
+@order_action(OrderAction.COMPLETE)
+async def complete_order(callback: CallbackQuery, order_callback: OrderCallback, order_service: OrderService):
     await callback.answer()
-    order_id = callback.data.split("_")[1]
     
-    success = await order_service.complete_order(order_id)
+    success = await order_service.complete_order(order_callback.order_id)
     if not success:
         await callback.answer("Не удалось завершить заказ", show_alert=True)
         return
     
     await callback.answer("Заказ успешно завершен!", show_alert=True)
 
-@router.callback_query(F.data.startswith("cancel_"))
-async def cancel_order(callback: CallbackQuery, order_service: OrderService):
+@order_action(OrderAction.CANCEL)
+async def cancel_order(callback: CallbackQuery, order_callback: OrderCallback, order_service: OrderService):
     await callback.answer()
-    order_id = callback.data.split("_")[1]
     canceled_by = callback.from_user.id
     
-    success = await order_service.cancel_order(order_id, canceled_by)
+    success = await order_service.cancel_order(order_callback.order_id, canceled_by)
     if not success:
         await callback.answer("Не удалось отменить заказ", show_alert=True)
         return
     
     await callback.answer("Заказ успешно отменен!", show_alert=True)
 
+@order_action(OrderAction.RATE)
+async def rate_order(callback: CallbackQuery, order_callback: OrderCallback, rating_service: RatingService):
+    success = await rating_service.rate(order_callback.order_id, callback.from_user.id, order_callback.arg)
+    if not success:
+        await callback.answer("Этот заказ уже оценен или недоступен для оценки", show_alert=True)
+        return
+    
+    await callback.message.edit_reply_markup(reply_markup=None)
+    await callback.answer("Спасибо за оценку!")
+
 @router.callback_query(F.data.startswith("back_to_"))
 async def back_to_previous(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
@@ -306,40 +457,35 @@ async def back_to_previous(callback: CallbackQuery, state: FSMContext):
     if back_to == "types":
         await state.set_state(OrderStates.SELECTING_ORDER_TYPE)
         await callback.message.edit_text(
-            "📌 *Выберите тип работы:*",
+            TYPE_PROMPT,
             reply_markup=get_order_type_kb(),
             parse_mode="Markdown"
         )
     elif back_to == "subject":
         await state.set_state(OrderStates.ENTERING_SUBJECT)
         await callback.message.edit_text(
-            "📚 *Шаг 1 из 5: Укажите предмет/дисциплину*\n\n"
-            "Пример:\n_Математика_\n_Теория вероятностей_\n_Программирование на Python_",
+            SUBJECT_PROMPT,
             reply_markup=get_back_kb("back_to_types"),
             parse_mode="Markdown"
         )
     elif back_to == "description":
         await state.set_state(OrderStates.ENTERING_DESCRIPTION)
         await callback.message.edit_text(
-            "📝 *Шаг 2 из 5: Опишите задание подробно*\n\n"
-            "Пример:\n_Решить 5 задач по теории вероятностей из учебника Петрова_\n"
-            "_Написать курсовую по экономике, 25-30 страниц_",
+            DESCRIPTION_PROMPT,
             reply_markup=get_back_kb("back_to_subject"),
             parse_mode="Markdown"
         )
     elif back_to == "deadline":
         await state.set_state(OrderStates.ENTERING_DEADLINE)
         await callback.message.edit_text(
-            "⏰ *Шаг 3 из 5: Укажите срок выполнения*\n\n"
-            "Пример:\n_до 20 мая_\n_в течение 3 дней_\n_срочно, сегодня до 18:00_",
+            DEADLINE_PROMPT,
             reply_markup=get_back_kb("back_to_description"),
             parse_mode="Markdown"
         )
     elif back_to == "budget":
         await state.set_state(OrderStates.ENTERING_BUDGET)
         await callback.message.edit_text(
-            "💰 *Шаг 4 из 5: Укажите ваш бюджет*\n\n"
-            "Пример:\n_1500 руб_\n_2000 рублей_\n_3000₽_",
+            BUDGET_PROMPT,
             reply_markup=get_back_kb("back_to_deadline"),
             parse_mode="Markdown"
         )
\ No newline at end of file
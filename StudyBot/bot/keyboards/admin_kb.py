@@ -0,0 +1,19 @@
+from functools import lru_cache
+
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from config.settings import KEYBOARD_CACHE_SIZE
+
+@lru_cache(maxsize=None)
+def get_dispute_queue_kb():
+    builder = InlineKeyboardBuilder()
+    builder.button(text="⚖️ Взять следующий спор", callback_data="next_dispute")
+    return builder.as_markup()
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def get_dispute_resolve_kb(dispute_id: str):
+    builder = InlineKeyboardBuilder()
+    builder.button(text="👨‍💻 В пользу исполнителя", callback_data=f"dispute:executor:{dispute_id}")
+    builder.button(text="👤 В пользу клиента", callback_data=f"dispute:client:{dispute_id}")
+    builder.button(text="❌ Отклонить спор", callback_data=f"dispute:reject:{dispute_id}")
+    builder.adjust(1)
+    return builder.as_markup()
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""Компактная callback_data для действий с заказом.
+
+Кнопка несет префикс "o:" и base64url от байтов [версия, действие, аргумент, ключ
+заказа]. В версии 2 ключ — 8 байт короткого идентификатора (services/order_ids),
+всего 17 символов; версия 1 с 16-байтным UUID и старый строковый формат
+"<действие>_<order_id>" остались только для разбора кнопок в уже отправленных
+сообщениях.
+"""
+import base64
+import binascii
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional
+from uuid import UUID
+
+from services.order_ids import decode_order_id, encode_order_id
+
+CALLBACK_PREFIX = "o:"
+CALLBACK_VERSION = 2
+
+
+class OrderAction(IntEnum):
+    ACCEPT = 1
+    CANCEL = 2
+    PROGRESS = 3
+    REVIEW = 4
+    COMPLETE = 5
+    DISPUTE = 6
+    TAKE_DISPUTE = 7
+    RATE = 8
+    INCREASE = 9
+    CHAT = 10
+
+
+# Префиксы старого формата "<действие>_<order_id>[_<аргумент>]";
+# take_dispute раньше dispute, иначе последний перехватит его
+_LEGACY_ACTIONS = {
+    "take_dispute": OrderAction.TAKE_DISPUTE,
+    "accept": OrderAction.ACCEPT,
+    "cancel": OrderAction.CANCEL,
+    "progress": OrderAction.PROGRESS,
+    "review": OrderAction.REVIEW,
+    "complete": OrderAction.COMPLETE,
+    "dispute": OrderAction.DISPUTE,
+    "rate": OrderAction.RATE,
+    "increase": OrderAction.INCREASE
+}
+
+
+@dataclass(slots=True, frozen=True)
+class OrderCallback:
+    action: OrderAction
+    order_id: str
+    arg: int = 0
+
+    def pack(self) -> str:
+        key = decode_order_id(self.order_id)
+        if key is None:
+            raise ValueError(f"Некорректный идентификатор заказа: {self.order_id}")
+        # Аргумент занимает один байт
+        if not 0 <= self.arg <= 255:
+            raise ValueError(f"Аргумент действия {self.action.name} вне диапазона 0..255: {self.arg}")
+        raw = bytes((CALLBACK_VERSION, self.action, self.arg)) + key.to_bytes(8, "big")
+        return CALLBACK_PREFIX + base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    @classmethod
+    def unpack(cls, data: Optional[str]) -> Optional["OrderCallback"]:
+        """Разбирает callback_data; None, если это не действие с заказом или данные битые"""
+        if not data:
+            return None
+        if not data.startswith(CALLBACK_PREFIX):
+            return _unpack_legacy(data)
+
+        encoded = data[len(CALLBACK_PREFIX):]
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+        except (binascii.Error, ValueError):
+            return None
+        if raw[:1] == b"\x02" and len(raw) == 11:
+            order_id = encode_order_id(int.from_bytes(raw[3:], "big"))
+        elif raw[:1] == b"\x01" and len(raw) == 19:
+            order_id = str(UUID(bytes=raw[3:]))
+        else:
+            return None
+        try:
+            action = OrderAction(raw[1])
+        except ValueError:
+            return None
+        return cls(action, order_id, raw[2])
+
+
+def _unpack_legacy(data: str) -> Optional[OrderCallback]:
+    for name, action in _LEGACY_ACTIONS.items():
+        if data.startswith(name + "_"):
+            order_id, _, arg = data[len(name) + 1:].partition("_")
+            if not order_id or (arg and not arg.isdigit()):
+                return None
+            return OrderCallback(action, order_id, int(arg or 0))
+    return None
\ No newline at end of file
@@ -0,0 +1,29 @@
+from functools import lru_cache
+from typing import Optional
+
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from config.settings import KEYBOARD_CACHE_SIZE
+from keyboards.callbacks import OrderAction, OrderCallback
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def get_order_chat_kb(order_id: str):
+    builder = InlineKeyboardBuilder()
+    builder.button(text="💬 Написать по заказу", callback_data=OrderCallback(OrderAction.CHAT, order_id).pack())
+    return builder.as_markup()
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def get_chat_kb(order_id: str):
+    builder = InlineKeyboardBuilder()
+    builder.button(text="📜 История", callback_data=f"chat_history:{order_id}:")
+    builder.button(text="🚪 Выйти из чата", callback_data="chat_leave")
+    builder.adjust(2)
+    return builder.as_markup()
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def get_chat_history_kb(order_id: str, next_before: Optional[int]):
+    builder = InlineKeyboardBuilder()
+    if next_before:
+        builder.button(text="◀️ Ранее", callback_data=f"chat_history:{order_id}:{next_before}")
+    builder.button(text="🚪 Выйти из чата", callback_data="chat_leave")
+    builder.adjust(2)
+    return builder.as_markup()
\ No newline at end of file
@@ -1,5 +1,12 @@
+from functools import lru_cache
+
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+# Разметка собирается один раз и переиспользуется: сборка через билдер с
+# валидацией каждой кнопки стоит сотни микросекунд. Возвращаемые объекты общие —
+# менять их нельзя.
+
+@lru_cache(maxsize=None)
 def get_main_menu_kb():
     builder = InlineKeyboardBuilder()
     builder.button(text="📝 Оставить заказ", callback_data="create_order")
@@ -9,6 +16,7 @@ def get_main_menu_kb():
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=None)
 def get_back_kb(back_to: str = "back_to_start"):
     builder = InlineKeyboardBuilder()
     builder.button(text="🔙 Назад", callback_data=back_to)
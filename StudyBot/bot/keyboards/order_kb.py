@@ -1,7 +1,16 @@
+from functools import lru_cache
+from typing import List, Optional
+
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
-from config.constants import ORDER_TYPES, OrderStatus
+from config.constants import ORDER_TYPES, OrderStatus, BUDGET_RANGES
+from config.settings import KEYBOARD_CACHE_SIZE
+from keyboards.callbacks import OrderAction, OrderCallback
 from models.order import Order
 
+# Статичные клавиатуры кэшируются целиком, параметризованные — в ограниченном
+# LRU по (order_id, статусу). Возвращаемые объекты общие, менять их нельзя.
+
+@lru_cache(maxsize=None)
 def get_order_type_kb():
     builder = InlineKeyboardBuilder()
     for typ, (emoji, name) in ORDER_TYPES.items():
@@ -10,6 +19,7 @@ def get_order_type_kb():
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=None)
 def get_order_confirmation_kb():
     builder = InlineKeyboardBuilder()
     builder.button(text="✅ Да, создать", callback_data="final_confirm")
@@ -18,43 +28,96 @@ def get_order_confirmation_kb():
     builder.adjust(2, 1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_order_accept_kb(order_id: str):
     builder = InlineKeyboardBuilder()
-    builder.button(text="✅ Взять заказ", callback_data=f"accept_{order_id}")
+    builder.button(text="✅ Взять заказ", callback_data=OrderCallback(OrderAction.ACCEPT, order_id).pack())
     return builder.as_markup()
 
 def get_order_actions_kb(order: Order):
+    return _order_actions_kb(order.order_id, order.status)
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _order_actions_kb(order_id: str, status: str):
     builder = InlineKeyboardBuilder()
     
-    if order.status == OrderStatus.ACTIVE.value:
-        builder.button(text="✅ Взять заказ", callback_data=f"accept_{order.order_id}")
-        builder.button(text="❌ Отменить", callback_data=f"cancel_{order.order_id}")
-    elif order.status == OrderStatus.TAKEN.value:
-        builder.button(text="🔄 В работу", callback_data=f"progress_{order.order_id}")
-        builder.button(text="❌ Отменить", callback_data=f"cancel_{order.order_id}")
-    elif order.status == OrderStatus.IN_PROGRESS.value:
-        builder.button(text="🔍 На проверку", callback_data=f"review_{order.order_id}")
-        builder.button(text="⚖️ Спор", callback_data=f"dispute_{order.order_id}")
-    elif order.status == OrderStatus.UNDER_REVIEW.value:
-        builder.button(text="✅ Завершить", callback_data=f"complete_{order.order_id}")
-        builder.button(text="⚖️ Спор", callback_data=f"dispute_{order.order_id}")
-    elif order.status == OrderStatus.DISPUTE.value:
-        builder.button(text="⚖️ Принять спор", callback_data=f"take_dispute_{order.order_id}")
+    if status == OrderStatus.ACTIVE.value:
+        builder.button(text="✅ Взять заказ", callback_data=OrderCallback(OrderAction.ACCEPT, order_id).pack())
+        builder.button(text="❌ Отменить", callback_data=OrderCallback(OrderAction.CANCEL, order_id).pack())
+    elif status == OrderStatus.TAKEN.value:
+        builder.button(text="🔄 В работу", callback_data=OrderCallback(OrderAction.PROGRESS, order_id).pack())
+        builder.button(text="❌ Отменить", callback_data=OrderCallback(OrderAction.CANCEL, order_id).pack())
+    elif status == OrderStatus.IN_PROGRESS.value:
+        builder.button(text="🔍 На проверку", callback_data=OrderCallback(OrderAction.REVIEW, order_id).pack())
+        builder.button(text="⚖️ Спор", callback_data=OrderCallback(OrderAction.DISPUTE, order_id).pack())
+    elif status == OrderStatus.UNDER_REVIEW.value:
+        builder.button(text="✅ Завершить", callback_data=OrderCallback(OrderAction.COMPLETE, order_id).pack())
+        builder.button(text="⚖️ Спор", callback_data=OrderCallback(OrderAction.DISPUTE, order_id).pack())
+    elif status == OrderStatus.DISPUTE.value:
+        builder.button(text="⚖️ Принять спор", callback_data=OrderCallback(OrderAction.TAKE_DISPUTE, order_id).pack())
     
     builder.adjust(2)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def get_orders_page_kb(scope: str, next_after: Optional[str], first_page: bool):
+    builder = InlineKeyboardBuilder()
+    nav_buttons = 0
+    if not first_page:
+        builder.button(text="⏮ В начало", callback_data=scope)
+        nav_buttons += 1
+    if next_after:
+        builder.button(text="Далее ▶️", callback_data=f"{scope}:{next_after}")
+        nav_buttons += 1
+    
+    if scope == "my_orders":
+        builder.button(text="👨‍💻 Заказы в работе у меня", callback_data="my_jobs")
+    else:
+        builder.button(text="📋 Мои заказы", callback_data="my_orders")
+    builder.button(text="🔙 Назад", callback_data="back_to_start")
+    builder.adjust(*([nav_buttons] if nav_buttons else []), 1, 1)
+    return builder.as_markup()
+
+def get_browse_kb(orders: List[Order], order_type: Optional[str], budget: Optional[str]):
+    builder = InlineKeyboardBuilder()
+    for order in orders:
+        builder.button(text=f"✅ {order.subject[:24]} · {order.budget} руб", callback_data=OrderCallback(OrderAction.ACCEPT, order.order_id).pack())
+    
+    budget_key = budget or "-"
+    type_key = order_type or "-"
+    for typ, (emoji, name) in ORDER_TYPES.items():
+        mark = "• " if typ == order_type else ""
+        builder.button(text=f"{mark}{emoji} {name}", callback_data=f"browse:{typ}:{budget_key}")
+    for key, (label, _, _) in BUDGET_RANGES.items():
+        mark = "• " if key == budget else ""
+        builder.button(text=f"{mark}{label}", callback_data=f"browse:{type_key}:{key}")
+    builder.button(text="🔄 Сбросить фильтры", callback_data="browse:-:-")
+    
+    builder.adjust(*([1] * len(orders)), len(ORDER_TYPES), 2, 2, 1)
+    return builder.as_markup()
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_order_created_kb(order_id: str):
     builder = InlineKeyboardBuilder()
-    builder.button(text="💰 Повысить бюджет", callback_data=f"increase_{order_id}")
+    builder.button(text="💰 Повысить бюджет", callback_data=OrderCallback(OrderAction.INCREASE, order_id).pack())
     builder.button(text="📋 Мои заказы", callback_data="my_orders")
     builder.button(text="🔙 В главное меню", callback_data="back_to_start")
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_rating_kb(order_id: str):
     builder = InlineKeyboardBuilder()
     for i in range(1, 6):
-        builder.button(text=f"{i}⭐", callback_data=f"rate_{order_id}_{i}")
+        builder.button(text=f"{i}⭐", callback_data=OrderCallback(OrderAction.RATE, order_id, i).pack())
     builder.adjust(5)
-    return builder.as_markup()
\ No newline at end of file
+    return builder.as_markup()
+
+@lru_cache(maxsize=None)
+def get_step_kb(skip: bool = False):
+    """Reply-клавиатура шага анкеты: «Назад» и, если шаг необязательный, «Пропустить»"""
+    builder = ReplyKeyboardBuilder()
+    if skip:
+        builder.button(text="Пропустить")
+    builder.button(text="🔙 Назад")
+    return builder.as_markup(resize_keyboard=True, one_time_keyboard=True)
\ No newline at end of file
@@ -1,41 +1,234 @@
 import asyncio
+import os
+import signal
+from typing import Optional
+from multiprocessing import Process
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.utils.callback_answer import CallbackAnswerMiddleware
-from bot.handlers import common, order_handlers, dispute_handlers
-from config.settings import TOKEN
-from handlers import common, order_handlers, dispute_handlers
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+from config.settings import (
+    TOKEN,
+    TELEGRAM_API_URL,
+    FSM_STORAGE,
+    REDIS_URL,
+    FSM_TTL,
+    RUN_MODE,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_WORKERS,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_SHUTDOWN_TIMEOUT,
+    METRICS_HOST,
+    METRICS_PORT
+)
+from handlers import common, order_handlers, dispute_handlers, chat_handlers, order_actions, admin_handlers
 from middlewares.user_middleware import UserMiddleware
-from services.database import Database
-import sys
-from pathlib import Path
+from middlewares.metrics_middleware import ApiMetricsMiddleware, setup_metrics
+from middlewares.profiler_middleware import ProfilerMiddleware
+from services.database import AsyncDatabase
+from services.fsm_storage import SQLiteStorage
+from services.notifications import NotificationDispatcher
+from services.message_editor import MessageEditor
+from services.attachments import AttachmentStore
+from services.order_index import ActiveOrderIndex
+from services.order_ids import set_node
+from services.order_service import OrderService
+from services.rating_service import RatingService
+from services.chat_relay import ChatRelay
+from services.dispute_service import DisputeService
+from services.metrics import MetricsServer
+from utils.logger import setup_logger
 
-# Добавляем корень проекта в путь поиска модулей
-sys.path.append(str(Path(__file__).parent.parent.parent))
+def create_bot() -> Bot:
+    if TELEGRAM_API_URL:
+        # Локальный Bot API (или заглушка из scripts/webhook_load.py для нагрузочных прогонов)
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
+        bot = Bot(token=TOKEN, session=session)
+    else:
+        bot = Bot(token=TOKEN)
+    bot.session.middleware(ApiMetricsMiddleware())
+    return bot
 
-from bot.handlers import common, order_handlers, dispute_handlers
-async def main():
-    bot = Bot(token=TOKEN)
-    dp = Dispatcher(storage=MemoryStorage())
-    
+def create_storage(db: AsyncDatabase):
+    if FSM_STORAGE == "redis":
+        from aiogram.fsm.storage.redis import RedisStorage
+        return RedisStorage.from_url(REDIS_URL, state_ttl=FSM_TTL, data_ttl=FSM_TTL)
+    # Несколько воркеров webhook делят одну базу — кэш каждого сверяется с ней
+    return SQLiteStorage(db, shared=RUN_MODE == "webhook" and WEBHOOK_WORKERS > 1)
+
+def create_dispatcher(bot: Bot, metrics_port: int = METRICS_PORT) -> Dispatcher:
     # Инициализация базы данных
-    db = Database()
+    db = AsyncDatabase()
+    
+    storage = create_storage(db)
+    dp = Dispatcher(storage=storage)
+    
+    # Фоновая рассылка уведомлений и сервис заказов
+    notifier = NotificationDispatcher(bot)
+    editor = MessageEditor(bot)
+    order_index = ActiveOrderIndex()
+    dp["db"] = db
+    dp["notifier"] = notifier
+    dp["editor"] = editor
+    dp["order_index"] = order_index
+    dp["order_service"] = OrderService(bot, db, notifier, editor, order_index)
+    dp["dispute_service"] = DisputeService(db, notifier, dp["order_service"])
+    dp["attachments"] = AttachmentStore(bot)
+    dp["rating_service"] = RatingService(db, notifier)
+    dp["chat_relay"] = ChatRelay(bot, db)
+    dp["metrics"] = MetricsServer(METRICS_HOST, metrics_port)
+    dp["profiler"] = ProfilerMiddleware(dp)
     
     # Регистрация middleware
+    setup_metrics(dp)
     dp.update.middleware(UserMiddleware(db))
     dp.callback_query.middleware(CallbackAnswerMiddleware())
     
     # Регистрация роутеров
     dp.include_router(common.router)
     dp.include_router(order_handlers.router)
+    dp.include_router(order_actions.router)
+    dp.include_router(chat_handlers.router)
     dp.include_router(dispute_handlers.router)
+    dp.include_router(admin_handlers.router)
+    return dp
+
+async def start_services(dp: Dispatcher):
+    await dp["db"].reconcile_active_orders()
+    await dp["order_index"].rebuild(dp["db"])
+    dp["order_index"].start(dp["db"])
+    await dp["dispute_service"].rebuild()
+    dp["notifier"].start()
+    dp["rating_service"].start()
+    dp["chat_relay"].start()
+    if isinstance(dp.storage, SQLiteStorage):
+        dp.storage.start()
+    await dp["metrics"].start()
+    if hasattr(signal, "SIGUSR2"):
+        # kill -USR2 <pid> включает и выключает профилирование без перезапуска
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR2, dp["profiler"].toggle)
+
+async def stop_services(dp: Dispatcher, bot: Bot):
+    """Дописывает отложенные правки и уведомления, затем закрывает ресурсы"""
+    dp["profiler"].disable()
+    await dp["metrics"].stop()
+    await dp["order_index"].stop()
+    await dp["rating_service"].stop()
+    await dp["chat_relay"].stop()
+    await dp["editor"].flush()
+    await dp["notifier"].stop()
+    await bot.session.close()
+    await dp.storage.close()
+    await dp["db"].close()
+
+async def main():
+    bot = create_bot()
+    dp = create_dispatcher(bot)
+    await start_services(dp)
     
     try:
-        await bot.delete_webhook(drop_pending_updates=True)
-        await dp.start_polling(bot)
+        # Очередь обновлений не сбрасываем: накопленное за время деплоя будет обработано
+        await bot.delete_webhook(drop_pending_updates=False)
+        await dp.start_polling(bot, close_bot_session=False)
+    finally:
+        await stop_services(dp, bot)
+
+class DrainingRequestHandler(SimpleRequestHandler):
+    """Закрывает ресурсы на on_cleanup, т.е. после того как aiohttp дождался
+    обработки уже принятых запросов, а не на on_shutdown, как базовый класс"""
+
+    def register(self, app: web.Application, /, path: str, **kwargs) -> None:
+        app.router.add_route("POST", path, self.handle, **kwargs)
+        app.on_cleanup.append(self._handle_close)
+
+    async def close(self) -> None:
+        await stop_services(self.dispatcher, self.bot)
+
+def run_webhook_worker(process_name: Optional[str] = None, worker_index: int = 0):
+    # Поток записи логов не переживает fork — у каждого воркера свой
+    listener = setup_logger(process_name)
+    # Узел 0 занят миграцией, так что идентификаторы заказов воркеров не пересекаются
+    set_node(worker_index + 1)
+    bot = create_bot()
+    # Метрики у каждого процесса свои, поэтому и порт свой
+    dp = create_dispatcher(bot, METRICS_PORT + worker_index if METRICS_PORT else 0)
+    
+    # Ответ Telegram отправляется только после обработки апдейта, поэтому
+    # при остановке необработанные апдейты будут доставлены повторно
+    handler = DrainingRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=WEBHOOK_SECRET,
+        handle_in_background=False
+    )
+    app = web.Application()
+    handler.register(app, path=WEBHOOK_PATH)
+    
+    async def on_startup(app: web.Application):
+        await start_services(dp)
+    
+    app.on_startup.append(on_startup)
+    web.run_app(
+        app,
+        host=WEBHOOK_HOST,
+        port=WEBHOOK_PORT,
+        reuse_port=WEBHOOK_WORKERS > 1,
+        shutdown_timeout=WEBHOOK_SHUTDOWN_TIMEOUT,
+        print=None
+    )
+    listener.stop()
+
+async def set_webhook():
+    bot = create_bot()
+    try:
+        await bot.set_webhook(
+            url=f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            drop_pending_updates=False
+        )
     finally:
         await bot.session.close()
-        db.close()
+
+def run_webhook():
+    if not WEBHOOK_SECRET:
+        raise RuntimeError("Для режима webhook задайте WEBHOOK_SECRET")
+    
+    asyncio.run(set_webhook())
+    if WEBHOOK_WORKERS == 1:
+        run_webhook_worker()
+        return
+    
+    # Воркеры слушают один порт (SO_REUSEPORT); SIGTERM и SIGUSR2 пробрасываем им
+    workers = [
+        Process(target=run_webhook_worker, args=(f"webhook-{i}", i), name=f"webhook-{i}")
+        for i in range(WEBHOOK_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+    
+    signal.signal(signal.SIGTERM, lambda *_: [worker.terminate() for worker in workers])
+    if hasattr(signal, "SIGUSR2"):
+        signal.signal(signal.SIGUSR2, lambda *_: [os.kill(worker.pid, signal.SIGUSR2) for worker in workers])
+    for worker in workers:
+        try:
+            worker.join()
+        except KeyboardInterrupt:
+            # SIGINT получают и воркеры, ждем их штатного завершения
+            worker.join()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if RUN_MODE == "webhook":
+        run_webhook()
+    else:
+        listener = setup_logger()
+        try:
+            asyncio.run(main())
+        finally:
+            listener.stop()
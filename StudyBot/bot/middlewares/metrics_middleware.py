@@ -0,0 +1,124 @@
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+from services.metrics import (
+    UPDATES_IN_FLIGHT,
+    UPDATE_SECONDS,
+    HANDLER_IN_FLIGHT,
+    HANDLER_SECONDS,
+    HANDLER_ERRORS,
+    API_SECONDS,
+    API_ERRORS
+)
+
+
+def handler_label(handler: HandlerObject, order_callback: Any = None) -> str:
+    """Имя хендлера для меток: модуль.функция, для действий с заказом — еще и действие"""
+    callback = handler.callback
+    name = f"{callback.__module__.rsplit('.', 1)[-1]}.{callback.__name__}"
+    if order_callback:
+        name += f"[{order_callback.action.name.lower()}]"
+    return name
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Внешний middleware апдейта: время всей обработки и число апдейтов в работе по типу"""
+
+    def __init__(self):
+        # Тип апдейта -> (серия in_flight, серия гистограммы): одна выборка из словаря на апдейт
+        self._series: Dict[str, tuple] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        event_type = event.event_type
+        series = self._series.get(event_type)
+        if series is None:
+            series = self._series[event_type] = (
+                UPDATES_IN_FLIGHT.labels(event_type),
+                UPDATE_SECONDS.labels(event_type)
+            )
+        in_flight, seconds = series
+        in_flight.value += 1
+        start = perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            seconds.observe(perf_counter() - start)
+            in_flight.value -= 1
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Внутренний middleware: вызывается уже для выбранного хендлера, поэтому
+    метрики размечены его именем (модуль.функция). Для общего обработчика
+    действий с заказом к имени добавляется само действие"""
+
+    def __init__(self):
+        # (функция, действие) -> (имя, серия in_flight, серия гистограммы)
+        self._series: Dict[tuple, tuple] = {}
+
+    def _new_series(self, handler: HandlerObject, order_callback: Any) -> tuple:
+        name = handler_label(handler, order_callback)
+        return name, HANDLER_IN_FLIGHT.labels(name), HANDLER_SECONDS.labels(name)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data["handler"]
+        order_callback = data.get("order_callback")
+        key = (handler_object.callback, order_callback and order_callback.action)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = self._new_series(handler_object, order_callback)
+        name, in_flight, seconds = series
+        in_flight.value += 1
+        start = perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.labels(name, type(e).__name__).inc()
+            raise
+        finally:
+            seconds.observe(perf_counter() - start)
+            in_flight.value -= 1
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: время и ошибки запросов к Bot API по методу"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        api_method = method.__api_method__
+        start = perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            API_ERRORS.labels(api_method, type(e).__name__).inc()
+            raise
+        finally:
+            API_SECONDS.labels(api_method).observe(perf_counter() - start)
+
+
+def setup_metrics(dp: Dispatcher):
+    """Подключает метрики апдейтов и хендлеров ко всем типам событий диспетчера"""
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    handler_metrics = HandlerMetricsMiddleware()
+    for event_name, observer in dp.observers.items():
+        if event_name not in ("update", "error"):
+            observer.middleware(handler_metrics)
\ No newline at end of file
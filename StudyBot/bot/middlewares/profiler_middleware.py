@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import random
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject
+from middlewares.metrics_middleware import handler_label
+from services.profiler import StackProfiler
+from config.settings import PROFILE_SAMPLE_RATE, PROFILE_MAX_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerMiddleware(BaseMiddleware):
+    """Профилирование доли апдейтов по запросу администратора или сигналу.
+
+    Включение регистрирует middleware на всех событиях диспетчера и запускает
+    StackProfiler, выключение снимает и то и другое и пишет профиль в logs/,
+    так что в обычном режиме обработка апдейтов ничего не платит. Через
+    PROFILE_MAX_DURATION секунд профилирование выключается само.
+    """
+
+    def __init__(self, dp: Dispatcher, profiler: Optional[StackProfiler] = None):
+        self.dp = dp
+        self.profiler = profiler or StackProfiler()
+        self.sample_rate = PROFILE_SAMPLE_RATE
+        self._timeout: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.profiler.running
+
+    def enable(self, sample_rate: Optional[float] = None) -> bool:
+        if self.enabled:
+            return False
+        if sample_rate is not None:
+            self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        for event_name, observer in self.dp.observers.items():
+            if event_name not in ("update", "error"):
+                observer.middleware(self)
+        self.profiler.start()
+        self._timeout = asyncio.get_running_loop().call_later(PROFILE_MAX_DURATION, self.disable)
+        logger.info("Профилирование включено: доля апдейтов %.2f", self.sample_rate)
+        return True
+
+    def disable(self) -> Optional[Path]:
+        if not self.enabled:
+            return None
+        if self._timeout:
+            self._timeout.cancel()
+            self._timeout = None
+        for event_name, observer in self.dp.observers.items():
+            if event_name not in ("update", "error"):
+                observer.middleware.unregister(self)
+        return self.profiler.stop()
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        task = asyncio.current_task()
+        if random.random() >= self.sample_rate or task is None:
+            return await handler(event, data)
+
+        self.profiler.track(task, handler_label(data["handler"], data.get("order_callback")))
+        try:
+            return await handler(event, data)
+        finally:
+            self.profiler.untrack(task)
\ No newline at end of file
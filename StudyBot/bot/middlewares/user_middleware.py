@@ -1,11 +1,14 @@
+import logging
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
 from models.user import User
-from services.database import Database
+from services.database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
 
 class UserMiddleware(BaseMiddleware):
-    def __init__(self, db: Database):
+    def __init__(self, db: AsyncDatabase):
         self.db = db
     
     async def __call__(
@@ -30,8 +33,9 @@ class UserMiddleware(BaseMiddleware):
                 first_name=from_user.first_name,
                 last_name=from_user.last_name
             )
-            self.db.add_user(user)
+            await self.db.add_user(user)
             data['user'] = user
+            logger.debug("Апдейт %s от пользователя %s", type(event).__name__, from_user.id)
         
         data['db'] = self.db
         return await handler(event, data)
\ No newline at end of file
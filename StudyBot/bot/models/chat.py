@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from models.timestamps import parse_timestamp
+
+@dataclass(slots=True)
+class ChatMessage:
+    order_id: str
+    user_id: int
+    message: Optional[str]
+    is_file: bool = False
+    file_path: Optional[str] = None  # file_id Telegram для вложений
+    created_at: Optional[str] = None
+    message_id: Optional[int] = None  # назначается базой при записи
+
+    @property
+    def created_datetime(self) -> Optional[datetime]:
+        return parse_timestamp(self.created_at)
+
+
+@dataclass(slots=True)
+class ChatPage:
+    """Страница переписки (новые сначала); next_before — message_id для следующей страницы"""
+    messages: List[ChatMessage]
+    next_before: Optional[int] = None
\ No newline at end of file
@@ -2,7 +2,9 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-@dataclass
+from models.timestamps import parse_timestamp
+
+@dataclass(slots=True)
 class Dispute:
     dispute_id: str
     order_id: str
@@ -11,5 +13,13 @@ class Dispute:
     reason: Optional[str] = None
     status: str = "opened"
     resolution: Optional[str] = None
-    created_at: datetime = None
-    resolved_at: Optional[datetime] = None
\ No newline at end of file
+    created_at: Optional[str] = None
+    resolved_at: Optional[str] = None
+
+    @property
+    def created_datetime(self) -> Optional[datetime]:
+        return parse_timestamp(self.created_at)
+
+    @property
+    def resolved_datetime(self) -> Optional[datetime]:
+        return parse_timestamp(self.resolved_at)
\ No newline at end of file
@@ -1,9 +1,11 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
-from enum import Enum
+from typing import List, Optional
 
-@dataclass
+from models.user import User
+from models.timestamps import parse_timestamp
+
+@dataclass(slots=True)
 class Order:
     order_id: str
     type: str
@@ -14,11 +16,20 @@ class Order:
     client_id: int
     executor_id: Optional[int] = None
     status: str = "active"
-    created_at: datetime = None
-    completed_at: Optional[datetime] = None
+    # Время хранится как пришло из базы и разбирается только по запросу
+    created_at: Optional[str] = None
+    completed_at: Optional[str] = None
     file_path: Optional[str] = None
     message_id: Optional[int] = None
 
+    @property
+    def created_datetime(self) -> Optional[datetime]:
+        return parse_timestamp(self.created_at)
+
+    @property
+    def completed_datetime(self) -> Optional[datetime]:
+        return parse_timestamp(self.completed_at)
+
     @property
     def type_display(self) -> tuple:
         from config.constants import ORDER_TYPES
@@ -27,4 +38,25 @@ class Order:
     @property
     def status_display(self) -> str:
         from config.constants import ORDER_STATUS_DISPLAY
-        return ORDER_STATUS_DISPLAY.get(self.status, "❓ Неизвестен")
\ No newline at end of file
+        return ORDER_STATUS_DISPLAY.get(self.status, "❓ Неизвестен")
+
+@dataclass(slots=True)
+class OrderDetails:
+    """Заказ вместе с участниками, загруженный одним запросом"""
+    order: Order
+    client: Optional[User] = None
+    executor: Optional[User] = None
+    canceller: Optional[User] = None
+
+
+@dataclass(slots=True)
+class OrderPage:
+    """Страница заказов; next_after — order_id для запроса следующей страницы"""
+    orders: List[Order]
+    next_after: Optional[str] = None
+
+
+@dataclass(slots=True)
+class OrderSearchHit:
+    order: Order
+    snippet: str
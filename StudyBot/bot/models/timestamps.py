@@ -0,0 +1,9 @@
+from datetime import datetime
+from typing import Optional, Union
+
+
+def parse_timestamp(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """Разбирает TIMESTAMP из SQLite ('YYYY-MM-DD HH:MM:SS' или ISO) по требованию"""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
@@ -2,7 +2,9 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-@dataclass
+from models.timestamps import parse_timestamp
+
+@dataclass(slots=True)
 class User:
     user_id: int
     username: Optional[str]
@@ -11,7 +13,18 @@ class User:
     role: str = "customer"
     rating: float = 0.0
     completed_orders: int = 0
-    created_at: datetime = None
+    created_at: Optional[str] = None
+
+    @property
+    def created_datetime(self) -> Optional[datetime]:
+        return parse_timestamp(self.created_at)
+
+    def same_profile(self, other: "User") -> bool:
+        return (
+            self.username == other.username and
+            self.first_name == other.first_name and
+            self.last_name == other.last_name
+        )
 
     @property
     def mention(self) -> str:
@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Tuple
+
+from aiogram import Bot
+from config.settings import UPLOAD_FOLDER, MAX_FILE_SIZE_MB, UPLOAD_CHUNK_SIZE, UPLOAD_RESULT_TTL
+
+logger = logging.getLogger(__name__)
+
+
+class FileTooLargeError(Exception):
+    pass
+
+
+class AttachmentStore:
+    """Потоковое сохранение вложений заказов.
+
+    Файл скачивается кусками по UPLOAD_CHUNK_SIZE, SHA-256 считается на лету,
+    результат кладется по хэшу содержимого (повторная загрузка того же файла
+    не занимает места). Загрузка идет фоновой задачей: анкета продолжается
+    сразу, а путь к файлу забирается через result() при подтверждении заказа.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        folder: Path = UPLOAD_FOLDER,
+        max_size: int = MAX_FILE_SIZE_MB * 1024 * 1024,
+        chunk_size: int = UPLOAD_CHUNK_SIZE
+    ):
+        self.bot = bot
+        self.folder = folder
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self._tmp_folder = folder / "tmp"
+        self._tmp_folder.mkdir(parents=True, exist_ok=True)
+        
+        # file_unique_id -> (задача, время запуска)
+        self._tasks: Dict[str, Tuple[asyncio.Task, float]] = {}
+    
+    def start_ingest(self, key: str, file_id: str, file_ext: str) -> None:
+        self._prune()
+        if key not in self._tasks:
+            task = asyncio.create_task(self._ingest(file_id, file_ext))
+            task.add_done_callback(lambda done: self._log_failure(key, done))
+            self._tasks[key] = (task, time.monotonic())
+    
+    async def result(self, key: str, file_id: str, file_ext: str) -> Path:
+        """Путь к сохраненному файлу. Если загрузка шла в другом процессе, скачивает заново"""
+        entry = self._tasks.pop(key, None)
+        if entry is None:
+            return await self._ingest(file_id, file_ext)
+        return await entry[0]
+    
+    @staticmethod
+    def _log_failure(key: str, task: asyncio.Task):
+        # Ошибку видно сразу, а не только при подтверждении анкеты (или никогда, если ее бросили)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if isinstance(error, FileTooLargeError):
+            logger.warning("Вложение %s больше допустимого: %s байт", key, error)
+        elif error is not None:
+            logger.error("Не удалось загрузить вложение %s", key, exc_info=error)
+    
+    @staticmethod
+    def _write(tmp_file, digest, chunk: bytes):
+        digest.update(chunk)
+        tmp_file.write(chunk)
+    
+    def _prune(self):
+        # Результаты брошенных анкет не держим бесконечно
+        deadline = time.monotonic() - UPLOAD_RESULT_TTL
+        for key, (task, started_at) in list(self._tasks.items()):
+            if task.done() and started_at < deadline:
+                del self._tasks[key]
+                if not task.cancelled():
+                    task.exception()
+    
+    async def _ingest(self, file_id: str, file_ext: str) -> Path:
+        file = await self.bot.get_file(file_id)
+        if file.file_size and file.file_size > self.max_size:
+            raise FileTooLargeError(file.file_size)
+        
+        url = self.bot.session.api.file_url(self.bot.token, file.file_path)
+        tmp_path = self._tmp_folder / f"{uuid.uuid4().hex}.part"
+        digest = hashlib.sha256()
+        size = 0
+        loop = asyncio.get_running_loop()
+        
+        try:
+            with open(tmp_path, "wb") as tmp_file:
+                async for chunk in self.bot.session.stream_content(url=url, chunk_size=self.chunk_size):
+                    size += len(chunk)
+                    if size > self.max_size:
+                        raise FileTooLargeError(size)
+                    # Запись на диск (и хэш заодно) — в пуле потоков, чтобы медленный диск не держал event loop.
+                    # Куски пишутся по одному, порядок сохраняется
+                    await loop.run_in_executor(None, self._write, tmp_file, digest, chunk)
+            
+            sha256 = digest.hexdigest()
+            target = self.folder / sha256[:2] / f"{sha256}{file_ext}"
+            if target.exists():
+                tmp_path.unlink()
+            else:
+                target.parent.mkdir(exist_ok=True)
+                os.replace(tmp_path, target)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        
+        return target
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from aiogram import Bot
+from aiogram.types import Message
+from models.chat import ChatMessage, ChatPage
+from services.database import AsyncDatabase
+from config.constants import OrderStatus
+from config.settings import CHAT_FLUSH_SIZE, CHAT_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Статусы, в которых клиент и исполнитель могут переписываться
+CHAT_STATUSES = {
+    OrderStatus.TAKEN.value,
+    OrderStatus.IN_PROGRESS.value,
+    OrderStatus.UNDER_REVIEW.value,
+    OrderStatus.DISPUTE.value
+}
+
+
+class ChatRelay:
+    """Переписка клиента и исполнителя по заказу.
+
+    Сообщение пересылается собеседнику сразу, а в chat_messages попадает через
+    буфер: он сбрасывается одной транзакцией (executemany) по заполнении
+    CHAT_FLUSH_SIZE или раз в CHAT_FLUSH_INTERVAL секунд, так что задержка
+    пересылки не зависит от записи на диск.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        db: AsyncDatabase,
+        flush_size: int = CHAT_FLUSH_SIZE,
+        flush_interval: float = CHAT_FLUSH_INTERVAL
+    ):
+        self.bot = bot
+        self.db = db
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer: List[ChatMessage] = []
+        self._full = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    async def open_chat(self, order_id: str, user_id: int) -> Optional[int]:
+        """id собеседника, если пользователь — участник заказа в статусе с чатом"""
+        order = await self.db.get_order(order_id)
+        if not order or order.status not in CHAT_STATUSES or not order.executor_id:
+            return None
+        if user_id == order.client_id:
+            return order.executor_id
+        if user_id == order.executor_id:
+            return order.client_id
+        return None
+
+    async def relay(self, message: Message, order_id: str, peer_id: int) -> Optional[bool]:
+        """Пересылает текст, документ или фото; False — тип не поддерживается,
+        None — чат закрыт: заказ с открытия чата завершен или отменен"""
+        # Статус проверяется на каждое сообщение: его могли сменить в другом чате или воркере
+        if await self.open_chat(order_id, message.from_user.id) != peer_id:
+            return None
+        
+        header = f"💬 Заказ {order_id}:"
+        if message.text:
+            await self.bot.send_message(peer_id, f"{header}\n{message.text}")
+            record = ChatMessage(order_id, message.from_user.id, message.text)
+        elif message.document or message.photo:
+            caption = f"{header}\n{message.caption}" if message.caption else header
+            await message.copy_to(peer_id, caption=caption)
+            file_id = message.document.file_id if message.document else message.photo[-1].file_id
+            record = ChatMessage(order_id, message.from_user.id, message.caption, True, file_id)
+        else:
+            return False
+
+        # Время фиксируется в момент пересылки, а не записи пачки
+        record.created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        self._buffer.append(record)
+        if len(self._buffer) >= self.flush_size:
+            self._full.set()
+        return True
+
+    async def history(self, order_id: str, before: Optional[int] = None) -> ChatPage:
+        if not before:
+            # Первая страница должна включать еще не записанные сообщения
+            await self.flush()
+        return await self.db.get_chat_page(order_id, before)
+
+    async def flush(self):
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        try:
+            await self.db.add_chat_messages(batch)
+        except Exception:
+            logger.exception("Не удалось записать %d сообщений чата", len(batch))
+            self._buffer[:0] = batch
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
\ No newline at end of file
@@ -1,19 +1,103 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+import queue
 import sqlite3
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import Dict, Any, List, Optional, Callable, AsyncIterator, Tuple
 from pathlib import Path
 import uuid
 from datetime import datetime
 
 from models.user import User
-from models.order import Order
+from models.order import Order, OrderDetails, OrderPage, OrderSearchHit
 from models.dispute import Dispute
-from config.settings import DB_NAME
-from config.constants import OrderStatus, UserRole, DisputeStatus
+from models.chat import ChatMessage, ChatPage
+from config.settings import (
+    DB_NAME,
+    DB_JOURNAL_MODE,
+    DB_SYNCHRONOUS,
+    DB_GROUP_COMMIT,
+    DB_COMMIT_MAX_BATCH,
+    ORDERS_PAGE_SIZE,
+    CHAT_HISTORY_PAGE_SIZE
+)
+from config.constants import OrderStatus, UserRole, DisputeStatus, ORDER_TRANSITIONS
+from services.migrations import apply_migrations
+from services.mapper import USERS, ORDERS, DISPUTES, CHAT_MESSAGES
+from services.search import build_fts_query
+from services.user_cache import UserCache
+from services.metrics import DB_SECONDS, DB_ERRORS
+
+class _Cursor(sqlite3.Cursor):
+    def execute(self, sql: str, parameters=()):
+        hook = self.connection.statement_hook
+        if hook is not None:
+            hook(sql)
+        return super().execute(sql, parameters)
+    
+    def executemany(self, sql: str, seq_of_parameters):
+        hook = self.connection.statement_hook
+        if hook is not None:
+            hook(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+
+class _Connection(sqlite3.Connection):
+    """Соединение, сообщающее statement_hook о каждом запросе приложения.
+    В отличие от trace, операторы триггеров сюда не попадают"""
+    statement_hook: Optional[Callable[[str], None]] = None
+    
+    def cursor(self, factory=_Cursor):
+        return super().cursor(factory)
+
 
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect(DB_NAME)
+    def __init__(self, db_name: Path = DB_NAME, group_commit: bool = False):
+        self.group_commit = group_commit
+        # В режиме групповой фиксации транзакциями управляет run_batch
+        self.conn = sqlite3.connect(db_name, isolation_level=None if group_commit else "", factory=_Connection)
+        self.conn.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
+        self.conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
         self._create_tables()
+        apply_migrations(self.conn)
+    
+    def _commit(self):
+        if not self.group_commit:
+            self.conn.commit()
+    
+    def _rollback(self):
+        # В групповом режиме откат до точки сохранения делает run_batch по исключению
+        if not self.group_commit:
+            self.conn.rollback()
+    
+    def run_batch(self, calls: List[tuple]) -> List[tuple]:
+        """Выполняет пачку вызовов (func, args) в одной транзакции.
+
+        Каждый вызов изолирован точкой сохранения: ошибка откатывает только его.
+        Возвращает список пар (result, error) в порядке вызовов.
+        """
+        results = []
+        self.conn.execute("BEGIN")
+        for func, args in calls:
+            self.conn.execute("SAVEPOINT request")
+            try:
+                result = func(self, *args)
+            except Exception as e:
+                self.conn.execute("ROLLBACK TO request")
+                self.conn.execute("RELEASE request")
+                results.append((None, e))
+            else:
+                self.conn.execute("RELEASE request")
+                results.append((result, None))
+        
+        try:
+            self.conn.execute("COMMIT")
+        except Exception as e:
+            self.conn.execute("ROLLBACK")
+            return [(None, e)] * len(calls)
+        return results
     
     def _create_tables(self):
         """Создает все необходимые таблицы в базе данных"""
@@ -93,32 +177,24 @@ class Database:
             FOREIGN KEY (customer_id) REFERENCES users (user_id)
         )""")
         
-        self.conn.commit()
+        self._commit()
 
     def add_user(self, user: User) -> None:
         cursor = self.conn.cursor()
         cursor.execute(
-            "INSERT OR IGNORE INTO users (user_id, username, first_name, last_name) VALUES (?, ?, ?, ?)",
+            """INSERT INTO users (user_id, username, first_name, last_name) VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+                username = excluded.username,
+                first_name = excluded.first_name,
+                last_name = excluded.last_name""",
             (user.user_id, user.username, user.first_name, user.last_name)
         )
-        self.conn.commit()
+        self._commit()
     
     def get_user(self, user_id: int) -> Optional[User]:
         cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-        row = cursor.fetchone()
-        if row:
-            return User(
-                user_id=row[0],
-                username=row[1],
-                first_name=row[2],
-                last_name=row[3],
-                role=row[4],
-                rating=row[5],
-                completed_orders=row[6],
-                created_at=row[7]
-            )
-        return None
+        cursor.execute(f"SELECT {USERS.select} FROM users WHERE user_id = ?", (user_id,))
+        return USERS.one(cursor.fetchone())
     
     def set_user_role(self, user_id: int, role: UserRole) -> bool:
         cursor = self.conn.cursor()
@@ -126,47 +202,96 @@ class Database:
             "UPDATE users SET role = ? WHERE user_id = ?",
             (role.value, user_id)
         )
-        self.conn.commit()
+        self._commit()
         return cursor.rowcount > 0
     
-    def add_order(self, order: Order) -> str:
+    def add_order(self, order: Order, max_active: Optional[int] = None) -> Optional[str]:
+        """Добавляет заказ. С max_active вставка условная: если у клиента уже
+        столько активных заказов, ничего не пишется и возвращается None"""
         cursor = self.conn.cursor()
-        cursor.execute(
-            """INSERT INTO orders (
-                order_id, type, subject, description, deadline, budget,
-                client_id, executor_id, status, file_path, message_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                order.order_id, order.type, order.subject,
-                order.description, order.deadline,
-                order.budget, order.client_id, order.executor_id,
-                order.status, order.file_path, order.message_id
+        values = (
+            order.order_id, order.type, order.subject,
+            order.description, order.deadline,
+            order.budget, order.client_id, order.executor_id,
+            order.status, order.file_path, order.message_id
+        )
+        columns = """order_id, type, subject, description, deadline, budget,
+                client_id, executor_id, status, file_path, message_id, order_key"""
+        # Постоянный ключ для orders_fts: следующий после максимального (по индексу)
+        next_key = "(SELECT COALESCE(MAX(order_key), 0) + 1 FROM orders)"
+        if max_active is None:
+            cursor.execute(
+                f"INSERT INTO orders ({columns}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {next_key})",
+                values
+            )
+        else:
+            cursor.execute(
+                f"""INSERT INTO orders ({columns})
+                SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {next_key}
+                WHERE COALESCE((SELECT active_orders FROM users WHERE user_id = ?), 0) < ?""",
+                (*values, order.client_id, max_active)
             )
+        self._commit()
+        return order.order_id if cursor.rowcount > 0 else None
+    
+    def get_active_order_count(self, user_id: int) -> int:
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT active_orders FROM users WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    
+    def reconcile_active_orders(self) -> int:
+        """Сверяет счетчики активных заказов с таблицей заказов. Возвращает число исправленных"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """UPDATE users SET active_orders = counted.total
+            FROM (
+                SELECT users.user_id, COUNT(orders.order_id) AS total
+                FROM users LEFT JOIN orders
+                    ON orders.client_id = users.user_id AND orders.status = ?
+                GROUP BY users.user_id
+            ) AS counted
+            WHERE counted.user_id = users.user_id AND counted.total != users.active_orders""",
+            (OrderStatus.ACTIVE.value,)
         )
-        self.conn.commit()
-        return order.order_id
+        self._commit()
+        return cursor.rowcount
     
     def get_order(self, order_id: str) -> Optional[Order]:
         cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,))
+        cursor.execute(f"SELECT {ORDERS.select} FROM orders WHERE order_id = ?", (order_id,))
+        return ORDERS.one(cursor.fetchone())
+    
+    def get_order_details(self, order_id: str, canceller_id: Optional[int] = None) -> Optional[OrderDetails]:
+        """Заказ, клиент, исполнитель и (опционально) отменивший — одним JOIN-запросом"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""SELECT {ORDERS.columns_sql("o")}, {USERS.columns_sql("c")},
+                {USERS.columns_sql("e")}, {USERS.columns_sql("x")}
+            FROM orders o
+            LEFT JOIN users c ON c.user_id = o.client_id
+            LEFT JOIN users e ON e.user_id = o.executor_id
+            LEFT JOIN users x ON x.user_id = ?
+            WHERE o.order_id = ?""",
+            (canceller_id, order_id)
+        )
         row = cursor.fetchone()
-        if row:
-            return Order(
-                order_id=row[0],
-                type=row[1],
-                subject=row[2],
-                description=row[3],
-                deadline=row[4],
-                budget=row[5],
-                client_id=row[6],
-                executor_id=row[7],
-                status=row[8],
-                created_at=row[9],
-                completed_at=row[10],
-                file_path=row[11],
-                message_id=row[12]
-            )
-        return None
+        if not row:
+            return None
+        
+        users_at = ORDERS.width
+        return OrderDetails(
+            order=ORDERS.one(row),
+            client=USERS.one(row, users_at),
+            executor=USERS.one(row, users_at + USERS.width),
+            canceller=USERS.one(row, users_at + 2 * USERS.width)
+        )
+    
+    def set_trace(self, callback: Optional[Callable[[str], None]]) -> None:
+        self.conn.set_trace_callback(callback)
+    
+    def set_statement_hook(self, callback: Optional[Callable[[str], None]]) -> None:
+        self.conn.statement_hook = callback
     
     def update_order(self, order_id: str, updates: dict) -> bool:
         cursor = self.conn.cursor()
@@ -177,12 +302,44 @@ class Database:
             f"UPDATE orders SET {set_clause} WHERE order_id = ?",
             values
         )
-        self.conn.commit()
+        self._commit()
         return cursor.rowcount > 0
     
+    def transition_order(self, order_id: str, status: OrderStatus, updates: Optional[dict] = None) -> Optional[Order]:
+        """Переводит заказ в статус одним условным UPDATE.
+        
+        Возвращает обновленный заказ или None, если заказа нет либо его
+        текущий статус не допускает такого перехода.
+        """
+        order = self._transition_order(self.conn.cursor(), order_id, status, updates)
+        self._commit()
+        return order
+    
+    def _transition_order(
+        self,
+        cursor: sqlite3.Cursor,
+        order_id: str,
+        status: OrderStatus,
+        updates: Optional[dict] = None
+    ) -> Optional[Order]:
+        sources = ORDER_TRANSITIONS.get(status)
+        if not sources:
+            raise ValueError(f"Нет переходов в статус {status}")
+        
+        updates = {"status": status.value, **(updates or {})}
+        set_clause = ", ".join(f"{key} = ?" for key in updates.keys())
+        placeholders = ", ".join("?" for _ in sources)
+        cursor.execute(
+            f"""UPDATE orders SET {set_clause}
+                WHERE order_id = ? AND status IN ({placeholders})
+                RETURNING {ORDERS.select}""",
+            [*updates.values(), order_id, *(source.value for source in sources)]
+        )
+        return ORDERS.one(cursor.fetchone())
+    
     def get_user_orders(self, user_id: int, status: Optional[str] = None) -> List[Order]:
         cursor = self.conn.cursor()
-        query = "SELECT * FROM orders WHERE client_id = ?"
+        query = f"SELECT {ORDERS.select} FROM orders WHERE client_id = ?"
         params = [user_id]
         
         if status:
@@ -190,49 +347,194 @@ class Database:
             params.append(status)
         
         cursor.execute(query, params)
-        return [
-            Order(
-                order_id=row[0],
-                type=row[1],
-                subject=row[2],
-                description=row[3],
-                deadline=row[4],
-                budget=row[5],
-                client_id=row[6],
-                executor_id=row[7],
-                status=row[8],
-                created_at=row[9],
-                completed_at=row[10],
-                file_path=row[11],
-                message_id=row[12]
-            )
-            for row in cursor.fetchall()
-        ]
+        return ORDERS.many(cursor.fetchall())
     
     def get_active_orders(self) -> List[Order]:
         cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM orders WHERE status = ?", (OrderStatus.ACTIVE.value,))
-        return [
-            Order(
-                order_id=row[0],
-                type=row[1],
-                subject=row[2],
-                description=row[3],
-                deadline=row[4],
-                budget=row[5],
-                client_id=row[6],
-                executor_id=row[7],
-                status=row[8],
-                created_at=row[9],
-                completed_at=row[10],
-                file_path=row[11],
-                message_id=row[12]
+        cursor.execute(f"SELECT {ORDERS.select} FROM orders WHERE status = ?", (OrderStatus.ACTIVE.value,))
+        return ORDERS.many(cursor.fetchall())
+    
+    def get_order_changes_seq(self) -> int:
+        """Номер последней записи журнала изменений заказов (0, если записей не было)"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'order_changes'")
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    
+    def get_order_changes(self, after: int) -> Optional[Tuple[int, List[Tuple[str, Optional[Order]]]]]:
+        """Заказы, изменившиеся после записи журнала after, в их текущем виде
+        (None вместо заказа — он удален). Возвращает (последний seq, изменения)
+        или None, если часть журнала после after уже вычищена"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""SELECT c.seq, c.order_id, {ORDERS.columns_sql("o")}
+            FROM order_changes c LEFT JOIN orders o ON o.order_id = c.order_id
+            WHERE c.seq > ? ORDER BY c.seq""",
+            (after,)
+        )
+        rows = cursor.fetchall()
+        if rows and rows[0][0] != after + 1 or not rows and self.get_order_changes_seq() > after:
+            return None
+        
+        changes: Dict[str, Optional[Order]] = {}
+        for row in rows:
+            changes[row[1]] = ORDERS.one(row, 2)
+        return (rows[-1][0] if rows else after), list(changes.items())
+    
+    def prune_order_changes(self, older_than: float) -> int:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "DELETE FROM order_changes WHERE changed_at < datetime('now', ?)",
+            (f"-{int(older_than)} seconds",)
+        )
+        self._commit()
+        return cursor.rowcount
+    
+    def get_orders_page(
+        self,
+        filters: Dict[str, Any],
+        after: Optional[str] = None,
+        limit: int = ORDERS_PAGE_SIZE
+    ) -> OrderPage:
+        """Страница заказов (новые сначала) с keyset-пагинацией по (created_at, order_id).
+
+        filters — равенства по колонкам orders, after — order_id последнего
+        заказа предыдущей страницы. Стоимость не зависит от номера страницы.
+        """
+        cursor = self.conn.cursor()
+        conditions = [f"{column} = ?" for column in filters]
+        params = list(filters.values())
+        
+        if after:
+            conditions.append(
+                "(created_at, order_id) < (SELECT created_at, order_id FROM orders WHERE order_id = ?)"
             )
+            params.append(after)
+        
+        query = f"SELECT {ORDERS.select} FROM orders"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, order_id DESC LIMIT ?"
+        params.append(limit + 1)
+        
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        orders = ORDERS.many(rows[:limit])
+        next_after = orders[-1].order_id if len(rows) > limit else None
+        return OrderPage(orders, next_after)
+    
+    def search_orders(self, text: str, status: Optional[str] = None, limit: int = 10) -> List[OrderSearchHit]:
+        """Полнотекстовый поиск по предмету и описанию, лучшие совпадения первыми"""
+        match = build_fts_query(text)
+        if not match:
+            return []
+        
+        cursor = self.conn.cursor()
+        query = f"""SELECT {ORDERS.columns_sql("o")}, snippet(orders_fts, -1, '*', '*', '…', 12)
+            FROM orders_fts
+            JOIN orders o ON o.order_key = orders_fts.rowid
+            WHERE orders_fts MATCH ?"""
+        params: List[Any] = [match]
+        if status:
+            query += " AND o.status = ?"
+            params.append(status)
+        # Совпадение в предмете весит больше, чем в описании
+        query += " ORDER BY bm25(orders_fts, 3.0, 1.0) LIMIT ?"
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        return [
+            OrderSearchHit(ORDERS.one(row), row[ORDERS.width])
             for row in cursor.fetchall()
         ]
     
-    def add_dispute(self, dispute: Dispute) -> str:
+    def add_rating(self, order_id: str, customer_id: int, rating: int) -> Optional[int]:
+        """Записывает оценку клиента за завершенный заказ; агрегаты исполнителя
+        обновляет триггер в той же транзакции. Возвращает id исполнителя или
+        None, если заказ не завершен, не принадлежит клиенту или уже оценен"""
         cursor = self.conn.cursor()
+        cursor.execute(
+            """INSERT OR IGNORE INTO ratings (order_id, executor_id, customer_id, rating)
+            SELECT order_id, executor_id, client_id, ? FROM orders
+            WHERE order_id = ? AND client_id = ? AND status = ? AND executor_id IS NOT NULL
+            RETURNING executor_id""",
+            (rating, order_id, customer_id, OrderStatus.COMPLETED.value)
+        )
+        row = cursor.fetchone()
+        self._commit()
+        return row[0] if row else None
+    
+    def recompute_ratings(self) -> int:
+        """Полный пересчет рейтингов и завершенных заказов из таблиц ratings/orders
+        для сверки с накопительными значениями. Возвращает число исправленных"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """UPDATE users SET
+                rating_sum = agg.total,
+                rating_count = agg.votes,
+                rating = CASE WHEN agg.votes > 0 THEN agg.total * 1.0 / agg.votes ELSE 0 END,
+                completed_orders = agg.completed
+            FROM (
+                SELECT
+                    users.user_id,
+                    COALESCE((SELECT SUM(rating) FROM ratings WHERE executor_id = users.user_id), 0) AS total,
+                    (SELECT COUNT(*) FROM ratings WHERE executor_id = users.user_id) AS votes,
+                    (SELECT COUNT(*) FROM orders WHERE executor_id = users.user_id AND status = ?) AS completed
+                FROM users
+            ) AS agg
+            WHERE agg.user_id = users.user_id AND (
+                agg.total != users.rating_sum OR
+                agg.votes != users.rating_count OR
+                agg.completed != users.completed_orders
+            )""",
+            (OrderStatus.COMPLETED.value,)
+        )
+        self._commit()
+        return cursor.rowcount
+    
+    def add_chat_messages(self, messages: List[ChatMessage]) -> int:
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            """INSERT INTO chat_messages (order_id, user_id, message, is_file, file_path, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)""",
+            [
+                (m.order_id, m.user_id, m.message, int(m.is_file), m.file_path, m.created_at)
+                for m in messages
+            ]
+        )
+        self._commit()
+        return len(messages)
+    
+    def get_chat_page(
+        self,
+        order_id: str,
+        before: Optional[int] = None,
+        limit: int = CHAT_HISTORY_PAGE_SIZE
+    ) -> ChatPage:
+        """Страница переписки по заказу (новые сначала), keyset по message_id"""
+        cursor = self.conn.cursor()
+        query = f"SELECT {CHAT_MESSAGES.select} FROM chat_messages WHERE order_id = ?"
+        params: List[Any] = [order_id]
+        if before:
+            query += " AND message_id < ?"
+            params.append(before)
+        query += " ORDER BY message_id DESC LIMIT ?"
+        params.append(limit + 1)
+        
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        messages = CHAT_MESSAGES.many(rows[:limit])
+        next_before = messages[-1].message_id if len(rows) > limit else None
+        return ChatPage(messages, next_before)
+    
+    def add_dispute(self, dispute: Dispute) -> Optional[Order]:
+        """Открывает спор: переводит заказ в DISPUTE и записывает спор в одной
+        транзакции. None, если статус заказа не допускает спора"""
+        cursor = self.conn.cursor()
+        order = self._transition_order(cursor, dispute.order_id, OrderStatus.DISPUTE)
+        if not order:
+            return None
+        
         cursor.execute(
             """INSERT INTO disputes (
                 dispute_id, order_id, opened_by, admin_id, reason, status, resolution
@@ -243,31 +545,79 @@ class Database:
             )
         )
         
+        self._commit()
+        return order
+    
+    def claim_dispute(self, admin_id: int, dispute_id: Optional[str] = None, order_id: Optional[str] = None) -> Optional[Dispute]:
+        """Закрепляет открытый спор (по id спора или заказа) за администратором.
+        Условный UPDATE: из двух одновременных попыток успешна только одна"""
+        column, value = ("dispute_id", dispute_id) if dispute_id else ("order_id", order_id)
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""UPDATE disputes SET admin_id = ?, status = ?
+                WHERE {column} = ? AND status = ?
+                RETURNING {DISPUTES.select}""",
+            (admin_id, DisputeStatus.IN_PROGRESS.value, value, DisputeStatus.OPENED.value)
+        )
+        row = cursor.fetchone()
+        self._commit()
+        return DISPUTES.one(row)
+    
+    def resolve_dispute(
+        self,
+        dispute_id: str,
+        admin_id: int,
+        status: DisputeStatus,
+        resolution: str,
+        order_status: OrderStatus,
+        order_updates: Optional[dict] = None
+    ) -> Optional[Tuple[Dispute, Order]]:
+        """Закрывает спор, взятый этим администратором, и переводит заказ в
+        order_status в той же транзакции"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""UPDATE disputes SET status = ?, resolution = ?, resolved_at = CURRENT_TIMESTAMP
+                WHERE dispute_id = ? AND admin_id = ? AND status = ?
+                RETURNING {DISPUTES.select}""",
+            (status.value, resolution, dispute_id, admin_id, DisputeStatus.IN_PROGRESS.value)
+        )
+        dispute = DISPUTES.one(cursor.fetchone())
+        if not dispute:
+            return None
+        
+        # Выход из спора — только через его разрешение, поэтому не через ORDER_TRANSITIONS
+        updates = {"status": order_status.value, **(order_updates or {})}
+        set_clause = ", ".join(f"{key} = ?" for key in updates.keys())
         cursor.execute(
-            "UPDATE orders SET status = ? WHERE order_id = ?",
-            (OrderStatus.DISPUTE.value, dispute.order_id)
+            f"""UPDATE orders SET {set_clause}
+                WHERE order_id = ? AND status = ?
+                RETURNING {ORDERS.select}""",
+            [*updates.values(), dispute.order_id, OrderStatus.DISPUTE.value]
         )
+        order = ORDERS.one(cursor.fetchone())
+        if not order:
+            # Заказ вышел из спора в обход сервиса — спор не закрываем
+            self._rollback()
+            raise ValueError(f"Заказ {dispute.order_id} не в статусе спора")
         
-        self.conn.commit()
-        return dispute.dispute_id
+        self._commit()
+        return dispute, order
+    
+    def get_pending_disputes(self) -> List[Tuple[Dispute, int]]:
+        """Открытые и взятые в работу споры с бюджетом заказа — для очереди"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""SELECT {DISPUTES.columns_sql("d")}, o.budget
+            FROM disputes d JOIN orders o ON o.order_id = d.order_id
+            WHERE d.status IN (?, ?)""",
+            (DisputeStatus.OPENED.value, DisputeStatus.IN_PROGRESS.value)
+        )
+        return [(DISPUTES.one(row), row[DISPUTES.width]) for row in cursor.fetchall()]
     
     def get_dispute(self, dispute_id: str) -> Optional[Dispute]:
         cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM disputes WHERE dispute_id = ?", (dispute_id,))
-        row = cursor.fetchone()
-        if row:
-            return Dispute(
-                dispute_id=row[0],
-                order_id=row[1],
-                opened_by=row[2],
-                admin_id=row[3],
-                reason=row[4],
-                status=row[5],
-                resolution=row[6],
-                created_at=row[7],
-                resolved_at=row[8]
-            )
-        return None
+        cursor.execute(f"SELECT {DISPUTES.select} FROM disputes WHERE dispute_id = ?", (dispute_id,))
+        return DISPUTES.one(cursor.fetchone())
     
     def update_dispute(self, dispute_id: str, updates: dict) -> bool:
         cursor = self.conn.cursor()
@@ -278,8 +628,390 @@ class Database:
             f"UPDATE disputes SET {set_clause} WHERE dispute_id = ?",
             values
         )
-        self.conn.commit()
+        self._commit()
         return cursor.rowcount > 0
     
+    # Записи FSM возвращают строку (state, data, updated_at, version); version растет
+    # с каждой записью и по ней кэши других процессов узнают об изменениях.
+    # Записи старше expired_before считаются брошенными: их state и data не наследуются
+    _FSM_UPSERT = """INSERT INTO fsm_storage (key, state, data, updated_at, version) VALUES (?, ?, ?, ?, 1)
+        ON CONFLICT (key) DO UPDATE SET {columns}, updated_at = excluded.updated_at, version = version + 1
+        RETURNING state, data, updated_at, version"""
+    
+    def get_fsm_record(self, key: str) -> Optional[tuple]:
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT state, data, updated_at, version FROM fsm_storage WHERE key = ?", (key,))
+        return cursor.fetchone()
+    
+    def get_fsm_version(self, key: str) -> Optional[int]:
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT version FROM fsm_storage WHERE key = ?", (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def set_fsm_state(self, key: str, state: Optional[str], updated_at: float, expired_before: float) -> tuple:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            self._FSM_UPSERT.format(columns="""state = excluded.state,
+                data = CASE WHEN updated_at >= ? THEN data END"""),
+            (key, state, None, updated_at, expired_before)
+        )
+        row = cursor.fetchone()
+        self._commit()
+        return row
+    
+    def set_fsm_data(self, key: str, data: str, updated_at: float, expired_before: float) -> tuple:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            self._FSM_UPSERT.format(columns="""data = excluded.data,
+                state = CASE WHEN updated_at >= ? THEN state END"""),
+            (key, None, data, updated_at, expired_before)
+        )
+        row = cursor.fetchone()
+        self._commit()
+        return row
+    
+    def update_fsm_data(self, key: str, patch: Dict[str, Any], updated_at: float, expired_before: float) -> tuple:
+        """Дописывает ключи patch в data одним UPSERT (json_set), так что
+        параллельные обновления из разных процессов не затирают друг друга"""
+        paths = ", ".join("?, json(?)" for _ in patch)
+        params: List[Any] = []
+        for name, value in patch.items():
+            params += ['$."' + name.replace('"', '\\"') + '"', json.dumps(value, ensure_ascii=False)]
+        cursor = self.conn.cursor()
+        cursor.execute(
+            self._FSM_UPSERT.format(columns=f"""
+                state = CASE WHEN updated_at >= ? THEN state END,
+                data = json_set(CASE WHEN updated_at >= ? THEN COALESCE(data, '{{}}') ELSE '{{}}' END{", " + paths if paths else ""})"""),
+            (key, None, json.dumps(patch, ensure_ascii=False), updated_at, expired_before, expired_before, *params)
+        )
+        row = cursor.fetchone()
+        self._commit()
+        return row
+    
+    def delete_expired_fsm(self, before: float) -> int:
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM fsm_storage WHERE updated_at < ?", (before,))
+        self._commit()
+        return cursor.rowcount
+    
     def close(self):
-        self.conn.close()
\ No newline at end of file
+        self.conn.close()
+
+
+class QueryCounter:
+    """Считает SQL-запросы приложения (без служебных BEGIN/SAVEPOINT/COMMIT).
+
+    Запросы считаются в месте вызова execute, а не через trace: trace
+    вызывается еще и на каждую программу триггера (даже с ложным WHEN).
+    Используется через AsyncDatabase.count_queries() для проверок вида
+    `assert counter.count <= 3` вокруг переходов заказа.
+    """
+    _SERVICE_PREFIXES = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA")
+
+    def __init__(self):
+        self.count = 0
+        self.statements: List[str] = []
+
+    def __call__(self, sql: str) -> None:
+        if sql.lstrip().upper().startswith(self._SERVICE_PREFIXES):
+            return
+        self.count += 1
+        self.statements.append(sql)
+
+
+def _add_and_get_user(db: Database, user: User) -> Optional[User]:
+    db.add_user(user)
+    return db.get_user(user.user_id)
+
+
+def _resolve(future: asyncio.Future, result: Any, error: Optional[BaseException]) -> None:
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class AsyncDatabase:
+    """Асинхронный фасад над Database.
+
+    Соединение принадлежит отдельному потоку, который разбирает очередь
+    запросов, поэтому sqlite3 и commit() никогда не блокируют event loop.
+    При group_commit поток ничего не ждет: запись, взятая из очереди,
+    выполняется сразу вместе со всеми записями, уже ждущими в очереди (не
+    более max_batch), одной транзакцией. Пока идет фиксация, следующие
+    записи копятся и образуют новую пачку. Каждый вызывающий получает
+    результат только после фиксации своей пачки. Чтения (_read) в пачки не
+    попадают и выполняются сразу после текущей.
+    Пользователи кэшируются в self.users: add_user не пишет в базу, если
+    профиль не изменился, а get_user обслуживается из кэша.
+    """
+
+    def __init__(
+        self,
+        db_name: Path = DB_NAME,
+        group_commit: bool = DB_GROUP_COMMIT,
+        max_batch: int = DB_COMMIT_MAX_BATCH
+    ):
+        self._db_name = db_name
+        self._group_commit = group_commit
+        self._max_batch = max_batch
+        self.users = UserCache()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._ready = threading.Event()
+        self._init_error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._worker, name="db-worker", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._init_error is not None:
+            raise self._init_error
+
+    def _worker(self):
+        try:
+            db = Database(self._db_name, group_commit=self._group_commit)
+        except BaseException as e:
+            self._init_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            if not self._group_commit or not item[-1]:
+                self._execute_one(db, item)
+                continue
+
+            writes, reads = [item], []
+            stopping = self._collect_pending(writes, reads)
+            self._execute_batch(db, writes)
+            for read in reads:
+                self._execute_one(db, read)
+
+        db.close()
+
+    def _collect_pending(self, writes: list, reads: list) -> bool:
+        """Забирает из очереди то, что в ней уже лежит, не дожидаясь новых
+        запросов: записи — в пачку (до max_batch), чтения — отдельно.
+        True — пора остановиться"""
+        while len(writes) < self._max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return True
+            (writes if item[-1] else reads).append(item)
+        return False
+
+    def _execute_one(self, db: Database, item: tuple):
+        func, args, future, loop, _ = item
+        try:
+            result, error = func(db, *args), None
+        except Exception as e:
+            result, error = None, e
+        loop.call_soon_threadsafe(_resolve, future, result, error)
+
+    def _execute_batch(self, db: Database, batch: list):
+        results = db.run_batch([(func, args) for func, args, _, _, _ in batch])
+        for (_, _, future, loop, _), (result, error) in zip(batch, results):
+            loop.call_soon_threadsafe(_resolve, future, result, error)
+
+    async def _call(self, func: Callable, *args) -> Any:
+        """Запрос, который пишет в базу; при group_commit попадает в пачку"""
+        return await self._submit(func, args, True)
+
+    async def _read(self, func: Callable, *args) -> Any:
+        """Запрос только на чтение: в пачку записей не попадает и фиксации не ждет"""
+        return await self._submit(func, args, False)
+
+    async def _submit(self, func: Callable, args: tuple, write: bool) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((func, args, future, loop, write))
+        method = func.__name__
+        start = time.perf_counter()
+        try:
+            return await future
+        except Exception as e:
+            DB_ERRORS.labels(method, type(e).__name__).inc()
+            raise
+        finally:
+            DB_SECONDS.labels(method).observe(time.perf_counter() - start)
+
+    async def add_user(self, user: User) -> None:
+        cached = self.users.get(user.user_id)
+        if cached and cached.same_profile(user):
+            return
+        stored = await self._call(_add_and_get_user, user)
+        if stored:
+            self.users.put(stored)
+
+    async def get_user(self, user_id: int) -> Optional[User]:
+        user = self.users.get(user_id)
+        if user is None:
+            user = await self._read(Database.get_user, user_id)
+            if user:
+                self.users.put(user)
+        return user
+
+    async def set_user_role(self, user_id: int, role: UserRole) -> bool:
+        updated = await self._call(Database.set_user_role, user_id, role)
+        self.users.invalidate(user_id)
+        return updated
+
+    async def add_order(self, order: Order, max_active: Optional[int] = None) -> Optional[str]:
+        return await self._call(Database.add_order, order, max_active)
+
+    async def get_active_order_count(self, user_id: int) -> int:
+        return await self._read(Database.get_active_order_count, user_id)
+
+    async def reconcile_active_orders(self) -> int:
+        return await self._call(Database.reconcile_active_orders)
+
+    async def get_order(self, order_id: str) -> Optional[Order]:
+        return await self._read(Database.get_order, order_id)
+
+    async def get_order_details(self, order_id: str, canceller_id: Optional[int] = None) -> Optional[OrderDetails]:
+        details = await self._read(Database.get_order_details, order_id, canceller_id)
+        if details:
+            for user in (details.client, details.executor, details.canceller):
+                if user:
+                    self.users.put(user)
+        return details
+
+    async def update_order(self, order_id: str, updates: dict) -> bool:
+        return await self._call(Database.update_order, order_id, updates)
+
+    async def transition_order(self, order_id: str, status: OrderStatus, updates: Optional[dict] = None) -> Optional[Order]:
+        order = await self._call(Database.transition_order, order_id, status, updates)
+        if order and status == OrderStatus.COMPLETED and order.executor_id:
+            # Триггер увеличил completed_orders исполнителя
+            self.users.invalidate(order.executor_id)
+        return order
+
+    async def get_user_orders(self, user_id: int, status: Optional[str] = None) -> List[Order]:
+        return await self._read(Database.get_user_orders, user_id, status)
+
+    async def get_active_orders(self) -> List[Order]:
+        return await self._read(Database.get_active_orders)
+
+    async def get_order_changes_seq(self) -> int:
+        return await self._read(Database.get_order_changes_seq)
+
+    async def get_order_changes(self, after: int) -> Optional[Tuple[int, List[Tuple[str, Optional[Order]]]]]:
+        return await self._read(Database.get_order_changes, after)
+
+    async def prune_order_changes(self, older_than: float) -> int:
+        return await self._call(Database.prune_order_changes, older_than)
+
+    async def get_orders_page(
+        self,
+        filters: Dict[str, Any],
+        after: Optional[str] = None,
+        limit: int = ORDERS_PAGE_SIZE
+    ) -> OrderPage:
+        return await self._read(Database.get_orders_page, filters, after, limit)
+
+    async def iter_orders(self, filters: Dict[str, Any], batch_size: int = 500) -> AsyncIterator[Order]:
+        """Потоково отдает все заказы по фильтру пачками, не держа выборку целиком в памяти"""
+        after = None
+        while True:
+            page = await self.get_orders_page(filters, after, batch_size)
+            for order in page.orders:
+                yield order
+            if not page.next_after:
+                return
+            after = page.next_after
+
+    async def search_orders(self, text: str, status: Optional[str] = None, limit: int = 10) -> List[OrderSearchHit]:
+        return await self._read(Database.search_orders, text, status, limit)
+
+    async def add_rating(self, order_id: str, customer_id: int, rating: int) -> Optional[int]:
+        executor_id = await self._call(Database.add_rating, order_id, customer_id, rating)
+        if executor_id:
+            self.users.invalidate(executor_id)
+        return executor_id
+
+    async def recompute_ratings(self) -> int:
+        fixed = await self._call(Database.recompute_ratings)
+        if fixed:
+            self.users.clear()
+        return fixed
+
+    async def add_chat_messages(self, messages: List[ChatMessage]) -> int:
+        return await self._call(Database.add_chat_messages, messages)
+
+    async def get_chat_page(
+        self,
+        order_id: str,
+        before: Optional[int] = None,
+        limit: int = CHAT_HISTORY_PAGE_SIZE
+    ) -> ChatPage:
+        return await self._read(Database.get_chat_page, order_id, before, limit)
+
+    async def add_dispute(self, dispute: Dispute) -> Optional[Order]:
+        return await self._call(Database.add_dispute, dispute)
+
+    async def claim_dispute(self, admin_id: int, dispute_id: Optional[str] = None, order_id: Optional[str] = None) -> Optional[Dispute]:
+        return await self._call(Database.claim_dispute, admin_id, dispute_id, order_id)
+
+    async def resolve_dispute(
+        self,
+        dispute_id: str,
+        admin_id: int,
+        status: DisputeStatus,
+        resolution: str,
+        order_status: OrderStatus,
+        order_updates: Optional[dict] = None
+    ) -> Optional[Tuple[Dispute, Order]]:
+        result = await self._call(
+            Database.resolve_dispute, dispute_id, admin_id, status, resolution, order_status, order_updates
+        )
+        if result and result[1].executor_id and order_status == OrderStatus.COMPLETED:
+            self.users.invalidate(result[1].executor_id)
+        return result
+
+    async def get_pending_disputes(self) -> List[Tuple[Dispute, int]]:
+        return await self._read(Database.get_pending_disputes)
+
+    async def get_dispute(self, dispute_id: str) -> Optional[Dispute]:
+        return await self._read(Database.get_dispute, dispute_id)
+
+    async def update_dispute(self, dispute_id: str, updates: dict) -> bool:
+        return await self._call(Database.update_dispute, dispute_id, updates)
+
+    async def get_fsm_record(self, key: str) -> Optional[tuple]:
+        return await self._read(Database.get_fsm_record, key)
+
+    async def get_fsm_version(self, key: str) -> Optional[int]:
+        return await self._read(Database.get_fsm_version, key)
+
+    async def set_fsm_state(self, key: str, state: Optional[str], updated_at: float, expired_before: float) -> tuple:
+        return await self._call(Database.set_fsm_state, key, state, updated_at, expired_before)
+
+    async def set_fsm_data(self, key: str, data: str, updated_at: float, expired_before: float) -> tuple:
+        return await self._call(Database.set_fsm_data, key, data, updated_at, expired_before)
+
+    async def update_fsm_data(self, key: str, patch: Dict[str, Any], updated_at: float, expired_before: float) -> tuple:
+        return await self._call(Database.update_fsm_data, key, patch, updated_at, expired_before)
+
+    async def delete_expired_fsm(self, before: float) -> int:
+        return await self._call(Database.delete_expired_fsm, before)
+
+    @asynccontextmanager
+    async def count_queries(self):
+        counter = QueryCounter()
+        await self._call(Database.set_statement_hook, counter)
+        try:
+            yield counter
+        finally:
+            await self._call(Database.set_statement_hook, None)
+
+    async def close(self):
+        self._queue.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
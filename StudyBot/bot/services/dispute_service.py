@@ -0,0 +1,159 @@
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from models.dispute import Dispute
+from services.database import AsyncDatabase
+from services.notifications import NotificationDispatcher
+from services.order_service import OrderService
+from services.order_ids import new_dispute_id, timestamp_ms
+from config.constants import OrderStatus, DisputeStatus
+from config.settings import ADMIN_CHAT_ID, DISPUTE_BUDGET_WEIGHT
+
+# Исход спора -> (статус спора, новый статус заказа, формулировка)
+DISPUTE_OUTCOMES = {
+    "executor": (DisputeStatus.RESOLVED, OrderStatus.COMPLETED, "Решено в пользу исполнителя"),
+    "client": (DisputeStatus.RESOLVED, OrderStatus.CANCELED, "Решено в пользу клиента"),
+    "reject": (DisputeStatus.REJECTED, OrderStatus.IN_PROGRESS, "Спор отклонен, работа продолжается")
+}
+
+
+class DisputeQueue:
+    """Открытые споры в куче: добавление и выборка за O(log n).
+
+    Приоритет — время открытия минус бюджет заказа, умноженный на
+    budget_weight (секунд за рубль): раньше берутся давние и дорогие споры.
+    Удаление ленивое — запись помечается и пропускается при выборке.
+    """
+
+    def __init__(self, budget_weight: float = DISPUTE_BUDGET_WEIGHT):
+        self.budget_weight = budget_weight
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def push(self, dispute_id: str, opened_at: float, budget: int):
+        self.remove(dispute_id)
+        entry = [opened_at - budget * self.budget_weight, next(self._counter), dispute_id, True]
+        self._entries[dispute_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, dispute_id: str):
+        entry = self._entries.pop(dispute_id, None)
+        if entry:
+            entry[-1] = False
+
+    def pop(self) -> Optional[str]:
+        while self._heap:
+            *_, dispute_id, alive = heapq.heappop(self._heap)
+            if alive:
+                del self._entries[dispute_id]
+                return dispute_id
+        return None
+
+    def clear(self):
+        self._heap.clear()
+        self._entries.clear()
+
+
+class DisputeService:
+    def __init__(
+        self,
+        db: AsyncDatabase,
+        notifier: NotificationDispatcher,
+        orders: OrderService,
+        queue: Optional[DisputeQueue] = None
+    ):
+        self.db = db
+        self.notifier = notifier
+        self.orders = orders
+        self.queue = queue or DisputeQueue()
+
+    async def rebuild(self) -> int:
+        """Заполняет очередь открытыми спорами из базы; взятые в работу остаются за своими администраторами"""
+        self.queue.clear()
+        for dispute, budget in await self.db.get_pending_disputes():
+            if dispute.status == DisputeStatus.OPENED.value:
+                self.queue.push(dispute.dispute_id, timestamp_ms(dispute.created_at) / 1000, budget)
+        return len(self.queue)
+
+    async def open_dispute(self, order_id: str, opened_by: int, reason: Optional[str] = None) -> Optional[Dispute]:
+        dispute = Dispute(dispute_id=new_dispute_id(), order_id=order_id, opened_by=opened_by, reason=reason)
+        order = await self.db.add_dispute(dispute)
+        if not order:
+            return None
+        self.queue.push(dispute.dispute_id, time.time(), order.budget)
+
+        from keyboards.admin_kb import get_dispute_queue_kb
+        self.notifier.send(
+            ADMIN_CHAT_ID,
+            f"⚖️ *Открыт спор по заказу* `{order_id}`\n\n"
+            f"💰 *Бюджет:* {order.budget} руб\n"
+            f"📝 *Причина:* {reason or '—'}\n\n"
+            f"Споров в очереди: {len(self.queue)}",
+            reply_markup=get_dispute_queue_kb(),
+            parse_mode="Markdown"
+        )
+        for user_id in (order.client_id, order.executor_id):
+            if user_id and user_id != opened_by:
+                self.notifier.send(
+                    user_id,
+                    f"⚖️ По заказу *{order_id}* открыт спор. Администратор свяжется с вами.",
+                    parse_mode="Markdown"
+                )
+
+        await self.orders.refresh_order_message(order)
+        return dispute
+
+    async def claim_next(self, admin_id: int) -> Optional[Dispute]:
+        """Берет самый приоритетный открытый спор. Захват — условный UPDATE,
+        так что спор, уже взятый другим администратором, просто пропускается"""
+        rebuilt = False
+        while True:
+            dispute_id = self.queue.pop()
+            if dispute_id is None:
+                # Споры могли открыть в другом процессе — один раз сверяемся с базой
+                if rebuilt or not await self.rebuild():
+                    return None
+                rebuilt = True
+                continue
+            dispute = await self.db.claim_dispute(admin_id, dispute_id=dispute_id)
+            if dispute:
+                return dispute
+
+    async def claim_for_order(self, admin_id: int, order_id: str) -> Optional[Dispute]:
+        dispute = await self.db.claim_dispute(admin_id, order_id=order_id)
+        if dispute:
+            self.queue.remove(dispute.dispute_id)
+        return dispute
+
+    async def resolve(self, dispute_id: str, admin_id: int, outcome: str) -> bool:
+        if outcome not in DISPUTE_OUTCOMES:
+            return False
+        status, order_status, resolution = DISPUTE_OUTCOMES[outcome]
+        updates = {"completed_at": datetime.now().isoformat()} if order_status == OrderStatus.COMPLETED else None
+
+        result = await self.db.resolve_dispute(dispute_id, admin_id, status, resolution, order_status, updates)
+        if not result:
+            return False
+        _, order = result
+
+        from keyboards.order_kb import get_rating_kb
+        text = f"⚖️ Спор по заказу *{order.order_id}* закрыт: {resolution.lower()}."
+        if order.client_id:
+            self.notifier.send(
+                order.client_id,
+                text,
+                reply_markup=get_rating_kb(order.order_id) if order_status == OrderStatus.COMPLETED else None,
+                parse_mode="Markdown"
+            )
+        if order.executor_id:
+            self.notifier.send(order.executor_id, text, parse_mode="Markdown")
+
+        await self.orders.refresh_order_message(order)
+        return True
\ No newline at end of file
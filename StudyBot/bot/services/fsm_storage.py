@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from services.database import AsyncDatabase
+from config.settings import FSM_TTL, FSM_CACHE_SIZE, FSM_PURGE_INTERVAL
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM-хранилище в общей базе SQLite.
+
+    Записи идут через AsyncDatabase, поэтому попадают в групповые коммиты.
+    Перед базой стоит LRU-кэш. Каждая запись увеличивает version строки;
+    при shared (несколько воркеров на одну базу) кэш перед использованием
+    сверяется с version в базе — это чтение одного числа по ключу вместо
+    строки с разбором JSON. update_data дописывает ключи одним UPSERT, так
+    что изменения из разных процессов не теряются. Брошенные анкеты старше
+    FSM_TTL удаляются.
+    """
+
+    def __init__(
+        self,
+        db: AsyncDatabase,
+        key_builder: Optional[KeyBuilder] = None,
+        shared: bool = False,
+        ttl: float = FSM_TTL,
+        cache_size: int = FSM_CACHE_SIZE,
+        purge_interval: float = FSM_PURGE_INTERVAL
+    ):
+        self.db = db
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self.shared = shared
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.purge_interval = purge_interval
+        
+        # key -> (state, data, updated_at, version)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._purge_task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        self._purge_task = asyncio.create_task(self._purge_loop())
+    
+    async def close(self) -> None:
+        if self._purge_task:
+            self._purge_task.cancel()
+            self._purge_task = None
+    
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self.key_builder.build(key)
+        state_value = state.state if isinstance(state, State) else state
+        now = time.time()
+        record = await self.db.set_fsm_state(storage_key, state_value, now, now - self.ttl)
+        self._remember(storage_key, record)
+    
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._load(self.key_builder.build(key))
+        return state
+    
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        storage_key = self.key_builder.build(key)
+        now = time.time()
+        record = await self.db.set_fsm_data(
+            storage_key, json.dumps(dict(data), ensure_ascii=False), now, now - self.ttl
+        )
+        self._remember(storage_key, record)
+    
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._load(self.key_builder.build(key))
+        return data.copy()
+    
+    async def update_data(self, key: StorageKey, data: Mapping[str, Any]) -> Dict[str, Any]:
+        storage_key = self.key_builder.build(key)
+        now = time.time()
+        record = await self.db.update_fsm_data(storage_key, dict(data), now, now - self.ttl)
+        self._remember(storage_key, record)
+        return json.loads(record[1])
+    
+    async def _load(self, storage_key: str) -> tuple:
+        cached = self._cache.get(storage_key)
+        if cached and (not self.shared or await self.db.get_fsm_version(storage_key) == cached[3]):
+            self._cache.move_to_end(storage_key)
+            return self._unpack(cached)
+        
+        record = await self.db.get_fsm_record(storage_key)
+        self._remember(storage_key, record)
+        return self._unpack(self._cache[storage_key])
+    
+    def _unpack(self, entry: tuple) -> tuple:
+        state, data, updated_at, _ = entry
+        if updated_at is None or updated_at < time.time() - self.ttl:
+            return None, {}
+        return state, data
+    
+    def _remember(self, storage_key: str, record: Optional[tuple]):
+        """Кладет в кэш строку из базы; отсутствие строки тоже кэшируется (version None)"""
+        if record:
+            state, data, updated_at, version = record
+            entry = (state, json.loads(data) if data else {}, updated_at, version)
+        else:
+            entry = (None, {}, None, None)
+        self._cache[storage_key] = entry
+        self._cache.move_to_end(storage_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    async def _purge_loop(self):
+        while True:
+            await self.db.delete_expired_fsm(time.time() - self.ttl)
+            await asyncio.sleep(self.purge_interval)
\ No newline at end of file
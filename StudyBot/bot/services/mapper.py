@@ -0,0 +1,60 @@
+from itertools import starmap
+from typing import Generic, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from models.user import User
+from models.order import Order
+from models.dispute import Dispute
+from models.chat import ChatMessage
+
+T = TypeVar("T")
+
+
+class RowMapper(Generic[T]):
+    """Превращает строки sqlite3 в модели по явному списку колонок.
+
+    Порядок колонок совпадает с порядком полей модели, поэтому объект
+    строится позиционно, без разбора строки по индексам.
+    """
+
+    def __init__(self, model: Type[T], table: str, columns: Sequence[str]):
+        self.model = model
+        self.table = table
+        self.columns: Tuple[str, ...] = tuple(columns)
+        self.width = len(self.columns)
+        self.select = self.columns_sql()
+    
+    def columns_sql(self, alias: Optional[str] = None) -> str:
+        prefix = f"{alias}." if alias else ""
+        return ", ".join(f"{prefix}{column}" for column in self.columns)
+    
+    def one(self, row: Optional[tuple], offset: int = 0) -> Optional[T]:
+        """Модель из строки (или ее среза с offset); None, если строки нет или срез из LEFT JOIN пуст"""
+        if row is None or row[offset] is None:
+            return None
+        if offset == 0 and len(row) == self.width:
+            return self.model(*row)
+        return self.model(*row[offset:offset + self.width])
+    
+    def many(self, rows: Iterable[tuple]) -> List[T]:
+        return list(starmap(self.model, rows))
+
+
+USERS = RowMapper(User, "users", (
+    "user_id", "username", "first_name", "last_name",
+    "role", "rating", "completed_orders", "created_at"
+))
+
+ORDERS = RowMapper(Order, "orders", (
+    "order_id", "type", "subject", "description", "deadline", "budget",
+    "client_id", "executor_id", "status", "created_at", "completed_at",
+    "file_path", "message_id"
+))
+
+DISPUTES = RowMapper(Dispute, "disputes", (
+    "dispute_id", "order_id", "opened_by", "admin_id", "reason",
+    "status", "resolution", "created_at", "resolved_at"
+))
+
+CHAT_MESSAGES = RowMapper(ChatMessage, "chat_messages", (
+    "order_id", "user_id", "message", "is_file", "file_path", "created_at", "message_id"
+))
\ No newline at end of file
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from config.settings import EDIT_DEBOUNCE, EDIT_HISTORY_SIZE
+
+logger = logging.getLogger(__name__)
+
+MessageKey = Tuple[int, int]
+
+
+def _render_signature(text: str, kwargs: Dict[str, Any]) -> str:
+    markup = kwargs.get("reply_markup")
+    markup_json = markup.model_dump_json(exclude_none=True) if markup is not None else ""
+    return f"{text}\x00{markup_json}\x00{kwargs.get('parse_mode')}"
+
+
+class MessageEditor:
+    """Схлопывает частые правки одного сообщения.
+
+    Правки по ключу (chat_id, message_id) копятся в течение окна debounce,
+    отправляется только последняя. Если текст и клавиатура совпадают с уже
+    отправленными, запрос к API не делается.
+    """
+
+    def __init__(self, bot: Bot, debounce: float = EDIT_DEBOUNCE, history_size: int = EDIT_HISTORY_SIZE):
+        self.bot = bot
+        self.debounce = debounce
+        self.history_size = history_size
+        
+        self._pending: Dict[MessageKey, Tuple[str, Dict[str, Any]]] = {}
+        self._timers: Dict[MessageKey, asyncio.Task] = {}
+        # Таймеры, которые уже отправляют правку: их не отменяют, а дожидаются
+        self._in_flight: Set[asyncio.Task] = set()
+        self._last_sent: "OrderedDict[MessageKey, str]" = OrderedDict()
+        
+        self.sent = 0
+        self.coalesced = 0
+        self.skipped = 0
+    
+    def edit(self, chat_id: int, message_id: int, text: str, **kwargs) -> None:
+        key = (chat_id, message_id)
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = (text, kwargs)
+        
+        if key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._flush_later(key, self.debounce))
+    
+    async def flush(self):
+        """Немедленно отправляет все отложенные правки и дожидается уже начатых"""
+        # Ждущие таймеры отменяются, а начатые отправки — нет: иначе последняя правка потеряется.
+        # Начатая отправка может поставить новый таймер (RetryAfter), поэтому до полной тишины
+        while self._timers or self._in_flight:
+            for task in self._timers.values():
+                task.cancel()
+            self._timers.clear()
+            if self._in_flight:
+                await asyncio.gather(*self._in_flight, return_exceptions=True)
+        for key in list(self._pending):
+            await self._flush(key)
+    
+    async def _flush_later(self, key: MessageKey, delay: float):
+        await asyncio.sleep(delay)
+        self._timers.pop(key, None)
+        task = asyncio.current_task()
+        self._in_flight.add(task)
+        try:
+            await self._flush(key)
+        finally:
+            self._in_flight.discard(task)
+    
+    async def _flush(self, key: MessageKey):
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        text, kwargs = pending
+        
+        signature = _render_signature(text, kwargs)
+        if self._last_sent.get(key) == signature:
+            self.skipped += 1
+            return
+        
+        chat_id, message_id = key
+        try:
+            await self.bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text, **kwargs)
+        except TelegramRetryAfter as e:
+            # Вернем правку в очередь, если ее не перекрыла более свежая
+            self._pending.setdefault(key, pending)
+            if key not in self._timers:
+                self._timers[key] = asyncio.create_task(self._flush_later(key, e.retry_after))
+            return
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                logger.warning("Ошибка обновления сообщения %s: %s", key, e)
+                return
+        except Exception as e:
+            logger.warning("Ошибка обновления сообщения %s: %s", key, e)
+            return
+        
+        self.sent += 1
+        self._remember(key, signature)
+    
+    def _remember(self, key: MessageKey, signature: str):
+        self._last_sent[key] = signature
+        self._last_sent.move_to_end(key)
+        while len(self._last_sent) > self.history_size:
+            self._last_sent.popitem(last=False)
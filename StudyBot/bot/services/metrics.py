@@ -0,0 +1,214 @@
+"""Метрики процесса в текстовом формате Prometheus.
+
+Счетчики обновляются только из event loop, поэтому обходятся без блокировок;
+observe() — это bisect по границам корзин и два сложения. Накопительные
+суммы по корзинам считаются лишь при отдаче /metrics. У каждого воркера
+webhook свой реестр и свой порт.
+"""
+import logging
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Дочерняя серия для набора меток; кэшируется, повторный вызов — поиск в словаре"""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """Новая серия для набора меток"""
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Строки серий в текстовом формате"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._children.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # Последний элемент — корзина +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in self._children.items():
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                total += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {total}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+UPDATES_IN_FLIGHT = REGISTRY.register(Gauge(
+    "bot_updates_in_flight", "Апдейты в обработке", ("type",)
+))
+UPDATE_SECONDS = REGISTRY.register(Histogram(
+    "bot_update_seconds", "Полное время обработки апдейта, включая middleware", ("type",)
+))
+HANDLER_IN_FLIGHT = REGISTRY.register(Gauge(
+    "bot_handler_in_flight", "Выполняющиеся вызовы хендлера", ("handler",)
+))
+HANDLER_SECONDS = REGISTRY.register(Histogram(
+    "bot_handler_seconds", "Время выполнения хендлера", ("handler",)
+))
+HANDLER_ERRORS = REGISTRY.register(Counter(
+    "bot_handler_errors_total", "Исключения, вылетевшие из хендлера", ("handler", "error")
+))
+DB_SECONDS = REGISTRY.register(Histogram(
+    "bot_db_call_seconds", "Вызов Database из event loop: ожидание очереди, запрос и фиксация", ("method",)
+))
+DB_ERRORS = REGISTRY.register(Counter(
+    "bot_db_errors_total", "Ошибки вызовов Database", ("method", "error")
+))
+API_SECONDS = REGISTRY.register(Histogram(
+    "bot_api_request_seconds", "Запросы к Telegram Bot API", ("method",)
+))
+API_ERRORS = REGISTRY.register(Counter(
+    "bot_api_errors_total", "Ошибки запросов к Telegram Bot API", ("method", "error")
+))
+NOTIFY_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "bot_notify_queue_depth", "Уведомления, ждущие отправки"
+))
+NOTIFY_SECONDS = REGISTRY.register(Histogram(
+    "bot_notify_delivery_seconds", "От постановки уведомления в очередь до доставки, включая повторы"
+))
+NOTIFY_RESULTS = REGISTRY.register(Counter(
+    "bot_notify_total", "Исходы попыток отправки уведомлений", ("result",)
+))
+
+
+class MetricsServer:
+    """Локальный HTTP-сервер с единственным путем /metrics; port=0 — выключен"""
+
+    def __init__(self, host: str, port: int, registry: Registry = REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self):
+        if not self.port:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info("Метрики доступны на http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
\ No newline at end of file
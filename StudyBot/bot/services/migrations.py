@@ -0,0 +1,227 @@
+import sqlite3
+from typing import Callable, List, Tuple, Union
+
+from services.order_ids import decode_order_id, encode_order_id, pack_order_id, timestamp_ms
+
+# Каждая миграция: (версия, описание, шаги). Шаг — SQL-строка или функция(conn).
+# Версии применяются строго по возрастанию, уже примененные пропускаются.
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+def _shorten_order_ids(conn: sqlite3.Connection) -> None:
+    """Переводит заказы с UUID на короткие идентификаторы по времени создания
+    (узел 0) и переписывает ссылки на них в спорах, оценках и переписке"""
+    conn.execute("CREATE TEMP TABLE order_id_map (old_id TEXT PRIMARY KEY, new_id TEXT)")
+    mapping = []
+    last_ms, sequence = None, 0
+    for order_id, created_at in conn.execute("SELECT order_id, created_at FROM orders ORDER BY created_at, rowid"):
+        if decode_order_id(order_id) is not None:
+            continue
+        created_ms = timestamp_ms(created_at)
+        sequence = sequence + 1 if created_ms == last_ms else 0
+        last_ms = created_ms
+        mapping.append((order_id, encode_order_id(pack_order_id(created_ms, 0, sequence))))
+    conn.executemany("INSERT INTO order_id_map (old_id, new_id) VALUES (?, ?)", mapping)
+    
+    for table in ("orders", "disputes", "ratings", "chat_messages"):
+        conn.execute(
+            f"""UPDATE {table} SET order_id = order_id_map.new_id
+            FROM order_id_map WHERE {table}.order_id = order_id_map.old_id"""
+        )
+    conn.execute("DROP TABLE order_id_map")
+
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "Индексы заказов по клиенту/статусу и споров/оценок по заказу", [
+        "CREATE INDEX IF NOT EXISTS idx_orders_client_status ON orders (client_id, status)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_disputes_order ON disputes (order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_ratings_order ON ratings (order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_chat_messages_order ON chat_messages (order_id, message_id)",
+    ]),
+    (2, "Таблица состояний FSM", [
+        """CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT,
+            updated_at REAL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated ON fsm_storage (updated_at)",
+    ]),
+    (3, "Индексы для постраничной выборки заказов по (created_at, order_id)", [
+        "DROP INDEX IF EXISTS idx_orders_client_status",
+        "DROP INDEX IF EXISTS idx_orders_status_created",
+        "CREATE INDEX IF NOT EXISTS idx_orders_client_status_created ON orders (client_id, status, created_at, order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_client_created ON orders (client_id, created_at, order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_executor_created ON orders (executor_id, created_at, order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders (status, created_at, order_id)",
+    ]),
+    (4, "Полнотекстовый поиск по предмету и описанию заказов", [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS orders_fts USING fts5(
+            subject,
+            description,
+            content = 'orders',
+            content_rowid = 'rowid',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS orders_fts_insert AFTER INSERT ON orders BEGIN
+            INSERT INTO orders_fts (rowid, subject, description)
+            VALUES (new.rowid, new.subject, new.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS orders_fts_delete AFTER DELETE ON orders BEGIN
+            INSERT INTO orders_fts (orders_fts, rowid, subject, description)
+            VALUES ('delete', old.rowid, old.subject, old.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS orders_fts_update AFTER UPDATE OF subject, description ON orders BEGIN
+            INSERT INTO orders_fts (orders_fts, rowid, subject, description)
+            VALUES ('delete', old.rowid, old.subject, old.description);
+            INSERT INTO orders_fts (rowid, subject, description)
+            VALUES (new.rowid, new.subject, new.description);
+        END""",
+        "INSERT INTO orders_fts (orders_fts) VALUES ('rebuild')",
+    ]),
+    (5, "Счетчик активных заказов пользователя, поддерживаемый триггерами", [
+        "ALTER TABLE users ADD COLUMN active_orders INTEGER NOT NULL DEFAULT 0",
+        """CREATE TRIGGER IF NOT EXISTS orders_active_insert AFTER INSERT ON orders
+        WHEN new.status = 'active' BEGIN
+            UPDATE users SET active_orders = active_orders + 1 WHERE user_id = new.client_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS orders_active_delete AFTER DELETE ON orders
+        WHEN old.status = 'active' BEGIN
+            UPDATE users SET active_orders = active_orders - 1 WHERE user_id = old.client_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS orders_active_update AFTER UPDATE OF status ON orders
+        WHEN (old.status = 'active') != (new.status = 'active') BEGIN
+            UPDATE users
+            SET active_orders = active_orders + CASE WHEN new.status = 'active' THEN 1 ELSE -1 END
+            WHERE user_id = new.client_id;
+        END""",
+        """UPDATE users SET active_orders = (
+            SELECT COUNT(*) FROM orders WHERE client_id = users.user_id AND status = 'active'
+        )""",
+    ]),
+    (6, "Короткие упорядоченные по времени идентификаторы заказов вместо UUID", [
+        _shorten_order_ids,
+    ]),
+    (7, "Накопительный рейтинг исполнителей и счетчик завершенных заказов", [
+        "ALTER TABLE users ADD COLUMN rating_sum INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE users ADD COLUMN rating_count INTEGER NOT NULL DEFAULT 0",
+        "DELETE FROM ratings WHERE rating_id NOT IN (SELECT MIN(rating_id) FROM ratings GROUP BY order_id)",
+        "DROP INDEX IF EXISTS idx_ratings_order",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_ratings_order ON ratings (order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_ratings_executor ON ratings (executor_id)",
+        """CREATE TRIGGER IF NOT EXISTS ratings_aggregate_insert AFTER INSERT ON ratings BEGIN
+            UPDATE users SET
+                rating_sum = rating_sum + new.rating,
+                rating_count = rating_count + 1,
+                rating = (rating_sum + new.rating) * 1.0 / (rating_count + 1)
+            WHERE user_id = new.executor_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS orders_completed_update AFTER UPDATE OF status ON orders
+        WHEN new.status = 'completed' AND old.status != 'completed' BEGIN
+            UPDATE users SET completed_orders = completed_orders + 1 WHERE user_id = new.executor_id;
+        END""",
+        """UPDATE users SET
+            rating_sum = COALESCE((SELECT SUM(rating) FROM ratings WHERE executor_id = users.user_id), 0),
+            rating_count = (SELECT COUNT(*) FROM ratings WHERE executor_id = users.user_id),
+            rating = COALESCE((SELECT AVG(rating) FROM ratings WHERE executor_id = users.user_id), 0),
+            completed_orders = (
+                SELECT COUNT(*) FROM orders WHERE executor_id = users.user_id AND status = 'completed'
+            )""",
+    ]),
+    (8, "Версия записи FSM для проверки кэшей воркеров", [
+        "ALTER TABLE fsm_storage ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+    ]),
+    (9, "Журнал изменений заказов для синхронизации индексов воркеров", [
+        """CREATE TABLE IF NOT EXISTS order_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS orders_changes_insert AFTER INSERT ON orders BEGIN
+            INSERT INTO order_changes (order_id) VALUES (new.order_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS orders_changes_update AFTER UPDATE OF status, type, subject, budget ON orders BEGIN
+            INSERT INTO order_changes (order_id) VALUES (new.order_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS orders_changes_delete AFTER DELETE ON orders BEGIN
+            INSERT INTO order_changes (order_id) VALUES (old.order_id);
+        END""",
+    ]),
+    (10, "Постоянный целочисленный ключ заказа для полнотекстового индекса", [
+        # rowid таблицы с TEXT PRIMARY KEY может смениться при VACUUM, и тогда
+        # orders_fts указывал бы не на те заказы. order_key хранится в строке
+        "ALTER TABLE orders ADD COLUMN order_key INTEGER",
+        "UPDATE orders SET order_key = rowid",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_key ON orders (order_key)",
+        "DROP TRIGGER IF EXISTS orders_fts_insert",
+        "DROP TRIGGER IF EXISTS orders_fts_delete",
+        "DROP TRIGGER IF EXISTS orders_fts_update",
+        "DROP TABLE IF EXISTS orders_fts",
+        """CREATE VIRTUAL TABLE orders_fts USING fts5(
+            subject,
+            description,
+            content = 'orders',
+            content_rowid = 'order_key',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )""",
+        # add_order выдает ключ сам; вставкам без него ключ назначает триггер
+        """CREATE TRIGGER orders_fts_insert AFTER INSERT ON orders BEGIN
+            UPDATE orders SET order_key = (SELECT COALESCE(MAX(order_key), 0) + 1 FROM orders)
+            WHERE new.order_key IS NULL AND order_id = new.order_id;
+            INSERT INTO orders_fts (rowid, subject, description)
+            SELECT order_key, new.subject, new.description FROM orders WHERE order_id = new.order_id;
+        END""",
+        """CREATE TRIGGER orders_fts_delete AFTER DELETE ON orders BEGIN
+            INSERT INTO orders_fts (orders_fts, rowid, subject, description)
+            VALUES ('delete', old.order_key, old.subject, old.description);
+        END""",
+        """CREATE TRIGGER orders_fts_update AFTER UPDATE OF subject, description ON orders BEGIN
+            INSERT INTO orders_fts (orders_fts, rowid, subject, description)
+            VALUES ('delete', old.order_key, old.subject, old.description);
+            INSERT INTO orders_fts (rowid, subject, description)
+            VALUES (new.order_key, new.subject, new.description);
+        END""",
+        "INSERT INTO orders_fts (orders_fts) VALUES ('rebuild')",
+    ]),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Применяет недостающие миграции, каждую в своей транзакции. Возвращает итоговую версию"""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    
+    current = get_schema_version(conn)
+    for version, description, steps in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version <= current:
+            continue
+        
+        conn.execute("BEGIN")
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        current = version
+    
+    return current
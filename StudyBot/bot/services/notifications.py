@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramNetworkError, TelegramServerError
+from services.metrics import NOTIFY_QUEUE_DEPTH, NOTIFY_SECONDS, NOTIFY_RESULTS
+from config.settings import (
+    NOTIFY_WORKERS,
+    NOTIFY_GLOBAL_RATE,
+    NOTIFY_CHAT_INTERVAL,
+    NOTIFY_GROUP_INTERVAL,
+    NOTIFY_MAX_RETRIES,
+    NOTIFY_RETRY_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Notification:
+    chat_id: int
+    text: str
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+    # Время, с которого разрешено окном чата; 0 — окно еще не назначено
+    not_before: float = 0.0
+
+
+class NotificationDispatcher:
+    """Очередь исходящих сообщений с пулом воркеров.
+
+    Соблюдает лимиты Telegram: не более NOTIFY_GLOBAL_RATE сообщений в секунду
+    на бота и не чаще одного сообщения в NOTIFY_CHAT_INTERVAL (для групп —
+    NOTIFY_GROUP_INTERVAL) секунд в один чат. Окно чата назначается при
+    первом взятии сообщения из очереди; если оно еще не наступило, сообщение
+    откладывается и возвращается в очередь к своему времени, а воркер берет
+    следующее — медленный чат не задерживает остальные. При RetryAfter чат
+    ставится на паузу на указанное время, при сетевых ошибках и 5xx сообщение
+    повторяется после паузы retry_backoff * 2^(попытка - 1). Глубина очереди, время
+    доставки и исходы отправок экспортируются в /metrics.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        workers: int = NOTIFY_WORKERS,
+        global_rate: float = NOTIFY_GLOBAL_RATE,
+        chat_interval: float = NOTIFY_CHAT_INTERVAL,
+        group_interval: float = NOTIFY_GROUP_INTERVAL,
+        max_retries: int = NOTIFY_MAX_RETRIES,
+        retry_backoff: float = NOTIFY_RETRY_BACKOFF
+    ):
+        self.bot = bot
+        self.workers = workers
+        self.global_interval = 1 / global_rate
+        self.chat_interval = chat_interval
+        self.group_interval = group_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        
+        self._queue: "asyncio.Queue[Notification]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._deferred: Set[asyncio.Task] = set()
+        self._next_global = 0.0
+        self._next_chat: Dict[int, float] = {}
+        self._paused: Dict[int, float] = {}
+        
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+        self._depth = NOTIFY_QUEUE_DEPTH.labels()
+    
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+    
+    def start(self):
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"notifier-{i}"))
+    
+    async def stop(self, drain: bool = True):
+        if drain:
+            # Отложенные сообщения вернутся в очередь позже, ждем и их
+            await self._queue.join()
+            while self._deferred:
+                await asyncio.gather(*self._deferred)
+                await self._queue.join()
+        for task in (*self._tasks, *self._deferred):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._deferred, return_exceptions=True)
+        self._tasks.clear()
+        self._deferred.clear()
+    
+    def send(self, chat_id: int, text: str, **kwargs) -> None:
+        """Ставит сообщение в очередь и сразу возвращает управление"""
+        self._queue.put_nowait(Notification(chat_id, text, kwargs))
+        self._depth.set(self._queue.qsize())
+    
+    def _reserve_chat(self, chat_id: int) -> float:
+        """Назначает сообщению ближайшее свободное окно чата"""
+        now = time.monotonic()
+        interval = self.group_interval if chat_id < 0 else self.chat_interval
+        at = max(now, self._next_chat.get(chat_id, 0.0), self._paused.get(chat_id, 0.0))
+        self._next_chat[chat_id] = at + interval
+        
+        if len(self._next_chat) > 10000:
+            self._next_chat = {k: v for k, v in self._next_chat.items() if v > now}
+            self._paused = {k: v for k, v in self._paused.items() if v > now}
+        return at
+    
+    def _reserve_global(self) -> float:
+        """Резервирует общий слот бота и возвращает задержку до него.
+        Окна чатов на него не влияют: ждать приходится только 1 / global_rate"""
+        now = time.monotonic()
+        at = max(now, self._next_global)
+        self._next_global = at + self.global_interval
+        return at - now
+    
+    async def _worker(self):
+        while True:
+            notification = await self._queue.get()
+            self._depth.set(self._queue.qsize())
+            try:
+                await self._deliver(notification)
+            finally:
+                self._queue.task_done()
+    
+    async def _deliver(self, notification: Notification):
+        # Окно, назначенное до RetryAfter этого чата, уже недействительно
+        if notification.not_before < self._paused.get(notification.chat_id, 0.0):
+            notification.not_before = 0.0
+        if not notification.not_before:
+            notification.not_before = self._reserve_chat(notification.chat_id)
+        wait = notification.not_before - time.monotonic()
+        if wait > 0:
+            self._defer(notification, wait)
+            return
+        
+        delay = self._reserve_global()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        
+        notification.attempts += 1
+        try:
+            await self.bot.send_message(
+                chat_id=notification.chat_id,
+                text=notification.text,
+                **notification.kwargs
+            )
+        except TelegramRetryAfter as e:
+            self._retry(notification, e.retry_after)
+        except (TelegramNetworkError, TelegramServerError) as e:
+            self._retry(notification, self.retry_backoff * 2 ** (notification.attempts - 1), e)
+        except Exception as e:
+            self.failed += 1
+            NOTIFY_RESULTS.labels("failed").inc()
+            logger.warning("Не удалось доставить сообщение в чат %s: %s", notification.chat_id, e)
+        else:
+            self.delivered += 1
+            NOTIFY_RESULTS.labels("delivered").inc()
+            NOTIFY_SECONDS.labels().observe(time.monotonic() - notification.enqueued_at)
+    
+    def _retry(self, notification: Notification, delay: float, error: Optional[Exception] = None):
+        if notification.attempts > self.max_retries:
+            self.failed += 1
+            NOTIFY_RESULTS.labels("failed").inc()
+            logger.warning(
+                "Сообщение в чат %s отброшено после %s попыток: %s",
+                notification.chat_id, notification.attempts, error or "RetryAfter"
+            )
+            return
+        
+        self.retried += 1
+        NOTIFY_RESULTS.labels("retried").inc()
+        # Чат на паузе: и это, и уже назначенные ему сообщения получат окна после нее
+        resume_at = time.monotonic() + delay
+        self._paused[notification.chat_id] = max(self._paused.get(notification.chat_id, 0.0), resume_at)
+        notification.not_before = 0.0
+        self._queue.put_nowait(notification)
+        self._depth.set(self._queue.qsize())
+    
+    def _defer(self, notification: Notification, delay: float):
+        task = asyncio.create_task(self._requeue_later(notification, delay))
+        self._deferred.add(task)
+        task.add_done_callback(self._deferred.discard)
+    
+    async def _requeue_later(self, notification: Notification, delay: float):
+        await asyncio.sleep(delay)
+        self._queue.put_nowait(notification)
+        self._depth.set(self._queue.qsize())
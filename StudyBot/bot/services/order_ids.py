@@ -0,0 +1,106 @@
+"""Короткие, упорядоченные по времени идентификаторы заказов.
+
+Идентификатор — 64-битное число: 42 бита миллисекунд от ORDER_ID_EPOCH_MS,
+10 бит узла (номер процесса, создающего заказы: webhook-воркер i — узел
+i + 1, узел 0 занят миграцией старых UUID) и 12 бит счетчика внутри
+миллисекунды. В тексте это 13 символов Crockford base32
+фиксированной ширины, поэтому строковый порядок совпадает с порядком
+создания и новые ключи дописываются в правый край B-дерева.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+ORDER_ID_EPOCH_MS = 1704067200000  # 2024-01-01 00:00:00 UTC
+ORDER_ID_LENGTH = 13
+
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {char: value for value, char in enumerate(_ALPHABET)}
+_NODE_BITS = 10
+_SEQUENCE_BITS = 12
+_MAX_SEQUENCE = (1 << _SEQUENCE_BITS) - 1
+
+
+def pack_order_id(timestamp_ms: int, node: int, sequence: int) -> int:
+    return (
+        (timestamp_ms - ORDER_ID_EPOCH_MS) << (_NODE_BITS + _SEQUENCE_BITS)
+        | (node & ((1 << _NODE_BITS) - 1)) << _SEQUENCE_BITS
+        | sequence
+    )
+
+
+def encode_order_id(value: int) -> str:
+    chars = []
+    for _ in range(ORDER_ID_LENGTH):
+        value, digit = divmod(value, 32)
+        chars.append(_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def decode_order_id(text: str) -> Optional[int]:
+    """Число из текстового идентификатора; None, если строка не в этом формате"""
+    if len(text) != ORDER_ID_LENGTH:
+        return None
+    value = 0
+    for char in text:
+        digit = _DECODE.get(char)
+        if digit is None:
+            return None
+        value = value * 32 + digit
+    return value if value < 1 << 64 else None
+
+
+def timestamp_ms(value: Optional[str]) -> int:
+    """Миллисекунды UTC из TIMESTAMP SQLite (CURRENT_TIMESTAMP пишет UTC)"""
+    if not value:
+        return int(time.time() * 1000)
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+class OrderIdGenerator:
+    """Генератор идентификаторов процесса. Узел по умолчанию 1 (polling и
+    одиночный воркер); каждый webhook-воркер задает свой через set_node.
+    prefix отделяет пространства идентификаторов разных сущностей"""
+
+    def __init__(self, node: int = 1, prefix: str = ""):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._node = node
+        self._last_ms = 0
+        self._sequence = 0
+
+    def set_node(self, node: int) -> None:
+        if not 0 < node < 1 << _NODE_BITS:
+            raise ValueError(f"Узел должен быть от 1 до {(1 << _NODE_BITS) - 1}, получено {node}")
+        with self._lock:
+            self._node = node
+            self._last_ms = self._sequence = 0
+
+    def __call__(self) -> str:
+        with self._lock:
+            now = max(int(time.time() * 1000), self._last_ms)
+            if now == self._last_ms:
+                self._sequence += 1
+                if self._sequence > _MAX_SEQUENCE:
+                    while now <= self._last_ms:
+                        now = int(time.time() * 1000)
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return self.prefix + encode_order_id(pack_order_id(now, self._node, self._sequence))
+
+
+new_order_id = OrderIdGenerator()
+# У споров свой счетчик и префикс: их идентификаторы не совпадают с заказами
+new_dispute_id = OrderIdGenerator(prefix="D")
+
+
+def set_node(node: int) -> None:
+    """Узел процесса для всех генераторов идентификаторов"""
+    for generator in (new_order_id, new_dispute_id):
+        generator.set_node(node)
\ No newline at end of file
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, Iterable, List, Optional
+
+from models.order import Order
+from services.database import AsyncDatabase
+from config.constants import OrderStatus, BUDGET_RANGES
+from config.settings import ORDER_INDEX_REFRESH_INTERVAL, ORDER_CHANGES_TTL
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_subject(subject: str) -> str:
+    return re.sub(r"\s+", " ", subject.lower().replace("ё", "е")).strip()
+
+
+def budget_range(budget: int) -> Optional[str]:
+    for key, (_, low, high) in BUDGET_RANGES.items():
+        if low <= budget and (high is None or budget <= high):
+            return key
+    return None
+
+
+class ActiveOrderIndex:
+    """Индекс активных заказов в памяти процесса.
+
+    Заказы разложены по типу, нормализованному предмету и диапазону бюджета.
+    Каждая корзина — dict в порядке добавления, так что выборка идет по самой
+    маленькой подходящей корзине и стоит O(результата), а не скан таблицы.
+    Поддерживается переходами OrderService и перестраивается из базы при старте.
+    Изменения других воркеров приходят через журнал order_changes, который
+    заполняют триггеры на orders: раз в refresh_interval индекс дочитывает
+    его с последней примененной записи, так что лента отстает от базы не
+    больше чем на этот интервал.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = ORDER_INDEX_REFRESH_INTERVAL,
+        changes_ttl: float = ORDER_CHANGES_TTL
+    ):
+        self.refresh_interval = refresh_interval
+        self.changes_ttl = changes_ttl
+        self._orders: Dict[str, Order] = {}
+        self._by_type: Dict[str, Dict[str, Order]] = {}
+        self._by_subject: Dict[str, Dict[str, Order]] = {}
+        self._by_budget: Dict[str, Dict[str, Order]] = {}
+        self._seq = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        return len(self._orders)
+    
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._orders
+    
+    def start(self, db: AsyncDatabase):
+        self._refresh_task = asyncio.create_task(self._refresh_loop(db))
+    
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+    
+    async def rebuild(self, db: AsyncDatabase):
+        # Журнал запоминается до выборки: изменения во время нее применит refresh
+        seq = await db.get_order_changes_seq()
+        self.clear()
+        # iter_orders отдает новые первыми, а корзины хранят порядок создания
+        orders = [order async for order in db.iter_orders({"status": OrderStatus.ACTIVE.value})]
+        for order in reversed(orders):
+            self.add(order)
+        self._seq = seq
+    
+    async def refresh(self, db: AsyncDatabase) -> int:
+        """Применяет изменения заказов из журнала, включая сделанные другими
+        воркерами. Возвращает число измененных заказов"""
+        result = await db.get_order_changes(self._seq)
+        if result is None:
+            logger.warning("Журнал изменений заказов вычищен дальше индекса, индекс перестраивается")
+            await self.rebuild(db)
+            return len(self)
+        
+        self._seq, changes = result
+        for order_id, order in changes:
+            if order is None or order.status != OrderStatus.ACTIVE.value:
+                self.remove(order_id)
+            else:
+                self.add(order)
+        return len(changes)
+    
+    def clear(self):
+        for index in (self._orders, self._by_type, self._by_subject, self._by_budget):
+            index.clear()
+    
+    def add(self, order: Order):
+        if order.status != OrderStatus.ACTIVE.value:
+            return
+        self.remove(order.order_id)
+        self._orders[order.order_id] = order
+        for index, key in self._keys(order):
+            index.setdefault(key, {})[order.order_id] = order
+    
+    def remove(self, order_id: str):
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return
+        for index, key in self._keys(order):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(order_id, None)
+                if not bucket:
+                    del index[key]
+    
+    def search(
+        self,
+        order_type: Optional[str] = None,
+        subject: Optional[str] = None,
+        budget: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Order]:
+        """Активные заказы по фильтрам, новые сначала"""
+        buckets = []
+        if order_type:
+            buckets.append(self._by_type.get(order_type, {}))
+        if subject:
+            buckets.append(self._by_subject.get(normalize_subject(subject), {}))
+        if budget:
+            buckets.append(self._by_budget.get(budget, {}))
+        if not buckets:
+            buckets.append(self._orders)
+        
+        buckets.sort(key=len)
+        smallest, others = buckets[0], buckets[1:]
+        result = []
+        for order_id in reversed(smallest):
+            if all(order_id in bucket for bucket in others):
+                result.append(smallest[order_id])
+                if len(result) >= limit:
+                    break
+        return result
+    
+    def _keys(self, order: Order) -> Iterable[tuple]:
+        yield self._by_type, order.type
+        yield self._by_subject, normalize_subject(order.subject or "")
+        range_key = budget_range(order.budget or 0)
+        if range_key:
+            yield self._by_budget, range_key
+
+    
+    async def _refresh_loop(self, db: AsyncDatabase):
+        next_prune = time.monotonic() + self.changes_ttl
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh(db)
+                if time.monotonic() >= next_prune:
+                    next_prune = time.monotonic() + self.changes_ttl
+                    await db.prune_order_changes(self.changes_ttl)
+            except Exception:
+                logger.exception("Не удалось обновить индекс активных заказов")
\ No newline at end of file
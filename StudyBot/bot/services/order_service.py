@@ -1,24 +1,38 @@
+import logging
 from typing import Optional
-from uuid import uuid4
 from datetime import datetime
 
 from aiogram import Bot
-from models.order import Order
+from models.order import Order, OrderDetails
 from models.user import User
+from services.database import AsyncDatabase
+from services.notifications import NotificationDispatcher
+from services.message_editor import MessageEditor
+from services.order_index import ActiveOrderIndex
+from services.order_ids import new_order_id
 from config.constants import OrderStatus, ORDER_TYPES
 from config.settings import ADMIN_CHAT_ID, MAX_ORDERS_PER_USER
 
+logger = logging.getLogger(__name__)
+
 class OrderService:
-    def __init__(self, bot: Bot, db):
+    def __init__(
+        self,
+        bot: Bot,
+        db: AsyncDatabase,
+        notifier: NotificationDispatcher,
+        editor: MessageEditor,
+        index: ActiveOrderIndex
+    ):
         self.bot = bot
         self.db = db
+        self.notifier = notifier
+        self.editor = editor
+        self.index = index
         self.max_orders = MAX_ORDERS_PER_USER
     
     async def create_order(self, order_data: dict, client_id: int) -> Optional[Order]:
-        if len(self.db.get_user_orders(client_id, OrderStatus.ACTIVE.value)) >= self.max_orders:
-            return None
-        
-        order_id = str(uuid4())
+        order_id = new_order_id()
         order = Order(
             order_id=order_id,
             type=order_data['type'],
@@ -30,13 +44,16 @@ class OrderService:
             file_path=order_data.get('file_path')
         )
         
-        self.db.add_order(order)
+        # Лимит проверяется в той же вставке, так что параллельные заявки его не обойдут
+        if not await self.db.add_order(order, max_active=self.max_orders):
+            return None
+        self.index.add(order)
         await self._notify_admins(order)
         return order
     
     async def _notify_admins(self, order: Order):
         emoji, type_display = ORDER_TYPES.get(order.type, ("✏️", "ДРУГОЕ ЗАДАНИЕ"))
-        client = self.db.get_user(order.client_id)
+        client = await self.db.get_user(order.client_id)
         
         text = (
             f"🔔 *Новый заказ!*\n\n"
@@ -56,54 +73,106 @@ class OrderService:
                 parse_mode="Markdown"
             )
             
-            self.db.update_order(order.order_id, {"message_id": sent_message.message_id})
-        except Exception as e:
-            print(f"Ошибка отправки уведомления: {e}")
+            await self.db.update_order(order.order_id, {"message_id": sent_message.message_id})
+        except Exception:
+            logger.exception("Не удалось отправить карточку заказа %s в админ-чат", order.order_id)
+    
+    async def _load_details(self, order: Order, canceller_id: Optional[int] = None) -> OrderDetails:
+        """Участники заказа из кэша пользователей; если кого-то в нем нет —
+        все разом одним JOIN (get_order_details), а не get_user на каждого"""
+        user_ids = (order.client_id, order.executor_id, canceller_id)
+        cached = [self.db.users.get(user_id) if user_id else None for user_id in user_ids]
+        if all(user or not user_id for user, user_id in zip(cached, user_ids)):
+            return OrderDetails(order, *cached)
+        
+        details = await self.db.get_order_details(order.order_id, canceller_id)
+        if details is None:
+            return OrderDetails(order, *cached)
+        # Заказ оставляем тот, что вернул переход: строка могла уже измениться снова
+        details.order = order
+        return details
     
     async def accept_order(self, order_id: str, executor_id: int) -> bool:
-        order = self.db.get_order(order_id)
-        if not order or order.status != OrderStatus.ACTIVE.value:
+        order = await self.db.transition_order(order_id, OrderStatus.TAKEN, {"executor_id": executor_id})
+        if not order:
             return False
+        self.index.remove(order_id)
         
-        self.db.update_order(order_id, {
-            "status": OrderStatus.TAKEN.value,
-            "executor_id": executor_id
-        })
-        
-        executor = self.db.get_user(executor_id)
-        client = self.db.get_user(order.client_id)
+        details = await self._load_details(order)
+        executor = details.executor
+        client = details.client
         
+        from keyboards.chat_kb import get_order_chat_kb
         if client:
-            try:
-                await self.bot.send_message(
-                    chat_id=client.user_id,
-                    text=(
-                        f"🎉 Ваш заказ *{order_id}* принят исполнителем!\n\n"
-                        f"👨‍💻 *Исполнитель:* {executor.mention}\n"
-                        f"📞 Свяжитесь с исполнителем для уточнения деталей."
-                    ),
-                    parse_mode="Markdown"
-                )
-            except Exception as e:
-                print(f"Ошибка отправки уведомления клиенту: {e}")
-        
-        await self._update_order_message(order_id)
+            self.notifier.send(
+                client.user_id,
+                f"🎉 Ваш заказ *{order_id}* принят исполнителем!\n\n"
+                f"👨‍💻 *Исполнитель:* {executor.mention if executor else executor_id}\n"
+                f"📞 Свяжитесь с исполнителем для уточнения деталей.",
+                reply_markup=get_order_chat_kb(order_id),
+                parse_mode="Markdown"
+            )
+        
+        self.notifier.send(
+            executor_id,
+            f"✅ Вы приняли заказ *{order_id}*\n\n"
+            f"📚 *Предмет:* {order.subject}\n"
+            f"⏰ *Срок:* {order.deadline}\n\n"
+            f"Уточнить детали можно в чате с клиентом.",
+            reply_markup=get_order_chat_kb(order_id),
+            parse_mode="Markdown"
+        )
+        
+        await self._update_order_message(details)
         return True
     
-    async def _update_order_message(self, order_id: str):
-        order = self.db.get_order(order_id)
+    async def start_work(self, order_id: str) -> bool:
+        order = await self.db.transition_order(order_id, OrderStatus.IN_PROGRESS)
         if not order:
+            return False
+        
+        details = await self._load_details(order)
+        if details.client:
+            self.notifier.send(
+                details.client.user_id,
+                f"🛠 Исполнитель приступил к работе над заказом *{order_id}*.",
+                parse_mode="Markdown"
+            )
+        
+        await self._update_order_message(details)
+        return True
+    
+    async def send_to_review(self, order_id: str) -> bool:
+        order = await self.db.transition_order(order_id, OrderStatus.UNDER_REVIEW)
+        if not order:
+            return False
+        
+        details = await self._load_details(order)
+        if details.client:
+            self.notifier.send(
+                details.client.user_id,
+                f"🔍 Заказ *{order_id}* отправлен вам на проверку.",
+                parse_mode="Markdown"
+            )
+        
+        await self._update_order_message(details)
+        return True
+    
+    async def refresh_order_message(self, order: Order):
+        """Обновляет карточку заказа в админ-чате после изменения статуса извне сервиса"""
+        await self._update_order_message(await self._load_details(order))
+    
+    async def _update_order_message(self, details: OrderDetails):
+        order = details.order
+        if not order.message_id:
             return
         
         emoji, type_display = ORDER_TYPES.get(order.type, ("✏️", "ДРУГОЕ ЗАДАНИЕ"))
         status_text = order.status_display
         
-        client = self.db.get_user(order.client_id)
-        executor_info = ""
-        
-        if order.executor_id:
-            executor = self.db.get_user(order.executor_id)
-            executor_info = f"\n👨‍💻 *Исполнитель:* {executor.mention}" if executor else ""
+        client = details.client
+        executor = details.executor
+        executor_info = f"\n👨‍💻 *Исполнитель:* {executor.mention}" if executor else ""
         
         text = (
             f"{status_text}\n\n"
@@ -113,38 +182,30 @@ class OrderService:
             f"⏰ *Срок:* {order.deadline}\n"
             f"💰 *Бюджет:* {order.budget} руб"
             f"{executor_info}\n\n"
-            f"👤 *Клиент:* {client.mention}\n"
+            f"👤 *Клиент:* {client.mention if client else '—'}\n"
             f"🆔 *ID:* `{order.order_id}`"
         )
         
-        try:
-            from keyboards.order_kb import get_order_actions_kb
-            await self.bot.edit_message_text(
-                chat_id=ADMIN_CHAT_ID,
-                message_id=order.message_id,
-                text=text,
-                reply_markup=get_order_actions_kb(order),
-                parse_mode="Markdown"
-            )
-        except Exception as e:
-            print(f"Ошибка обновления сообщения: {e}")
+        from keyboards.order_kb import get_order_actions_kb
+        self.editor.edit(
+            ADMIN_CHAT_ID,
+            order.message_id,
+            text,
+            reply_markup=get_order_actions_kb(order),
+            parse_mode="Markdown"
+        )
     
     async def complete_order(self, order_id: str) -> bool:
-        order = self.db.get_order(order_id)
-        if not order or order.status not in [
-            OrderStatus.TAKEN.value, 
-            OrderStatus.IN_PROGRESS.value, 
-            OrderStatus.UNDER_REVIEW.value
-        ]:
+        order = await self.db.transition_order(
+            order_id, OrderStatus.COMPLETED, {"completed_at": datetime.now().isoformat()}
+        )
+        if not order:
             return False
+        self.index.remove(order_id)
         
-        self.db.update_order(order_id, {
-            "status": OrderStatus.COMPLETED.value,
-            "completed_at": datetime.now().isoformat()
-        })
-        
-        client = self.db.get_user(order.client_id)
-        executor = self.db.get_user(order.executor_id) if order.executor_id else None
+        details = await self._load_details(order)
+        client = details.client
+        executor = details.executor
         
         notification_text = (
             f"🏁 Заказ *{order_id}* завершен!\n\n"
@@ -154,66 +215,43 @@ class OrderService:
         )
         
         if client:
-            try:
-                from keyboards.order_kb import get_rating_kb
-                await self.bot.send_message(
-                    chat_id=client.user_id,
-                    text=notification_text,
-                    reply_markup=get_rating_kb(order_id),
-                    parse_mode="Markdown"
-                )
-            except Exception as e:
-                print(f"Ошибка отправки уведомления клиенту: {e}")
+            from keyboards.order_kb import get_rating_kb
+            self.notifier.send(
+                client.user_id,
+                notification_text,
+                reply_markup=get_rating_kb(order_id),
+                parse_mode="Markdown"
+            )
         
         if executor:
-            try:
-                await self.bot.send_message(
-                    chat_id=executor.user_id,
-                    text=notification_text,
-                    parse_mode="Markdown"
-                )
-            except Exception as e:
-                print(f"Ошибка отправки уведомления исполнителю: {e}")
-        
-        await self._update_order_message(order_id)
+            self.notifier.send(executor.user_id, notification_text, parse_mode="Markdown")
+        
+        await self._update_order_message(details)
         return True
     
     async def cancel_order(self, order_id: str, canceled_by: int) -> bool:
-        order = self.db.get_order(order_id)
+        order = await self.db.transition_order(order_id, OrderStatus.CANCELED)
         if not order:
             return False
+        self.index.remove(order_id)
         
-        self.db.update_order(order_id, {"status": OrderStatus.CANCELED.value})
-        
-        client = self.db.get_user(order.client_id)
-        executor = self.db.get_user(order.executor_id) if order.executor_id else None
-        canceled_by_user = self.db.get_user(canceled_by)
+        details = await self._load_details(order, canceller_id=canceled_by)
+        client = details.client
+        executor = details.executor
+        canceled_by_user = details.canceller
+        canceled_by_mention = canceled_by_user.mention if canceled_by_user else canceled_by
         
         notification_text = (
-            f"⚠️ Заказ *{order_id}* отменен пользователем {canceled_by_user.mention}\n\n"
+            f"⚠️ Заказ *{order_id}* отменен пользователем {canceled_by_mention}\n\n"
             f"📚 *Предмет:* {order.subject}\n"
             f"💰 *Бюджет:* {order.budget} руб"
         )
         
-        if canceled_by != client.user_id and client:
-            try:
-                await self.bot.send_message(
-                    chat_id=client.user_id,
-                    text=notification_text,
-                    parse_mode="Markdown"
-                )
-            except Exception as e:
-                print(f"Ошибка отправки уведомления клиенту: {e}")
+        if client and canceled_by != client.user_id:
+            self.notifier.send(client.user_id, notification_text, parse_mode="Markdown")
         
         if executor and canceled_by != executor.user_id:
-            try:
-                await self.bot.send_message(
-                    chat_id=executor.user_id,
-                    text=notification_text,
-                    parse_mode="Markdown"
-                )
-            except Exception as e:
-                print(f"Ошибка отправки уведомления исполнителю: {e}")
-        
-        await self._update_order_message(order_id)
+            self.notifier.send(executor.user_id, notification_text, parse_mode="Markdown")
+        
+        await self._update_order_message(details)
         return True
\ No newline at end of file
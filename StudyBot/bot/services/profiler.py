@@ -0,0 +1,131 @@
+"""Семплирующий профайлер обработки апдейтов.
+
+Отдельный поток раз в interval секунд снимает стек потока event loop и, если
+в этот момент выполняется отслеживаемая задача (апдейт, выбранный для
+профилирования), засчитывает стек ее хендлеру. Заодно снимается стек потока
+db-worker, когда он занят запросом. Результат — файл в формате collapsed
+stacks ("хендлер;кадр;кадр N"), который читают flamegraph.pl и speedscope.
+Пока профайлер не запущен, ни поток, ни учет задач не работают.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.settings import PROFILE_INTERVAL
+from utils.logger import LOGS_DIR
+
+logger = logging.getLogger(__name__)
+
+# Кадры цикла событий до первой корутины задачи и цикла db-worker до запроса в профиль не идут
+_LOOP_ROOT = "Handle._run"
+_DB_ROOT = "AsyncDatabase._worker"
+_DB_THREAD = "db-worker"
+
+
+class StackProfiler:
+    def __init__(self, interval: float = PROFILE_INTERVAL, logs_dir: Path = LOGS_DIR):
+        self.interval = interval
+        self.logs_dir = logs_dir
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._tasks: Dict[asyncio.Task, str] = {}
+        self._names: Dict[object, str] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Вызывается из потока event loop"""
+        if self.running:
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Optional[Path]:
+        """Останавливает семплирование и пишет собранное в logs/; None, если писать нечего"""
+        if not self.running:
+            return None
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        self._tasks.clear()
+        return self.dump()
+
+    def track(self, task: asyncio.Task, label: str):
+        self._tasks[task] = label
+
+    def untrack(self, task: asyncio.Task):
+        self._tasks.pop(task, None)
+
+    def dump(self) -> Optional[Path]:
+        if not self.stacks:
+            return None
+        self.logs_dir.mkdir(exist_ok=True)
+        path = self.logs_dir / f"profile-{datetime.now():%Y%m%d-%H%M%S}.{os.getpid()}.folded"
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        by_root = Counter()
+        for stack, count in self.stacks.items():
+            by_root[stack.partition(";")[0]] += count
+        logger.info(
+            "Профиль записан в %s: %d семплов, по хендлерам: %s",
+            path, self.samples, ", ".join(f"{name}={count}" for name, count in by_root.most_common(10))
+        )
+        return path
+
+    def _run(self):
+        db_thread = next((t.ident for t in threading.enumerate() if t.name == _DB_THREAD), None)
+        while not self._stopping.wait(self.interval):
+            self.samples += 1
+            self._sample(db_thread)
+
+    def _sample(self, db_thread: Optional[int]):
+        # Задачу читаем до и после снимка стеков: если она сменилась, стек не ее
+        task = asyncio.current_task(self._loop)
+        label = self._tasks.get(task) if task else None
+        frames = sys._current_frames()
+        if label and asyncio.current_task(self._loop) is task:
+            stack = self._collapse(frames.get(self._loop_thread), _LOOP_ROOT)
+            if stack:
+                self.stacks[f"{label};{stack}"] += 1
+
+        if db_thread and self._tasks:
+            stack = self._collapse(frames.get(db_thread), _DB_ROOT)
+            # Пустой стек — поток ждет очередь, а не выполняет запрос
+            if stack and "_execute_batch" in stack:
+                self.stacks[f"[{_DB_THREAD}];{stack}"] += 1
+
+    def _collapse(self, frame, root: str) -> str:
+        names: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_qualname == root:
+                break
+            name = self._names.get(code)
+            if name is None:
+                name = self._names[code] = f"{Path(code.co_filename).stem}.{code.co_qualname}"
+            names.append(name)
+            frame = frame.f_back
+        else:
+            # Корень не найден — поток сейчас не в задаче/запросе
+            return ""
+        return ";".join(reversed(names))
\ No newline at end of file
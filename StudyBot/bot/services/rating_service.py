@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Optional
+
+from services.database import AsyncDatabase
+from services.notifications import NotificationDispatcher
+from config.settings import RATING_RECOMPUTE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class RatingService:
+    """Оценки исполнителей.
+
+    Сумма и число оценок копятся в users при каждой записи, так что рейтинг в
+    профиле читается готовым. Периодический полный пересчет сверяет накопленное
+    с таблицей ratings и исправляет расхождения.
+    """
+
+    def __init__(
+        self,
+        db: AsyncDatabase,
+        notifier: NotificationDispatcher,
+        recompute_interval: float = RATING_RECOMPUTE_INTERVAL
+    ):
+        self.db = db
+        self.notifier = notifier
+        self.recompute_interval = recompute_interval
+        self._recompute_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._recompute_task = asyncio.create_task(self._recompute_loop())
+
+    async def stop(self):
+        if self._recompute_task:
+            self._recompute_task.cancel()
+            self._recompute_task = None
+
+    async def rate(self, order_id: str, customer_id: int, rating: int) -> bool:
+        if not 1 <= rating <= 5:
+            return False
+
+        executor_id = await self.db.add_rating(order_id, customer_id, rating)
+        if executor_id is None:
+            return False
+
+        text = f"⭐ Клиент оценил заказ *{order_id}* на {rating} из 5."
+        executor = await self.db.get_user(executor_id)
+        if executor:
+            text += f"\nВаш рейтинг: {executor.rating:.2f}"
+        self.notifier.send(executor_id, text, parse_mode="Markdown")
+        return True
+
+    async def _recompute_loop(self):
+        while True:
+            await asyncio.sleep(self.recompute_interval)
+            try:
+                fixed = await self.db.recompute_ratings()
+            except Exception:
+                logger.exception("Не удалось пересчитать рейтинги")
+                continue
+            if fixed:
+                logger.warning("Пересчет рейтингов исправил расхождения у %d пользователей", fixed)
\ No newline at end of file
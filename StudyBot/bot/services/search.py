@@ -0,0 +1,33 @@
+import re
+from typing import List
+
+# Окончания для облегченного стемминга русских слов, длинные проверяются первыми.
+# Основа ищется префиксным запросом FTS5, поэтому "математике", "математикой"
+# и "математика" находятся по одному "математик*".
+_RU_ENDINGS = sorted((
+    "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими", "иях", "ях", "ах",
+    "ешь", "ете", "ишь", "ите", "ать", "ять", "ить", "еть", "ует", "уют", "ют", "ут", "ет", "ит",
+    "ой", "ей", "ий", "ый", "ая", "яя", "ое", "ее", "ую", "юю", "ом", "ем", "ам", "ям",
+    "ов", "ев", "ия", "ие", "ью", "ии",
+    "ы", "и", "а", "я", "о", "е", "у", "ю", "ь", "й"
+), key=len, reverse=True)
+
+_MIN_STEM = 3
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def stem_ru(word: str) -> str:
+    word = word.lower()
+    for ending in _RU_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def build_fts_query(text: str) -> str:
+    """Превращает пользовательский текст в запрос FTS5: все слова обязательны, по основам"""
+    terms: List[str] = []
+    for word in _WORD_RE.findall(text):
+        stem = stem_ru(word)
+        terms.append(f'"{stem}"*')
+    return " ".join(terms)
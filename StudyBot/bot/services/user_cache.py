@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from models.user import User
+from config.settings import USER_CACHE_SIZE, USER_CACHE_TTL
+
+
+class UserCache:
+    """Ограниченный LRU-кэш пользователей с TTL и счетчиками попаданий.
+
+    Кэш локален для процесса: AsyncDatabase сбрасывает записи после своих
+    изменений, а изменения из других воркеров webhook и прямые правки базы
+    (роль, рейтинг) видны не позже чем через TTL. Роль в боте меняют только
+    вручную, поэтому такая задержка допустима; если появится бан или смена
+    роли из бота с немедленным эффектом во всех воркерах, такую проверку
+    нужно делать мимо кэша.
+    """
+
+    def __init__(self, max_size: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[int, tuple]" = OrderedDict()
+    
+    def get(self, user_id: int) -> Optional[User]:
+        item = self._items.get(user_id)
+        if item is None:
+            self.misses += 1
+            return None
+        
+        user, expires_at = item
+        if expires_at < time.monotonic():
+            del self._items[user_id]
+            self.misses += 1
+            return None
+        
+        self._items.move_to_end(user_id)
+        self.hits += 1
+        return user
+    
+    def put(self, user: User) -> None:
+        self._items[user.user_id] = (user, time.monotonic() + self.ttl)
+        self._items.move_to_end(user.user_id)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+    
+    def invalidate(self, user_id: int) -> None:
+        self._items.pop(user_id, None)
+    
+    def clear(self) -> None:
+        self._items.clear()
+    
+    def __len__(self) -> int:
+        return len(self._items)
@@ -1,22 +1,141 @@
+"""Логирование без блокировки event loop.
+
+Хендлеры и сервисы пишут в QueueHandler — это только постановка записи в
+очередь. Форматирование и запись на диск выполняет поток QueueListener.
+В файл пишется JSON по строке на запись, в консоль — обычный текст. Файл
+logs/<дата>[.<процесс>].log сменяется в полночь и при превышении
+LOG_MAX_BYTES; DEBUG-записи прореживаются до одной из LOG_DEBUG_SAMPLE_EVERY
+на каждое место вызова.
+"""
+import copy
+import json
 import logging
+import os
+import queue
+import time
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from datetime import datetime
-
-def setup_logger():
-    logs_dir = Path(__file__).parent.parent / "logs"
-    logs_dir.mkdir(exist_ok=True)
-    
-    log_file = logs_dir / f"{datetime.now().strftime('%Y-%m-%d')}.log"
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
-    
-    return logging.getLogger(__name__)
-
-logger = setup_logger()
\ No newline at end of file
+from typing import Optional
+
+from config.settings import (
+    LOG_LEVEL,
+    LOG_MAX_BYTES,
+    LOG_BACKUP_COUNT,
+    LOG_RETENTION_DAYS,
+    LOG_DEBUG_SAMPLE_EVERY
+)
+
+LOGS_DIR = Path(__file__).parent.parent / "logs"
+
+# Атрибуты LogRecord; все остальное пришло через extra= и попадает в JSON как поля
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "process": record.processName
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DailyRotatingFileHandler(RotatingFileHandler):
+    """Файл на каждый день; внутри дня — ротация по размеру (.1, .2, ...)"""
+
+    def __init__(self, logs_dir: Path, suffix: str = "", max_bytes: int = LOG_MAX_BYTES,
+                 backup_count: int = LOG_BACKUP_COUNT, retention_days: int = LOG_RETENTION_DAYS):
+        self.logs_dir = logs_dir
+        self.suffix = suffix
+        self.retention_days = retention_days
+        self._date = date.today()
+        super().__init__(self._path(), maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+
+    def _path(self) -> Path:
+        return self.logs_dir / f"{self._date.isoformat()}{self.suffix}.log"
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        return date.today() != self._date or super().shouldRollover(record)
+
+    def doRollover(self):
+        if date.today() == self._date:
+            super().doRollover()
+            return
+
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self._date = date.today()
+        self.baseFilename = os.path.abspath(self._path())
+        self._purge_old()
+
+    def _purge_old(self):
+        cutoff = time.time() - self.retention_days * 86400
+        for path in self.logs_dir.glob("*.log*"):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+
+
+class DebugSampler(logging.Filter):
+    """Пропускает каждую every-ю DEBUG-запись с одного места вызова; остальные уровни — все"""
+
+    def __init__(self, every: int = LOG_DEBUG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = every
+        self._seen = defaultdict(int)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.every <= 1:
+            return True
+        key = (record.pathname, record.lineno)
+        self._seen[key] += 1
+        if self._seen[key] % self.every != 1:
+            return False
+        record.sample_rate = self.every
+        return True
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Текст трассировки готовим здесь: exc_info с фреймами через очередь не передаем,
+        # а в JSON он нужен отдельным полем, а не приклеенным к сообщению
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logger(process_name: Optional[str] = None) -> QueueListener:
+    """Перенастраивает корневой логгер на очередь и запускает поток записи.
+    Вызывается при старте каждого процесса; listener нужно остановить при выходе"""
+    LOGS_DIR.mkdir(exist_ok=True)
+
+    file_handler = DailyRotatingFileHandler(LOGS_DIR, f".{process_name}" if process_name else "")
+    file_handler.setFormatter(JsonFormatter())
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    return listener
\ No newline at end of file
@@ -20,12 +20,30 @@ class DisputeStatus(str, Enum):
     RESOLVED = "resolved"
     REJECTED = "rejected"
 
+# Допустимые переходы заказа: целевой статус -> статусы, из которых в него можно попасть
+ORDER_TRANSITIONS = {
+    OrderStatus.TAKEN: (OrderStatus.ACTIVE,),
+    OrderStatus.IN_PROGRESS: (OrderStatus.TAKEN,),
+    OrderStatus.UNDER_REVIEW: (OrderStatus.IN_PROGRESS,),
+    OrderStatus.COMPLETED: (OrderStatus.TAKEN, OrderStatus.IN_PROGRESS, OrderStatus.UNDER_REVIEW),
+    OrderStatus.CANCELED: (OrderStatus.ACTIVE, OrderStatus.TAKEN),
+    OrderStatus.DISPUTE: (OrderStatus.IN_PROGRESS, OrderStatus.UNDER_REVIEW)
+}
+
 ORDER_TYPES = {
     "exam": ("📚", "ЭКЗАМЕН"),
     "coursework": ("📝", "КУРСОВАЯ"), 
     "other": ("✏️", "ДРУГОЕ ЗАДАНИЕ")
 }
 
+# Диапазоны бюджета для ленты заказов: ключ -> (подпись, от, до включительно)
+BUDGET_RANGES = {
+    "low": ("до 1000 ₽", 0, 999),
+    "mid": ("1000–2999 ₽", 1000, 2999),
+    "high": ("3000–9999 ₽", 3000, 9999),
+    "top": ("от 10000 ₽", 10000, None)
+}
+
 ORDER_STATUS_DISPLAY = {
     OrderStatus.ACTIVE: "🟢 Активен",
     OrderStatus.TAKEN: "🟣 Принят",
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).parent.parent
@@ -5,13 +6,93 @@ BASE_DIR = Path(__file__).parent.parent
 # Настройки бота
 TOKEN = "7905009014:AAF2PtwiWkA6sIYLlGrF04JcJPg8oDZA_J4"
 ADMIN_CHAT_ID = -1002585261529
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")  # None — официальный api.telegram.org
+
+# Режим запуска: "polling" или "webhook"
+RUN_MODE = "polling"
+WEBHOOK_URL = "https://example.com"
+WEBHOOK_PATH = "/webhook"
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = "0.0.0.0"
+WEBHOOK_PORT = 8080
+WEBHOOK_WORKERS = 2
+WEBHOOK_MAX_CONNECTIONS = 100
+WEBHOOK_SHUTDOWN_TIMEOUT = 30  # секунд на завершение обработки принятых апдейтов
 
 # Настройки базы данных
 DB_NAME = BASE_DIR / "study_tips_bot.db"
+DB_JOURNAL_MODE = "WAL"
+DB_SYNCHRONOUS = "NORMAL"  # OFF / NORMAL / FULL / EXTRA
+
+# Групповая фиксация: записи, накопившиеся в очереди, пока шла предыдущая фиксация, коммитятся одной транзакцией
+DB_GROUP_COMMIT = True
+DB_COMMIT_MAX_BATCH = 64
+
+# Логи: JSON-файл на день с ротацией по размеру, DEBUG прореживается
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5  # файлов .1, .2, ... внутри одного дня
+LOG_RETENTION_DAYS = 14
+LOG_DEBUG_SAMPLE_EVERY = 100  # пишется одна DEBUG-запись из N с каждого места вызова
+
+# Метрики Prometheus на локальном порту; воркеры webhook занимают METRICS_PORT + номер, 0 — выключено
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+# Профилирование (/profile или SIGUSR2): семплы стека раз в PROFILE_INTERVAL у доли апдейтов
+PROFILE_SAMPLE_RATE = 0.1
+PROFILE_INTERVAL = 0.005  # секунд
+PROFILE_MAX_DURATION = 600  # секунд, затем профиль пишется и режим выключается
+
+# Кэш пользователей. Кэш у каждого процесса свой: изменения, сделанные в обход
+# процесса (другой воркер webhook, правка роли в базе), видны после TTL
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 300  # секунд
+
+# Рассылка уведомлений (лимиты Telegram: ~30 сообщений/с, 1/с в чат, 20/мин в группу)
+NOTIFY_WORKERS = 4
+NOTIFY_GLOBAL_RATE = 30
+NOTIFY_CHAT_INTERVAL = 1.0
+NOTIFY_GROUP_INTERVAL = 3.0
+NOTIFY_MAX_RETRIES = 3
+NOTIFY_RETRY_BACKOFF = 1.0  # секунд до первого повтора при сетевой ошибке или 5xx, дальше вдвое больше
+
+# Правки карточек заказов в админ-чате
+EDIT_DEBOUNCE = 1.0  # секунд
+EDIT_HISTORY_SIZE = 5000
+
+# Чат по заказу: сообщения пишутся в базу пачками
+CHAT_FLUSH_SIZE = 100
+CHAT_FLUSH_INTERVAL = 1.0  # секунд
+CHAT_HISTORY_PAGE_SIZE = 10
+
+# Очередь споров: рубль бюджета заказа засчитывается как секунды ожидания
+DISPUTE_BUDGET_WEIGHT = 1.0
+
+# Сверка накопительных рейтингов с полным пересчетом
+RATING_RECOMPUTE_INTERVAL = 3600  # секунд
+
+# Индекс активных заказов: каждый воркер подтягивает чужие изменения из журнала
+ORDER_INDEX_REFRESH_INTERVAL = 1.0  # секунд, предел устаревания ленты /browse
+ORDER_CHANGES_TTL = 600  # секунд храним журнал изменений заказов
+
+# Кэш клавиатур с параметрами (по заказу/статусу)
+KEYBOARD_CACHE_SIZE = 4096
+
+# Хранилище FSM: "sqlite" (общий файл базы) или "redis"
+FSM_STORAGE = "sqlite"
+REDIS_URL = "redis://localhost:6379/0"
+FSM_TTL = 24 * 3600  # брошенные анкеты удаляются через сутки
+FSM_CACHE_SIZE = 10000
+FSM_PURGE_INTERVAL = 600  # секунд
 UPLOAD_FOLDER = BASE_DIR / "uploads"
 UPLOAD_FOLDER.mkdir(exist_ok=True)
 
 # Лимиты
 MAX_ORDERS_PER_USER = 3
+ORDERS_PAGE_SIZE = 5
+SEARCH_RESULTS_LIMIT = 10
 MAX_FILE_SIZE_MB = 5
-FILE_TYPES = ['.pdf', '.docx', '.doc', '.txt']
\ No newline at end of file
+FILE_TYPES = ['.pdf', '.docx', '.doc', '.txt']
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_RESULT_TTL = 3600  # секунд храним результат загрузки для неподтвержденной анкеты
\ No newline at end of file
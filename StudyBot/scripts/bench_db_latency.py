@@ -0,0 +1,118 @@
+"""Задержка хендлеров при конкурентных апдейтах: синхронный Database на event
+loop против AsyncDatabase с потоком базы.
+
+Апдейты приходят с постоянной частотой --rate, каждый обрабатывается своей
+задачей, как в диспетчере. "Хендлер" делает то же, что типичный апдейт:
+upsert пользователя, чтение заказа и его обновление. Задержка считается от
+прихода апдейта до конца хендлера, так что блокировка event loop чужим
+запросом в нее входит. Печатаются p50/p99.
+
+    python scripts/bench_db_latency.py --updates 3000 --rate 1000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "bot")]
+
+import services.database
+from config.settings import DB_SYNCHRONOUS
+from models.order import Order
+from models.user import User
+from services.database import AsyncDatabase, Database
+from services.order_ids import new_order_id
+
+
+def percentile(values: list, q: float) -> float:
+    return statistics.quantiles(values, n=100)[int(q) - 1] * 1000
+
+
+async def run_handlers(handler, total: int, rate: float) -> list:
+    latencies = []
+    tasks = []
+    started = time.perf_counter()
+
+    async def process(i: int, arrived: float):
+        await handler(i)
+        latencies.append(time.perf_counter() - arrived)
+
+    for i in range(total):
+        arrived = started + i / rate
+        delay = arrived - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(process(i, arrived)))
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+async def bench_sync(path: Path, order_ids: list, total: int, rate: float) -> list:
+    db = Database(path)
+
+    async def handler(i: int):
+        db.add_user(User(i % 1000, f"user{i}", "Bench", None))
+        order_id = order_ids[i % len(order_ids)]
+        db.get_order(order_id)
+        db.update_order(order_id, {"budget": i})
+
+    try:
+        return await run_handlers(handler, total, rate)
+    finally:
+        db.close()
+
+
+async def bench_async(path: Path, order_ids: list, total: int, rate: float, group_commit: bool) -> list:
+    db = AsyncDatabase(path, group_commit=group_commit)
+
+    async def handler(i: int):
+        await db.add_user(User(i % 1000, f"user{i}", "Bench", None))
+        order_id = order_ids[i % len(order_ids)]
+        await db.get_order(order_id)
+        await db.update_order(order_id, {"budget": i})
+
+    try:
+        return await run_handlers(handler, total, rate)
+    finally:
+        await db.close()
+
+
+def seed(path: Path, count: int = 100) -> list:
+    db = Database(path)
+    order_ids = []
+    for _ in range(count):
+        order = Order(new_order_id(), "exam", "Матанализ", "Пределы", "завтра", 500, 1)
+        db.add_order(order)
+        order_ids.append(order.order_id)
+    db.close()
+    return order_ids
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--rate", type=float, default=1000, help="апдейтов в секунду")
+    parser.add_argument("--dir", default=None, help="каталог для файлов базы (по умолчанию временный)")
+    parser.add_argument("--synchronous", default=DB_SYNCHRONOUS, help="PRAGMA synchronous: OFF/NORMAL/FULL")
+    args = parser.parse_args()
+    services.database.DB_SYNCHRONOUS = args.synchronous
+
+    benches = (
+        ("sync Database", bench_sync),
+        ("AsyncDatabase", lambda *a: bench_async(*a, group_commit=False)),
+        ("AsyncDatabase+group", lambda *a: bench_async(*a, group_commit=True))
+    )
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for i, (name, bench) in enumerate(benches):
+            path = Path(tmp) / f"bench{i}.db"
+            order_ids = seed(path)
+            latencies = await bench(path, order_ids, args.updates, args.rate)
+            print(f"{name:>20}: p50 {percentile(latencies, 50):7.2f} мс, p99 {percentile(latencies, 99):7.2f} мс")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
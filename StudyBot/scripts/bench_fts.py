@@ -0,0 +1,117 @@
+"""Полнотекстовый поиск заказов на большом корпусе: orders_fts против LIKE.
+
+Засевает --orders заказов (по умолчанию 500k) с предметами и описаниями из
+словаря, затем меряет search_orders (FTS5 с bm25 и сниппетом) и наивный
+LIKE по предмету и описанию на тех же запросах. LIKE без ранжирования
+останавливается на первых десяти строках, а поиск ранжирует все
+совпадения, поэтому их число тоже печатается. После VACUUM поиск
+повторяется: результаты должны совпасть, потому что orders_fts ссылается
+на order_key, а не на rowid.
+
+    python scripts/bench_fts.py --orders 500000
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "bot")]
+
+from services.database import Database
+from services.search import build_fts_query
+from services.order_ids import encode_order_id, pack_order_id
+
+SUBJECTS = [
+    "Математический анализ", "Линейная алгебра", "Физика", "Химия", "История России",
+    "Программирование на Python", "Базы данных", "Экономика", "Философия", "Английский язык",
+    "Теория вероятностей", "Сопротивление материалов", "Органическая химия", "Микроэкономика",
+]
+WORDS = (
+    "решить задачи контрольная курсовая реферат лабораторная пределы интегралы производные "
+    "матрицы векторы определители механика оптика термодинамика реакции кислоты эссе перевод "
+    "программа алгоритм сортировка графы запросы индексы нормализация спрос предложение рынок "
+    "вероятность распределение дисперсия балки напряжения моменты срочно подробно оформление"
+).split()
+QUERIES = ["физика", "интегралы", "python алгоритм", "органическая химия реакции", "курсов", "дисперсия срочно"]
+
+
+def seed(path: Path, count: int):
+    db = Database(path)
+    conn = db.conn
+    rng = random.Random(1)
+    conn.execute("BEGIN")
+    conn.executemany(
+        """INSERT INTO orders (order_id, type, subject, description, deadline, budget, client_id, status, order_key)
+        VALUES (?, 'exam', ?, ?, 'завтра', 500, ?, 'active', ?)""",
+        (
+            (
+                encode_order_id(pack_order_id(1_000_000 + i, 1, 0)),
+                rng.choice(SUBJECTS),
+                " ".join(rng.choices(WORDS, k=12)),
+                1 + i % 10000,
+                i + 1,
+            )
+            for i in range(count)
+        )
+    )
+    conn.execute("COMMIT")
+    db.close()
+
+
+def measure(db: Database, repeats: int) -> dict:
+    results = {}
+    for text in QUERIES:
+        words = text.split()
+        like = " AND ".join("(subject LIKE ? OR description LIKE ?)" for _ in words)
+        params = [f"%{word}%" for word in words for _ in range(2)]
+        fts, scan = [], []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            hits = db.search_orders(text)
+            fts.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            db.conn.execute(f"SELECT order_id FROM orders WHERE {like} LIMIT 10", params).fetchall()
+            scan.append((time.perf_counter() - started) * 1000)
+        matches = db.conn.execute(
+            "SELECT COUNT(*) FROM orders_fts WHERE orders_fts MATCH ?", (build_fts_query(text),)
+        ).fetchone()[0]
+        results[text] = (statistics.median(fts), statistics.median(scan), matches, [hit.order.order_id for hit in hits])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=500_000)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--dir", default=None, help="каталог для файла базы (по умолчанию временный)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = Path(tmp) / "fts.db"
+        started = time.perf_counter()
+        seed(path, args.orders)
+        print(f"засев {args.orders} заказов с orders_fts: {time.perf_counter() - started:.1f} с, "
+              f"файл {path.stat().st_size / 2**20:.0f} МБ")
+
+        db = Database(path)
+        before = measure(db, args.repeats)
+        db.conn.execute("DELETE FROM orders WHERE order_key % 7 = 0")
+        db.conn.commit()
+        db.conn.execute("VACUUM")
+        after = measure(db, args.repeats)
+        db.close()
+
+        print(f"{'запрос':>28}  {'совпадений':>10}  {'FTS, медиана':>12}  {'LIKE, медиана':>13}  после VACUUM")
+        for text, (fts_ms, like_ms, matches, hits) in before.items():
+            # Удалены заказы с order_key % 7 = 0, остальные выдачи после VACUUM должны быть те же
+            kept = [order_id for order_id in hits if order_id in after[text][3]]
+            same = "совпадает" if after[text][3][:len(kept)] == kept else "РАСХОДИТСЯ"
+            print(f"{text:>28}  {matches:10}  {fts_ms:9.2f} мс  {like_ms:10.2f} мс  {same}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
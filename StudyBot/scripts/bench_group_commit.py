@@ -0,0 +1,83 @@
+"""Вставки в секунду: коммит на каждую запись против групповой фиксации.
+
+Сравниваются синхронный Database (commit на вызов), AsyncDatabase без
+группировки и AsyncDatabase с group_commit при --writers параллельных
+писателях. Отдельно меряется последовательное чтение get_order в каждом
+режиме: одиночный запрос не должен ждать чужих записей.
+
+    python scripts/bench_group_commit.py --rows 5000 --writers 50
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "bot")]
+
+import services.database
+from config.settings import DB_SYNCHRONOUS
+from models.order import Order
+from services.database import AsyncDatabase, Database
+from services.order_ids import new_order_id
+
+
+def make_order() -> Order:
+    return Order(new_order_id(), "exam", "Матанализ", "Пределы", "завтра", 500, 1)
+
+
+def bench_sync(path: Path, rows: int) -> float:
+    db = Database(path)
+    started = time.perf_counter()
+    for _ in range(rows):
+        db.add_order(make_order())
+    elapsed = time.perf_counter() - started
+    db.close()
+    return rows / elapsed
+
+
+async def bench_async(path: Path, rows: int, writers: int, group_commit: bool) -> tuple:
+    db = AsyncDatabase(path, group_commit=group_commit)
+    remaining = iter(range(rows))
+
+    async def writer():
+        for _ in remaining:
+            await db.add_order(make_order())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(writers)))
+    inserts = rows / (time.perf_counter() - started)
+
+    order = make_order()
+    await db.add_order(order)
+    reads = 500
+    started = time.perf_counter()
+    for _ in range(reads):
+        await db.get_order(order.order_id)
+    read_ms = (time.perf_counter() - started) / reads * 1000
+
+    await db.close()
+    return inserts, read_ms
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--dir", default=None, help="каталог для файлов базы (по умолчанию временный)")
+    parser.add_argument("--synchronous", default=DB_SYNCHRONOUS, help="PRAGMA synchronous: OFF/NORMAL/FULL")
+    args = parser.parse_args()
+    services.database.DB_SYNCHRONOUS = args.synchronous
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        tmp = Path(tmp)
+        print(f"{'sync Database':>20}: {bench_sync(tmp / 'sync.db', args.rows):9.0f} вставок/с")
+        for name, group_commit in (("AsyncDatabase", False), ("AsyncDatabase+group", True)):
+            inserts, read_ms = await bench_async(tmp / f"{name}.db", args.rows, args.writers, group_commit)
+            print(f"{name:>20}: {inserts:9.0f} вставок/с, get_order подряд {read_ms:.3f} мс")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""Задержка запросов к заказам, спорам и оценкам с индексами миграций и без них.
+
+Засевает --orders заказов (по умолчанию 1M) от 10k клиентов, споры по 1% и
+оценки по 10% заказов, затем копирует файл, удаляет в копии вторичные
+индексы и в обеих базах меряет запросы тех же форм, что в Database.
+
+    python scripts/bench_indexes.py --orders 1000000
+"""
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "bot")]
+
+from config.constants import OrderStatus
+from services.database import Database
+from services.order_ids import encode_order_id, pack_order_id
+
+CLIENTS = 10000
+STATUSES = [s.value for s in OrderStatus]
+
+
+def seed(path: Path, count: int) -> list:
+    db = Database(path)
+    conn = db.conn
+    order_ids = [encode_order_id(pack_order_id(1_000_000 + i, 1, 0)) for i in range(count)]
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO users (user_id, first_name) VALUES (?, ?)",
+        ((user_id, "Bench") for user_id in range(1, CLIENTS + 1))
+    )
+    conn.executemany(
+        """INSERT INTO orders (order_id, type, subject, description, deadline, budget, client_id, executor_id, status)
+        VALUES (?, 'exam', 'Матанализ', 'Пределы', 'завтра', ?, ?, ?, ?)""",
+        (
+            (order_id, 100 + i % 5000, 1 + i % CLIENTS, 1 + (i * 7) % CLIENTS, STATUSES[i % len(STATUSES)])
+            for i, order_id in enumerate(order_ids)
+        )
+    )
+    conn.executemany(
+        "INSERT INTO disputes (dispute_id, order_id, opened_by) VALUES (?, ?, 1)",
+        ((f"d{i}", order_id) for i, order_id in enumerate(order_ids[::100]))
+    )
+    conn.executemany(
+        "INSERT INTO ratings (order_id, executor_id, customer_id, rating) VALUES (?, 1, 1, 5)",
+        ((order_id,) for order_id in order_ids[::10])
+    )
+    conn.execute("COMMIT")
+    db.close()
+    return order_ids
+
+
+def drop_indexes(path: Path):
+    db = Database(path)
+    names = [row[0] for row in db.conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+    )]
+    for name in names:
+        db.conn.execute(f"DROP INDEX {name}")
+    db.conn.commit()
+    db.close()
+
+
+def measure(path: Path, order_ids: list, repeats: int) -> dict:
+    db = Database(path)
+    rng = random.Random(1)
+    queries = {
+        "get_user_orders(client, active)": lambda: db.get_user_orders(rng.randint(1, CLIENTS), OrderStatus.ACTIVE.value),
+        "get_orders_page(status=active)": lambda: db.get_orders_page({"status": OrderStatus.ACTIVE.value}),
+        "disputes по order_id": lambda: db.conn.execute(
+            "SELECT * FROM disputes WHERE order_id = ?", (rng.choice(order_ids),)
+        ).fetchall(),
+        "ratings по order_id": lambda: db.conn.execute(
+            "SELECT * FROM ratings WHERE order_id = ?", (rng.choice(order_ids),)
+        ).fetchall(),
+    }
+    results = {}
+    for name, query in queries.items():
+        started = time.perf_counter()
+        for _ in range(repeats):
+            query()
+        results[name] = (time.perf_counter() - started) / repeats * 1000
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--dir", default=None, help="каталог для файлов базы (по умолчанию временный)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        indexed, bare = Path(tmp) / "indexed.db", Path(tmp) / "bare.db"
+        started = time.perf_counter()
+        order_ids = seed(indexed, args.orders)
+        print(f"засев {args.orders} заказов: {time.perf_counter() - started:.1f} с")
+        shutil.copy(indexed, bare)
+        drop_indexes(bare)
+
+        with_indexes = measure(indexed, order_ids, args.repeats)
+        without_indexes = measure(bare, order_ids, args.repeats)
+        print(f"{'запрос':>32}  {'без индексов':>13}  {'с индексами':>12}")
+        for name in with_indexes:
+            print(f"{name:>32}  {without_indexes[name]:10.2f} мс  {with_indexes[name]:9.3f} мс")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""Стоимость отрисовки клавиатур на апдейт: сборка через билдер против кэша.
+
+Для каждой клавиатуры меряется сборка без кэша (функция под lru_cache,
+__wrapped__), промах LRU (новый order_id) и попадание. Отдельно — отрисовка
+одного апдейта принятия заказа (текст карточки + клавиатуры, которые
+OrderService отправляет в этом переходе) и сериализация разметки в JSON,
+которую aiogram делает при каждой отправке и которую кэш не убирает.
+
+    python scripts/bench_keyboards.py --calls 20000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "bot")]
+
+from keyboards.chat_kb import get_order_chat_kb
+from keyboards.common import get_main_menu_kb
+from keyboards.order_kb import _order_actions_kb, get_order_type_kb, get_rating_kb, get_step_kb
+from models.order import Order
+from services.order_ids import new_order_id
+
+
+def per_call_us(func, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def render_accept(order: Order, chat_kb, actions_kb) -> tuple:
+    """То, что accept_order рисует за один апдейт: две клавиатуры чата и карточка"""
+    emoji, type_display = order.type_display
+    text = (
+        f"{order.status_display}\n\n"
+        f"{emoji} *Тип:* {type_display}\n"
+        f"📚 *Предмет:* {order.subject}\n"
+        f"📝 *Описание:*\n{order.description}\n"
+        f"⏰ *Срок:* {order.deadline}\n"
+        f"💰 *Бюджет:* {order.budget} руб\n\n"
+        f"🆔 *ID:* `{order.order_id}`"
+    )
+    return text, chat_kb(order.order_id), chat_kb(order.order_id), actions_kb(order.order_id, order.status)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+    calls = args.calls
+
+    order_ids = [new_order_id() for _ in range(calls)]
+    static = {
+        "get_main_menu_kb": get_main_menu_kb,
+        "get_order_type_kb": get_order_type_kb,
+        "get_step_kb(skip)": lambda: get_step_kb(True),
+    }
+    parametrised = {
+        "get_rating_kb": get_rating_kb,
+        "get_order_chat_kb": get_order_chat_kb,
+        "_order_actions_kb(taken)": lambda order_id: _order_actions_kb(order_id, "taken"),
+    }
+    raw = {
+        "get_main_menu_kb": get_main_menu_kb.__wrapped__,
+        "get_order_type_kb": get_order_type_kb.__wrapped__,
+        "get_step_kb(skip)": lambda: get_step_kb.__wrapped__(True),
+        "get_rating_kb": lambda: get_rating_kb.__wrapped__(order_ids[0]),
+        "get_order_chat_kb": lambda: get_order_chat_kb.__wrapped__(order_ids[0]),
+        "_order_actions_kb(taken)": lambda: _order_actions_kb.__wrapped__(order_ids[0], "taken"),
+    }
+
+    for func in (get_rating_kb, get_order_chat_kb, _order_actions_kb):
+        func.cache_clear()
+    print(f"{'клавиатура':>26}  {'без кэша':>10}  {'промах LRU':>10}  {'попадание':>10}")
+    for name, build in raw.items():
+        uncached = per_call_us(build, calls // 10)
+        if name in static:
+            miss, hit = None, per_call_us(static[name], calls)
+        else:
+            cached = parametrised[name]
+            ids = iter(order_ids)
+            miss = per_call_us(lambda: cached(next(ids)), calls // 10)
+            hit = per_call_us(lambda: cached(order_ids[0]), calls)
+        miss_text = f"{miss:7.1f} мкс" if miss is not None else f"{'—':>10}"
+        print(f"{name:>26}  {uncached:7.1f} мкс  {miss_text}  {hit:7.2f} мкс")
+
+    order = Order(order_ids[0], "exam", "Матанализ", "Пределы и ряды", "завтра", 500, 1, 2, "taken")
+    uncached = per_call_us(
+        lambda: render_accept(order, get_order_chat_kb.__wrapped__, _order_actions_kb.__wrapped__), calls // 10
+    )
+    cached = per_call_us(lambda: render_accept(order, get_order_chat_kb, _order_actions_kb), calls)
+    serialize = per_call_us(lambda: get_rating_kb(order.order_id).model_dump_json(exclude_none=True), calls // 10)
+    print(f"\nотрисовка апдейта принятия: без кэша {uncached:.1f} мкс, с кэшем {cached:.2f} мкс")
+    print(f"сериализация разметки при отправке (не кэшируется): {serialize:.1f} мкс")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
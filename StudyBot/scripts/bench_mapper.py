@@ -0,0 +1,127 @@
+"""Материализация активных заказов: RowMapper + Order со слотами против
+прежнего копирования row[0]..row[12] в обычный dataclass с __dict__.
+
+Засевает --orders активных заказов, затем меряет объекты в секунду (только
+сборка моделей из уже выбранных строк и вместе с запросом) и байты на
+объект Order по tracemalloc — строки самих значений общие с кортежами
+sqlite3 и в объект не входят.
+
+    python scripts/bench_mapper.py --orders 100000
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "bot")]
+
+from services.database import Database
+from services.mapper import ORDERS
+from services.order_ids import new_order_id
+
+
+@dataclass
+class LegacyOrder:
+    """Order в прежнем виде: обычный dataclass, экземпляр с __dict__"""
+    order_id: str
+    type: str
+    subject: str
+    description: str
+    deadline: str
+    budget: int
+    client_id: int
+    executor_id: Optional[int] = None
+    status: str = "active"
+    created_at: datetime = None
+    completed_at: Optional[datetime] = None
+    file_path: Optional[str] = None
+    message_id: Optional[int] = None
+
+
+def legacy_many(rows) -> list:
+    return [
+        LegacyOrder(
+            order_id=row[0],
+            type=row[1],
+            subject=row[2],
+            description=row[3],
+            deadline=row[4],
+            budget=row[5],
+            client_id=row[6],
+            executor_id=row[7],
+            status=row[8],
+            created_at=row[9],
+            completed_at=row[10],
+            file_path=row[11],
+            message_id=row[12]
+        )
+        for row in rows
+    ]
+
+
+def seed(path: Path, count: int):
+    Database(path).close()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        """INSERT INTO orders (order_id, type, subject, description, deadline, budget, client_id, status)
+        VALUES (?, 'exam', 'Матанализ', 'Пределы и ряды', 'завтра', 500, ?, 'active')""",
+        ((new_order_id(), i % 5000) for i in range(count))
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(name: str, conn: sqlite3.Connection, sql: str, build, repeats: int):
+    rows = conn.execute(sql).fetchall()
+
+    best = min(_timed(lambda: build(rows)) for _ in range(repeats))
+    best_query = min(_timed(lambda: build(conn.execute(sql).fetchall())) for _ in range(repeats))
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build(rows)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    count = len(objects)
+    print(
+        f"{name:>16}: {count / best:10.0f} объектов/с (сборка), "
+        f"{count / best_query:10.0f} объектов/с (с запросом), "
+        f"{used / count:6.1f} байт на объект"
+    )
+
+
+def _timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--dir", default=None, help="каталог для файла базы (по умолчанию временный)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = Path(tmp) / "mapper.db"
+        seed(path, args.orders)
+        conn = sqlite3.connect(path)
+        measure("dataclass+dict", conn, "SELECT * FROM orders WHERE status = 'active'", legacy_many, args.repeats)
+        measure(
+            "RowMapper+slots", conn,
+            f"SELECT {ORDERS.select} FROM orders WHERE status = 'active'", ORDERS.many, args.repeats
+        )
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""Накладные расходы метрик на апдейт: оба слоя middleware вокруг пустого хендлера.
+
+Цепочка собирается так же, как в aiogram: внешний UpdateMetricsMiddleware
+вызывает внутренний HandlerMetricsMiddleware, тот — хендлер. Сравнивается
+с вызовом того же хендлера без middleware; разница — цена метрик. Отдельно
+меряется та же цепочка для действия с заказом (метка с действием).
+
+    python scripts/bench_metrics.py --calls 200000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "bot")]
+
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from keyboards.callbacks import OrderAction, OrderCallback
+from middlewares.metrics_middleware import HandlerMetricsMiddleware, UpdateMetricsMiddleware
+
+
+async def noop(event, data):
+    return None
+
+
+async def per_call_us(call, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        await call()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def run(calls: int):
+    update = SimpleNamespace(event_type="callback_query")
+    outer, inner = UpdateMetricsMiddleware(), HandlerMetricsMiddleware()
+    chain = partial(outer, partial(inner, noop))
+
+    plain_data = {"handler": HandlerObject(noop)}
+    order_data = {"handler": HandlerObject(noop), "order_callback": OrderCallback(OrderAction.ACCEPT, "x")}
+
+    baseline = await per_call_us(lambda: noop(update, plain_data), calls)
+    plain = await per_call_us(lambda: chain(update, plain_data), calls)
+    order = await per_call_us(lambda: chain(update, order_data), calls)
+    print(f"пустой хендлер: {baseline:.2f} мкс")
+    print(f"с метриками: {plain:.2f} мкс (+{plain - baseline:.2f} мкс на апдейт)")
+    print(f"действие с заказом: {order:.2f} мкс (+{order - baseline:.2f} мкс на апдейт)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""Пропускная способность вставок с ключами UUID4 и с короткими
+упорядоченными по времени идентификаторами на 1M+ строк.
+
+Вставки идут пачками по --batch строк в таблицу с колонками orders и
+TEXT PRIMARY KEY (с --schema full — в настоящую orders со всеми индексами
+и триггерами миграций). Печатается скорость по мере роста таблицы: когда
+B-дерево ключа перестает помещаться в кэш страниц, случайные UUID4 пишут
+в случайные листья, а короткие ключи — в правый край.
+
+    python scripts/bench_order_ids.py --rows 1000000
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "bot")]
+
+from config.settings import DB_JOURNAL_MODE, DB_SYNCHRONOUS
+from services.database import Database
+from services.order_ids import OrderIdGenerator
+
+ORDERS_LIKE = """CREATE TABLE orders (
+    order_id TEXT PRIMARY KEY, type TEXT, subject TEXT, description TEXT, deadline TEXT,
+    budget INTEGER, client_id INTEGER, executor_id INTEGER, status TEXT DEFAULT 'active',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, completed_at TIMESTAMP, file_path TEXT, message_id INTEGER
+)"""
+
+
+def connect(path: Path, schema: str) -> sqlite3.Connection:
+    if schema == "full":
+        Database(path).close()
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+    if schema != "full":
+        conn.execute(ORDERS_LIKE)
+    return conn
+
+
+def run(path: Path, schema: str, make_id, rows: int, batch: int, segments: int) -> list:
+    conn = connect(path, schema)
+    segment_rows = rows // segments
+    rates, done = [], 0
+    started = time.perf_counter()
+    while done < rows:
+        conn.execute("BEGIN")
+        conn.executemany(
+            """INSERT INTO orders (order_id, type, subject, description, deadline, budget, client_id)
+            VALUES (?, 'exam', 'Матанализ', 'Пределы', 'завтра', 500, ?)""",
+            ((make_id(), i % 10000) for i in range(done, done + batch))
+        )
+        conn.execute("COMMIT")
+        done += batch
+        if done % segment_rows == 0:
+            rates.append(segment_rows / (time.perf_counter() - started))
+            started = time.perf_counter()
+    conn.close()
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--segments", type=int, default=5)
+    parser.add_argument("--schema", choices=("bare", "full"), default="bare")
+    parser.add_argument("--dir", default=None, help="каталог для файлов базы (по умолчанию временный)")
+    args = parser.parse_args()
+
+    kinds = {"UUID4": lambda: str(uuid.uuid4()), "короткие": OrderIdGenerator()}
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        step = args.rows // args.segments
+        print(f"{'ключи':>10}  " + "  ".join(f"{(i + 1) * step // 1000:>6}k" for i in range(args.segments)) + "  размер")
+        for i, (name, make_id) in enumerate(kinds.items()):
+            path = Path(tmp) / f"ids{i}.db"
+            rates = run(path, args.schema, make_id, args.rows, args.batch, args.segments)
+            size = sum(f.stat().st_size for f in Path(tmp).glob(f"{path.name}*")) / 2**20
+            print(f"{name:>10}  " + "  ".join(f"{rate / 1000:6.1f}k" for rate in rates) + f"  {size:.0f} МБ")
+        print("(строк в секунду на каждом отрезке роста таблицы)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""Нагрузочный генератор для webhook-режима.
+
+Шлет синтетические апдейты на локальный webhook и печатает апдейты/сек и
+перцентили задержки. С флагом --stub-api дополнительно поднимает заглушку
+Bot API, чтобы ответы хендлеров не уходили в Telegram; бота при этом нужно
+запустить с TELEGRAM_API_URL=http://127.0.0.1:<stub-port>. Так как бот
+обращается к API уже при старте (setWebhook), заглушку удобно поднять
+заранее отдельным процессом с --stub-only.
+
+    python scripts/webhook_load.py --stub-only
+    python scripts/webhook_load.py --updates 10000 --concurrency 100
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+
+from aiohttp import ClientSession, web
+
+_update_ids = itertools.count(1)
+
+
+def make_update() -> dict:
+    user_id = random.randint(1, 100000)
+    user = {"id": user_id, "is_bot": False, "first_name": "Load", "username": f"load{user_id}"}
+    chat = {"id": user_id, "type": "private"}
+    message = {"message_id": 1, "date": int(time.time()), "chat": chat, "from": user}
+
+    if random.random() < 0.5:
+        return {"update_id": next(_update_ids), "message": {**message, "text": "/start"}}
+    return {
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id": str(random.getrandbits(32)),
+            "from": user,
+            "chat_instance": "load",
+            "message": message,
+            "data": "show_rules"
+        }
+    }
+
+
+async def stub_api_handler(request: web.Request) -> web.Response:
+    method = request.match_info["method"].lower()
+    if method.startswith(("send", "edit")):
+        result = {
+            "message_id": random.randint(1, 10 ** 9),
+            "date": int(time.time()),
+            "chat": {"id": 1, "type": "private"},
+            "text": ""
+        }
+    else:
+        result = True
+    return web.json_response({"ok": True, "result": result})
+
+
+async def start_stub_api(port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", stub_api_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def run_load(url: str, secret: str, total: int, concurrency: int) -> None:
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+
+    async def sender(session: ClientSession):
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            async with session.post(url, json=make_update(), headers=headers) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    async with ClientSession() as session:
+        await asyncio.gather(*(sender(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000
+    print(f"Апдейтов: {total}, ошибок: {errors}, время: {elapsed:.2f} с")
+    print(f"Пропускная способность: {total / elapsed:.0f} апдейтов/с")
+    print(f"Задержка p50/p95/p99: {percentile(50):.1f} / {percentile(95):.1f} / {percentile(99):.1f} мс")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+    parser.add_argument("--secret", default="")
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--stub-api", action="store_true", help="поднять заглушку Bot API")
+    parser.add_argument("--stub-only", action="store_true", help="только заглушка Bot API, без нагрузки")
+    parser.add_argument("--stub-port", type=int, default=8081)
+    args = parser.parse_args()
+
+    if args.stub_only:
+        await start_stub_api(args.stub_port)
+        await asyncio.Event().wait()
+
+    runner = await start_stub_api(args.stub_port) if args.stub_api else None
+    try:
+        await run_load(args.url, args.secret, args.updates, args.concurrency)
+    finally:
+        if runner:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,13 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Модули бота импортируются плоско (services.*, models.*), как в bot/main.py
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "bot")]
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> Path:
+    return tmp_path / "test.db"
\ No newline at end of file
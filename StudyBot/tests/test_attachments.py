@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from services.attachments import AttachmentStore, FileTooLargeError
+
+
+class FakeSession:
+    def __init__(self, files):
+        self.files = files
+        self.api = SimpleNamespace(file_url=lambda token, path: path)
+
+    async def stream_content(self, url, chunk_size):
+        content = self.files[url]
+        if isinstance(content, Exception):
+            raise content
+        for start in range(0, len(content), chunk_size):
+            await asyncio.sleep(0)
+            yield content[start:start + chunk_size]
+
+
+class FakeBot:
+    """Bot с get_file и потоковой выдачей содержимого из словаря file_id -> bytes"""
+
+    token = "token"
+
+    def __init__(self, files):
+        self.files = files
+        self.session = FakeSession(files)
+
+    async def get_file(self, file_id):
+        content = self.files[file_id]
+        size = None if isinstance(content, Exception) else len(content)
+        return SimpleNamespace(file_size=size, file_path=file_id)
+
+
+def store(tmp_path, files, max_size=1024):
+    return AttachmentStore(FakeBot(files), tmp_path, max_size=max_size, chunk_size=10)
+
+
+def test_ingest_stores_file_by_content_hash(tmp_path):
+    content = bytes(range(256)) * 3
+
+    async def scenario():
+        attachments = store(tmp_path, {"a": content, "b": content})
+        attachments.start_ingest("ka", "a", ".pdf")
+        first = await attachments.result("ka", "a", ".pdf")
+        # Без фоновой задачи (другой процесс) файл скачивается заново
+        second = await attachments.result("kb", "b", ".pdf")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    sha256 = hashlib.sha256(content).hexdigest()
+    assert first == second == tmp_path / sha256[:2] / f"{sha256}.pdf"
+    assert first.read_bytes() == content
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_failures_are_logged_without_waiting_for_result(tmp_path, caplog):
+    async def scenario():
+        attachments = store(tmp_path, {"big": b"x" * 100, "broken": ConnectionError("reset")}, max_size=50)
+        attachments.start_ingest("kbig", "big", ".txt")
+        attachments.start_ingest("kbroken", "broken", ".txt")
+        await asyncio.gather(*(task for task, _ in attachments._tasks.values()), return_exceptions=True)
+        await asyncio.sleep(0)
+        messages = [(record.levelno, record.getMessage()) for record in caplog.records]
+
+        with pytest.raises(FileTooLargeError):
+            await attachments.result("kbig", "big", ".txt")
+        return messages
+
+    with caplog.at_level(logging.WARNING, logger="services.attachments"):
+        messages = asyncio.run(scenario())
+    assert (logging.WARNING, "Вложение kbig больше допустимого: 100 байт") in messages
+    assert (logging.ERROR, "Не удалось загрузить вложение kbroken") in messages
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_chunks_are_written_outside_event_loop(tmp_path, monkeypatch):
+    threads = set()
+    write = AttachmentStore._write
+
+    def tracking_write(tmp_file, digest, chunk):
+        threads.add(threading.current_thread())
+        write(tmp_file, digest, chunk)
+
+    monkeypatch.setattr(AttachmentStore, "_write", staticmethod(tracking_write))
+
+    async def scenario():
+        attachments = store(tmp_path, {"a": b"y" * 95})
+        path = await attachments.result("ka", "a", "")
+        return path.read_bytes()
+
+    assert asyncio.run(scenario()) == b"y" * 95
+    assert threads and threading.main_thread() not in threads
\ No newline at end of file
@@ -0,0 +1,71 @@
+import base64
+from uuid import UUID
+
+import pytest
+
+from keyboards.callbacks import CALLBACK_PREFIX, OrderAction, OrderCallback, _LEGACY_ACTIONS
+from services.order_ids import new_order_id
+
+ORDER_ID = new_order_id()
+
+# Предел Telegram для callback_data
+CALLBACK_DATA_LIMIT = 64
+
+
+def encode(raw: bytes) -> str:
+    return CALLBACK_PREFIX + base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+@pytest.mark.parametrize("action", list(OrderAction))
+@pytest.mark.parametrize("arg", [0, 5, 255])
+def test_pack_round_trip(action, arg):
+    callback = OrderCallback(action, ORDER_ID, arg)
+    data = callback.pack()
+    assert len(data.encode()) <= CALLBACK_DATA_LIMIT
+    assert len(data) == 17
+    assert OrderCallback.unpack(data) == callback
+
+
+def test_version_1_uuid_buttons_still_unpack():
+    order_id = "12345678-1234-5678-1234-567812345678"
+    data = encode(bytes((1, OrderAction.RATE, 4)) + UUID(order_id).bytes)
+    assert OrderCallback.unpack(data) == OrderCallback(OrderAction.RATE, order_id, 4)
+
+
+@pytest.mark.parametrize("prefix, action", list(_LEGACY_ACTIONS.items()))
+def test_legacy_prefixes(prefix, action):
+    assert OrderCallback.unpack(f"{prefix}_{ORDER_ID}") == OrderCallback(action, ORDER_ID)
+    assert OrderCallback.unpack(f"{prefix}_{ORDER_ID}_3") == OrderCallback(action, ORDER_ID, 3)
+
+
+def test_take_dispute_is_not_parsed_as_dispute():
+    assert OrderCallback.unpack(f"take_dispute_{ORDER_ID}").action == OrderAction.TAKE_DISPUTE
+    assert OrderCallback.unpack(f"dispute_{ORDER_ID}").action == OrderAction.DISPUTE
+
+
+@pytest.mark.parametrize("data", [
+    None,
+    "",
+    "main_menu",
+    "rate_",
+    f"rate_{ORDER_ID}_x",
+    "o:",
+    "o:!!!",
+    "o:A",
+    OrderCallback(OrderAction.ACCEPT, ORDER_ID).pack()[:-2],
+    OrderCallback(OrderAction.ACCEPT, ORDER_ID).pack() + "AA",
+    encode(bytes((3, OrderAction.ACCEPT, 0)) + bytes(8)),
+    encode(bytes((1, OrderAction.ACCEPT, 0)) + bytes(8)),
+    encode(bytes((2, 0, 0)) + bytes(8)),
+    encode(bytes((2, 200, 0)) + bytes(8)),
+])
+def test_invalid_data_unpacks_to_none(data):
+    assert OrderCallback.unpack(data) is None
+
+
+def test_pack_rejects_bad_order_id_and_out_of_range_arg():
+    with pytest.raises(ValueError, match="идентификатор"):
+        OrderCallback(OrderAction.ACCEPT, "not-an-id").pack()
+    for arg in (-1, 256):
+        with pytest.raises(ValueError, match="0..255"):
+            OrderCallback(OrderAction.INCREASE, ORDER_ID, arg).pack()
\ No newline at end of file
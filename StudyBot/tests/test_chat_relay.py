@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime
+
+from aiogram.types import Chat, Message, User as TelegramUser
+
+from config.constants import OrderStatus
+from handlers import chat_handlers
+from models.user import User
+from services.chat_relay import ChatRelay
+from services.database import AsyncDatabase
+from tests.test_database import make_order
+from tests.test_notifications import FakeBot
+
+
+def message(text: str = None, user_id: int = 1, **fields) -> Message:
+    return Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=user_id, type="private"),
+        from_user=TelegramUser(id=user_id, is_bot=False, first_name="Иван"),
+        text=text,
+        **fields
+    )
+
+
+def test_commands_in_chat_are_not_relayed():
+    async def scenario():
+        [handler] = [
+            handler for handler in chat_handlers.router.message.handlers
+            if handler.callback is chat_handlers.relay_chat_message
+        ]
+        in_chat = {"raw_state": chat_handlers.ChatStates.IN_CHAT.state}
+        for command in ("/dispute", "/next_dispute", "/profile on"):
+            assert not (await handler.check(message(command), **in_chat))[0]
+        assert (await handler.check(message("привет"), **in_chat))[0]
+        assert (await handler.check(message(caption="файл"), **in_chat))[0]
+
+    asyncio.run(scenario())
+
+
+def test_relay_stops_when_order_leaves_chat_statuses(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        bot = FakeBot()
+        relay = ChatRelay(bot, db)
+        try:
+            await db.add_user(User(1, "client", "Иван", None))
+            await db.add_user(User(2, "executor", "Петр", None))
+            order = make_order()
+            await db.add_order(order)
+            await db.transition_order(order.order_id, OrderStatus.TAKEN, {"executor_id": 2})
+            assert await relay.open_chat(order.order_id, 1) == 2
+
+            assert await relay.relay(message("привет"), order.order_id, 2) is True
+            await db.transition_order(order.order_id, OrderStatus.CANCELED)
+            assert await relay.relay(message("еще"), order.order_id, 2) is None
+            assert [chat_id for chat_id, _, _ in bot.sent] == [2]
+        finally:
+            await relay.flush()
+            await db.close()
+
+    asyncio.run(scenario())
\ No newline at end of file
@@ -0,0 +1,198 @@
+import asyncio
+import time
+
+import pytest
+
+from models.order import Order
+from models.user import User
+from services.database import AsyncDatabase, Database
+from services.order_ids import new_order_id
+
+
+def make_order(client_id: int = 1, **fields) -> Order:
+    values = dict(type="exam", subject="Матанализ", description="Пределы", deadline="завтра", budget=500)
+    values.update(fields)
+    return Order(order_id=new_order_id(), client_id=client_id, **values)
+
+
+def test_round_trip(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        try:
+            await db.add_user(User(1, "client", "Иван", None))
+            order = make_order()
+            assert await db.add_order(order) == order.order_id
+
+            stored = await db.get_order(order.order_id)
+            assert stored.subject == order.subject and stored.client_id == 1
+            assert (await db.get_user(1)).first_name == "Иван"
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_error_reaches_caller_and_worker_survives(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        try:
+            with pytest.raises(Exception):
+                await db.update_order("missing", {"no_such_column": 1})
+            await db.add_user(User(2, None, "Анна", None))
+            assert await db.get_user(2)
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+def test_group_commit_coalesces_pending_writes(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path, group_commit=True)
+        commits = []
+        await db._call(Database.set_trace, lambda sql: commits.append(sql) if sql == "COMMIT" else None)
+        try:
+            orders = [make_order() for _ in range(50)]
+            bad = db.update_order(orders[0].order_id, {"no_such_column": 1})
+            results = await asyncio.gather(*(db.add_order(o) for o in orders), bad, return_exceptions=True)
+
+            # Ошибка одного запроса откатывает только его точку сохранения
+            assert results[:-1] == [o.order_id for o in orders]
+            assert isinstance(results[-1], Exception)
+            assert len(commits) < len(orders)
+            assert all([await db.get_order(o.order_id) for o in orders])
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_group_commit_does_not_delay_lone_calls(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path, group_commit=True)
+        try:
+            order = make_order()
+            await db.add_order(order)
+            calls = 200
+            started = time.perf_counter()
+            for i in range(calls):
+                await db.get_order(order.order_id)
+                await db.update_order(order.order_id, {"budget": i})
+            per_call = (time.perf_counter() - started) / (2 * calls)
+            # Раньше каждый вызов ждал окно группировки в 5 мс
+            assert per_call < 0.002
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_count_queries_counts_repeats_but_not_triggers(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        try:
+            await db.add_user(User(1, "client", "Иван", None))
+            order = make_order()
+            await db.add_order(order)
+
+            async with db.count_queries() as counter:
+                for _ in range(3):
+                    await db.get_order(order.order_id)
+            assert counter.count == 3, counter.statements
+
+            # UPDATE статуса запускает несколько триггеров, но это один запрос
+            async with db.count_queries() as counter:
+                await db.update_order(order.order_id, {"status": "canceled"})
+            assert counter.count == 1, counter.statements
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def add_orders_at(db: Database, timestamps: list) -> list:
+    """Заказы с заданным created_at (по умолчанию он с точностью до секунды)"""
+    orders = []
+    for created_at in timestamps:
+        order = make_order()
+        db.add_order(order)
+        db.conn.execute("UPDATE orders SET created_at = ? WHERE order_id = ?", (created_at, order.order_id))
+        orders.append(order.order_id)
+    db.conn.commit()
+    return orders
+
+
+def all_pages(db: Database, limit: int, between_pages=None) -> list:
+    pages, after = [], None
+    while True:
+        page = db.get_orders_page({}, after, limit)
+        pages.append([order.order_id for order in page.orders])
+        if not page.next_after:
+            return pages
+        if between_pages:
+            between_pages()
+        after = page.next_after
+
+
+def test_pages_are_stable_when_orders_are_added_between_pages(db_path):
+    db = Database(db_path)
+    try:
+        db.add_user(User(1, "client", "Иван", None))
+        existing = add_orders_at(db, [f"2024-01-01 10:00:{second:02d}" for second in range(7)])
+        added = []
+        pages = all_pages(db, 3, lambda: added.extend(add_orders_at(db, ["2024-01-02 00:00:00"])))
+
+        # Новые заказы встают перед курсором и не сдвигают следующие страницы
+        assert pages == [existing[6:3:-1], existing[3:0:-1], existing[:1]]
+        assert len(added) == 2
+    finally:
+        db.close()
+
+
+def test_last_page_boundary(db_path):
+    db = Database(db_path)
+    try:
+        db.add_user(User(1, "client", "Иван", None))
+        assert db.get_orders_page({}, None, 3).orders == []
+        orders = add_orders_at(db, [f"2024-01-01 10:00:{second:02d}" for second in range(6)])
+
+        first = db.get_orders_page({}, None, 3)
+        assert first.next_after == orders[3]
+        # Ровно limit оставшихся строк: следующей страницы нет
+        last = db.get_orders_page({}, first.next_after, 3)
+        assert [order.order_id for order in last.orders] == orders[2::-1]
+        assert last.next_after is None
+        assert db.get_orders_page({}, orders[0], 3).orders == []
+    finally:
+        db.close()
+
+
+def test_pages_split_ties_on_created_at_by_order_id(db_path):
+    db = Database(db_path)
+    try:
+        db.add_user(User(1, "client", "Иван", None))
+        tied = add_orders_at(db, ["2024-01-01 10:00:00"] * 5)
+        older = add_orders_at(db, ["2024-01-01 09:00:00"] * 2)
+
+        pages = all_pages(db, 2)
+        assert [len(page) for page in pages] == [2, 2, 2, 1]
+        assert sum(pages, []) == sorted(tied, reverse=True) + sorted(older, reverse=True)
+    finally:
+        db.close()
+
+
+def test_iter_orders_streams_every_match_once(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        try:
+            await db.add_user(User(1, "client", "Иван", None))
+            orders = [make_order() for _ in range(7)]
+            for order in orders:
+                await db.add_order(order)
+            await db.update_order(orders[0].order_id, {"status": "canceled"})
+
+            streamed = [order.order_id async for order in db.iter_orders({"status": "active"}, batch_size=3)]
+            assert sorted(streamed) == sorted(order.order_id for order in orders[1:])
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
\ No newline at end of file
@@ -0,0 +1,125 @@
+import asyncio
+from types import SimpleNamespace
+
+from config.constants import DisputeStatus, OrderStatus
+from config.settings import ADMIN_CHAT_ID
+from handlers import dispute_handlers
+from keyboards.callbacks import OrderAction, OrderCallback
+from models.user import User
+from services.database import AsyncDatabase
+from services.dispute_service import DisputeQueue, DisputeService
+from services.order_ids import decode_order_id
+from tests.test_database import make_order
+from tests.test_notifications import FakeBot
+from tests.test_order_transitions import service
+
+
+class FakeCallback:
+    """CallbackQuery с тем, что используют обработчики споров; ответы запоминаются"""
+
+    def __init__(self, user_id: int, data: str = "", chat_id: int = 1):
+        self.data = data
+        self.from_user = SimpleNamespace(id=user_id)
+        self.message = SimpleNamespace(chat=SimpleNamespace(id=chat_id), edit_reply_markup=self._edit)
+        self.answers = []
+
+    async def answer(self, text: str = None, show_alert: bool = False):
+        self.answers.append(text)
+
+    async def _edit(self, reply_markup=None):
+        pass
+
+
+async def order_in_progress(db: AsyncDatabase):
+    await db.add_user(User(1, "client", "Иван", None))
+    await db.add_user(User(2, "executor", "Петр", None))
+    order = make_order()
+    await db.add_order(order)
+    await db.transition_order(order.order_id, OrderStatus.TAKEN, {"executor_id": 2})
+    await db.transition_order(order.order_id, OrderStatus.IN_PROGRESS)
+    return order
+
+
+def test_queue_orders_by_age_and_budget():
+    queue = DisputeQueue(budget_weight=1.0)
+    queue.push("old-cheap", opened_at=1000, budget=100)
+    queue.push("new-cheap", opened_at=1500, budget=100)
+    queue.push("new-expensive", opened_at=1500, budget=1000)
+    queue.push("tie-first", opened_at=2000, budget=100)
+    queue.push("tie-second", opened_at=2000, budget=100)
+    queue.remove("new-cheap")
+    # Повторное добавление заменяет приоритет
+    queue.push("old-cheap", opened_at=3000, budget=0)
+
+    assert len(queue) == 4
+    assert [queue.pop() for _ in range(5)] == ["new-expensive", "tie-first", "tie-second", "old-cheap", None]
+
+
+def test_concurrent_claims_have_one_winner(db_path):
+    async def scenario():
+        dbs = [AsyncDatabase(db_path), AsyncDatabase(db_path)]
+        services = [DisputeService(db, orders.notifier, orders) for db, orders in ((db, service(db, FakeBot())) for db in dbs)]
+        try:
+            order = await order_in_progress(dbs[0])
+            dispute = await services[0].open_dispute(order.order_id, 1, "плохо")
+            assert dispute.dispute_id.startswith("D") and decode_order_id(dispute.dispute_id) is None
+            await services[1].rebuild()
+
+            claims = await asyncio.gather(*(
+                services[admin_id % 2].claim_next(admin_id) for admin_id in range(10, 60)
+            ))
+            winners = [claim for claim in claims if claim]
+            assert len(winners) == 1
+            stored = await dbs[0].get_dispute(dispute.dispute_id)
+            assert stored.status == DisputeStatus.IN_PROGRESS.value and stored.admin_id == winners[0].admin_id
+        finally:
+            for item in services:
+                await item.notifier.stop()
+            for db in dbs:
+                await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_resolve_after_order_left_dispute_answers_alert(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        disputes = DisputeService(db, (orders := service(db, FakeBot())).notifier, orders)
+        try:
+            order = await order_in_progress(db)
+            dispute = await disputes.open_dispute(order.order_id, 1)
+            await disputes.claim_next(10)
+            await db.update_order(order.order_id, {"status": OrderStatus.CANCELED.value})
+
+            callback = FakeCallback(10, f"dispute:executor:{dispute.dispute_id}")
+            await dispute_handlers.resolve_dispute(callback, disputes)
+            assert callback.answers == ["Спор по этому заказу уже разрешен"]
+        finally:
+            await orders.notifier.stop()
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_only_participants_open_dispute_from_card(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        disputes = DisputeService(db, (orders := service(db, FakeBot())).notifier, orders)
+        try:
+            order = await order_in_progress(db)
+            await db.add_user(User(3, "stranger", "Олег", None))
+            payload = OrderCallback(OrderAction.DISPUTE, order.order_id)
+
+            stranger = FakeCallback(3)
+            await dispute_handlers.open_dispute_from_card(stranger, payload, db, disputes)
+            assert stranger.answers == ["Открыть спор могут только участники заказа"]
+            assert (await db.get_order(order.order_id)).status == OrderStatus.IN_PROGRESS.value
+
+            admin_chat = FakeCallback(3, chat_id=ADMIN_CHAT_ID)
+            await dispute_handlers.open_dispute_from_card(admin_chat, payload, db, disputes)
+            assert admin_chat.answers == ["Спор открыт и поставлен в очередь"]
+        finally:
+            await orders.notifier.stop()
+            await db.close()
+
+    asyncio.run(scenario())
\ No newline at end of file
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from aiogram.fsm.storage.base import StorageKey
+
+from services.database import AsyncDatabase
+from services.fsm_storage import SQLiteStorage
+
+KEY = StorageKey(bot_id=1, chat_id=1, user_id=1)
+
+
+def two_workers(db_path):
+    """Два воркера webhook: у каждого своя AsyncDatabase и свой кэш на один файл"""
+    dbs = [AsyncDatabase(db_path), AsyncDatabase(db_path)]
+    return dbs, [SQLiteStorage(db, shared=True) for db in dbs]
+
+
+def test_shared_cache_sees_other_worker_writes(db_path):
+    async def scenario():
+        dbs, (a, b) = two_workers(db_path)
+        try:
+            await a.set_state(KEY, "OrderForm:subject")
+            await a.set_data(KEY, {"type": "exam"})
+            assert await a.get_data(KEY) == {"type": "exam"}
+
+            await b.set_state(KEY, "OrderForm:description")
+            await b.set_data(KEY, {"type": "essay"})
+            assert await a.get_state(KEY) == "OrderForm:description"
+            assert await a.get_data(KEY) == {"type": "essay"}
+        finally:
+            for db in dbs:
+                await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_update_data_merges_across_workers(db_path):
+    async def scenario():
+        dbs, (a, b) = two_workers(db_path)
+        try:
+            await a.set_data(KEY, {"type": "exam"})
+            assert await a.get_data(KEY) == {"type": "exam"}
+
+            await b.update_data(KEY, {"subject": "Матанализ"})
+            merged = await a.update_data(KEY, {"budget": 500})
+            assert merged == {"type": "exam", "subject": "Матанализ", "budget": 500}
+            assert await b.get_data(KEY) == merged
+        finally:
+            for db in dbs:
+                await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_update_data_keeps_every_key(db_path):
+    async def scenario():
+        dbs, (a, b) = two_workers(db_path)
+        try:
+            await asyncio.gather(*(
+                storage.update_data(KEY, {f"field{i}": i})
+                for i, storage in enumerate([a, b] * 20)
+            ))
+            assert await a.get_data(KEY) == {f"field{i}": i for i in range(40)}
+        finally:
+            for db in dbs:
+                await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_expired_record_is_not_inherited(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        try:
+            storage = SQLiteStorage(db, ttl=60)
+            raw_key = storage.key_builder.build(KEY)
+            await db.set_fsm_state(raw_key, "OrderForm:subject", time.time() - 120, 0)
+            await db.set_fsm_data(raw_key, '{"type": "exam"}', time.time() - 120, 0)
+            assert await db.get_fsm_record(raw_key) is not None
+            assert await storage.get_state(KEY) is None
+
+            assert await storage.update_data(KEY, {"subject": "Матанализ"}) == {"subject": "Матанализ"}
+            assert await storage.get_state(KEY) is None
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
\ No newline at end of file
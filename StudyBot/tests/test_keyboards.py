@@ -0,0 +1,81 @@
+import asyncio
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import SendMessage
+
+from config.constants import OrderStatus
+from keyboards.admin_kb import get_dispute_queue_kb, get_dispute_resolve_kb
+from keyboards.chat_kb import get_chat_history_kb, get_chat_kb, get_order_chat_kb
+from keyboards.common import get_back_kb, get_main_menu_kb
+from keyboards.order_kb import (
+    _order_actions_kb,
+    get_order_accept_kb,
+    get_order_confirmation_kb,
+    get_order_created_kb,
+    get_order_type_kb,
+    get_orders_page_kb,
+    get_rating_kb,
+    get_step_kb
+)
+from services.database import AsyncDatabase
+from tests.test_notifications import FakeBot
+from tests.test_order_transitions import service, setup
+
+
+def cached_keyboards(order_id: str) -> list:
+    """(функция под lru_cache, аргументы) для всех кэшируемых клавиатур"""
+    calls = [
+        (get_main_menu_kb, ()),
+        (get_back_kb, ("back_to_types",)),
+        (get_order_type_kb, ()),
+        (get_order_confirmation_kb, ()),
+        (get_step_kb, (True,)),
+        (get_dispute_queue_kb, ()),
+        (get_dispute_resolve_kb, ("D" + order_id,)),
+        (get_order_accept_kb, (order_id,)),
+        (get_order_created_kb, (order_id,)),
+        (get_rating_kb, (order_id,)),
+        (get_order_chat_kb, (order_id,)),
+        (get_chat_kb, (order_id,)),
+        (get_chat_history_kb, (order_id, 10)),
+        (get_orders_page_kb, ("my_orders", order_id, False)),
+    ]
+    calls.extend((_order_actions_kb, (order_id, status.value)) for status in OrderStatus)
+    return calls
+
+
+def assert_cache_intact(order_id: str):
+    for func, args in cached_keyboards(order_id):
+        markup = func(*args)
+        assert func(*args) is markup, func.__name__
+        assert markup == func.__wrapped__(*args), func.__name__
+
+
+def test_cached_markups_survive_sending_unchanged(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        orders = service(db, FakeBot())
+        try:
+            [order] = await setup(db, 1)
+            assert_cache_intact(order.order_id)
+
+            # Полный цикл заказа отдает кэшированные клавиатуры в уведомления и правки
+            assert await orders.accept_order(order.order_id, 2)
+            assert await orders.start_work(order.order_id)
+            assert await orders.send_to_review(order.order_id)
+            assert await orders.complete_order(order.order_id)
+            await orders.editor.flush()
+            await orders.notifier.stop()
+
+            # Сборка запроса aiogram — последнее место, где разметку могли бы поменять
+            bot, session = Bot("123:abc"), AiohttpSession()
+            for func, args in cached_keyboards(order.order_id):
+                session.build_form_data(bot, SendMessage(chat_id=1, text="x", reply_markup=func(*args)))
+            await session.close()
+
+            assert_cache_intact(order.order_id)
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
\ No newline at end of file
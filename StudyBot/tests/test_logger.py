@@ -0,0 +1,74 @@
+import json
+import logging
+
+from utils import logger as log_setup
+from utils.logger import DebugSampler, JsonFormatter
+
+
+def make_record(level: int = logging.DEBUG, lineno: int = 10, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("bot.test", level, "/app/handler.py", lineno, "заказ %s", ("A1",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_fields():
+    record = make_record(logging.WARNING, order_id="A1", chat_id=5)
+    record.exc_text = "Traceback: boom"
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry.pop("ts").endswith("+00:00")
+    assert entry == {
+        "level": "WARNING",
+        "logger": "bot.test",
+        "msg": "заказ A1",
+        "process": record.processName,
+        "order_id": "A1",
+        "chat_id": 5,
+        "exc": "Traceback: boom"
+    }
+
+
+def test_debug_sampler_keeps_every_nth_record_per_call_site():
+    sampler = DebugSampler(every=3)
+    first_site = [sampler.filter(make_record(lineno=10)) for _ in range(7)]
+    other_site = [sampler.filter(make_record(lineno=20)) for _ in range(2)]
+    info = [sampler.filter(make_record(logging.INFO, lineno=10)) for _ in range(3)]
+
+    assert first_site == [True, False, False, True, False, False, True]
+    assert other_site == [True, False]
+    assert info == [True, True, True]
+
+    record = make_record(lineno=30)
+    assert sampler.filter(record) and record.sample_rate == 3
+    assert all(DebugSampler(every=1).filter(make_record()) for _ in range(3))
+
+
+def test_records_pass_through_queue_as_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_setup, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(log_setup, "LOG_LEVEL", logging.DEBUG)
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+
+    listener = log_setup.setup_logger("worker1")
+    try:
+        log = logging.getLogger("services.test")
+        log.info("заказ %s принят", "A1", extra={"order_id": "A1"})
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            log.exception("ошибка")
+        for _ in range(2):
+            log.debug("отладка")
+    finally:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+    [log_file] = tmp_path.glob("*.worker1.log")
+    entries = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    assert [entry["msg"] for entry in entries] == ["заказ A1 принят", "ошибка", "отладка"]
+    assert entries[0]["order_id"] == "A1" and entries[0]["level"] == "INFO"
+    assert "RuntimeError: boom" in entries[1]["exc"]
+    assert entries[2]["sample_rate"] == log_setup.LOG_DEBUG_SAMPLE_EVERY
\ No newline at end of file
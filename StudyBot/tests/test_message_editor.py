@@ -0,0 +1,86 @@
+import asyncio
+
+from aiogram.methods import EditMessageText
+from aiogram.exceptions import TelegramRetryAfter
+
+from services.message_editor import MessageEditor
+
+
+class FakeBot:
+    """Bot, который запоминает начатые и завершенные правки; запрос длится latency секунд"""
+
+    def __init__(self, latency: float = 0.0, retry_after: int = 0):
+        self.latency = latency
+        self.retry_after = retry_after
+        self.started = []
+        self.edited = []
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        self.started.append(text)
+        if self.retry_after:
+            retry_after, self.retry_after = self.retry_after, 0
+            raise TelegramRetryAfter(EditMessageText(text=text), "Too Many Requests", retry_after)
+        await asyncio.sleep(self.latency)
+        self.edited.append((chat_id, message_id, text))
+
+
+def test_edits_within_window_are_coalesced():
+    async def scenario():
+        bot = FakeBot()
+        editor = MessageEditor(bot, debounce=0.02)
+        for text in ("1", "2", "3"):
+            editor.edit(1, 10, text)
+        editor.edit(2, 20, "other")
+        await asyncio.sleep(0.05)
+        # Повтор уже отправленного текста не доходит до API
+        editor.edit(1, 10, "3")
+        await asyncio.sleep(0.05)
+        return bot, editor
+
+    bot, editor = asyncio.run(scenario())
+    assert sorted(bot.edited) == [(1, 10, "3"), (2, 20, "other")]
+    assert (editor.sent, editor.coalesced, editor.skipped) == (2, 2, 1)
+
+
+def test_flush_sends_pending_edits_immediately():
+    async def scenario():
+        bot = FakeBot()
+        editor = MessageEditor(bot, debounce=10)
+        editor.edit(1, 10, "1")
+        editor.edit(1, 10, "2")
+        await editor.flush()
+        assert not editor._timers
+        return bot
+
+    assert asyncio.run(scenario()).edited == [(1, 10, "2")]
+
+
+def test_flush_waits_for_edit_already_in_flight():
+    async def scenario():
+        bot = FakeBot(latency=0.05)
+        editor = MessageEditor(bot, debounce=0.01)
+        editor.edit(1, 10, "1")
+        while not bot.started:
+            await asyncio.sleep(0.005)
+        # Таймер уже забрал правку и ждет API; следующая правка приходит поверх
+        editor.edit(1, 10, "2")
+        await editor.flush()
+        return bot
+
+    assert asyncio.run(scenario()).edited == [(1, 10, "1"), (1, 10, "2")]
+
+
+def test_retry_after_requeues_edit():
+    async def scenario():
+        bot = FakeBot(retry_after=1)
+        editor = MessageEditor(bot, debounce=0.01)
+        editor.edit(1, 10, "1")
+        while not bot.started:
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0)
+        assert list(editor._pending) == [(1, 10)]
+        await editor.flush()
+        return bot
+
+    bot = asyncio.run(scenario())
+    assert bot.started == ["1", "1"] and bot.edited == [(1, 10, "1")]
\ No newline at end of file
@@ -0,0 +1,62 @@
+import re
+
+import pytest
+
+from services.metrics import Counter, Gauge, Histogram, Registry, _Metric
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="([^"\\]|\\.)*",?)*\})? -?[0-9.e+]+$')
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("x", "x")
+
+
+def test_counter_and_gauge_samples():
+    errors = Counter("errors_total", "Ошибки", ("method", "error"))
+    errors.labels("get", "Timeout").inc()
+    errors.labels("get", "Timeout").inc(2)
+    errors.labels("put", 'say "hi"\n').inc()
+    depth = Gauge("depth", "Глубина")
+    depth.labels().inc(5)
+    depth.labels().dec(2)
+    depth.labels().set(0.5)
+
+    assert errors.render().splitlines() == [
+        "# HELP errors_total Ошибки",
+        "# TYPE errors_total counter",
+        'errors_total{method="get",error="Timeout"} 3',
+        'errors_total{method="put",error="say \\"hi\\"\\n"} 1',
+    ]
+    assert depth.render().splitlines()[1:] == ["# TYPE depth gauge", "depth 0.5"]
+
+
+def test_histogram_buckets_are_cumulative():
+    seconds = Histogram("seconds", "Время", ("method",), buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        seconds.labels("get").observe(value)
+
+    assert seconds.render().splitlines()[2:] == [
+        'seconds_bucket{method="get",le="0.1"} 2',
+        'seconds_bucket{method="get",le="1.0"} 3',
+        'seconds_bucket{method="get",le="+Inf"} 4',
+        'seconds_sum{method="get"} 3.65',
+        'seconds_count{method="get"} 4',
+    ]
+
+
+def test_registry_exposition_format():
+    registry = Registry()
+    registry.register(Counter("a_total", "A", ("kind",))).labels("x").inc()
+    registry.register(Histogram("b_seconds", "B")).labels().observe(0.2)
+    text = registry.render()
+
+    assert text.endswith("\n")
+    families = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE"):
+            _, _, name, kind = line.split()
+            families[name] = kind
+        elif not line.startswith("# HELP"):
+            assert SAMPLE.match(line), line
+    assert families == {"a_total": "counter", "b_seconds": "histogram"}
\ No newline at end of file
@@ -0,0 +1,63 @@
+from models.user import User
+from services.database import Database
+from services.migrations import MIGRATIONS, apply_migrations, get_schema_version
+from tests.test_database import make_order
+
+
+def query_plan(db: Database, sql: str, params: tuple) -> str:
+    return " ".join(row[-1] for row in db.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def test_migrations_apply_once(db_path):
+    latest = max(version for version, _, _ in MIGRATIONS)
+    db = Database(db_path)
+    assert get_schema_version(db.conn) == latest
+    db.close()
+
+    db = Database(db_path)
+    assert apply_migrations(db.conn) == latest
+    assert db.conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == len(MIGRATIONS)
+    db.close()
+
+
+def test_order_queries_use_indexes(db_path):
+    db = Database(db_path)
+    plans = [
+        query_plan(db, "SELECT * FROM orders WHERE client_id = ? AND status = ?", (1, "active")),
+        query_plan(db, "SELECT * FROM orders WHERE status = ? ORDER BY created_at DESC, order_id DESC", ("active",)),
+        query_plan(db, "SELECT * FROM disputes WHERE order_id = ?", ("x",)),
+        query_plan(db, "SELECT * FROM ratings WHERE order_id = ?", ("x",)),
+    ]
+    db.close()
+    for plan in plans:
+        assert "USING INDEX" in plan or "USING COVERING INDEX" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+
+def test_search_survives_rowid_renumbering(db_path):
+    db = Database(db_path)
+    try:
+        db.add_user(User(1, "client", "Иван", None))
+        orders = [make_order(subject=subject) for subject in ("Физика", "Химия", "Биология")]
+        for order in orders:
+            db.add_order(order)
+        # Так же rowid может переписать VACUUM: триггеры при этом не срабатывают
+        db.conn.execute("UPDATE orders SET rowid = rowid + 100")
+        db.conn.commit()
+
+        for order in orders:
+            hits = db.search_orders(order.subject)
+            assert [hit.order.order_id for hit in hits] == [order.order_id]
+    finally:
+        db.close()
+
+
+def test_search_joins_orders_by_key(db_path):
+    db = Database(db_path)
+    plan = query_plan(
+        db,
+        "SELECT o.order_id FROM orders_fts JOIN orders o ON o.order_key = orders_fts.rowid WHERE orders_fts MATCH ?",
+        ("физика",)
+    )
+    db.close()
+    assert "idx_orders_key" in plan
\ No newline at end of file
@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramRetryAfter, TelegramServerError
+from aiogram.methods import SendMessage
+
+from services.metrics import NOTIFY_QUEUE_DEPTH, NOTIFY_RESULTS, NOTIFY_SECONDS
+from services.notifications import NotificationDispatcher
+
+
+class FakeBot:
+    """Запоминает отправленное; для текста из failures сначала бросает перечисленные ошибки"""
+
+    def __init__(self, failures: dict = None):
+        self.failures = failures or {}
+        self.sent = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        errors = self.failures.get(text)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+def retry_after(seconds: int) -> TelegramRetryAfter:
+    return TelegramRetryAfter(method=SendMessage(chat_id=1, text="x"), message="Flood control", retry_after=seconds)
+
+
+def server_error() -> TelegramServerError:
+    return TelegramServerError(method=SendMessage(chat_id=1, text="x"), message="Internal Server Error")
+
+
+def dispatcher(bot: FakeBot, **kwargs) -> NotificationDispatcher:
+    options = dict(workers=4, global_rate=1000, chat_interval=0.05, group_interval=0.1, retry_backoff=0.01)
+    options.update(kwargs)
+    return NotificationDispatcher(bot, **options)
+
+
+def test_per_chat_interval():
+    async def scenario():
+        bot = FakeBot()
+        notifier = dispatcher(bot)
+        notifier.start()
+        for i in range(4):
+            notifier.send(1, f"m{i}")
+        notifier.send(-100, "group")
+        await notifier.stop()
+
+        times = [at for chat_id, _, at in bot.sent if chat_id == 1]
+        assert len(times) == 4
+        assert all(b - a >= 0.045 for a, b in zip(times, times[1:]))
+
+    asyncio.run(scenario())
+
+
+def test_global_rate():
+    async def scenario():
+        bot = FakeBot()
+        notifier = dispatcher(bot, global_rate=100)
+        notifier.start()
+        started = time.monotonic()
+        for chat_id in range(1, 21):
+            notifier.send(chat_id, "hello")
+        await notifier.stop()
+
+        assert len(bot.sent) == 20
+        # 20 сообщений при 100/с — не быстрее 0.19 с
+        assert bot.sent[-1][2] - started >= 0.18
+
+    asyncio.run(scenario())
+
+
+def test_retries_on_retry_after_and_server_errors():
+    async def scenario():
+        bot = FakeBot({
+            "flood": [retry_after(0)],
+            "5xx": [server_error(), server_error()],
+            "down": [server_error() for _ in range(10)]
+        })
+        notifier = dispatcher(bot, max_retries=3)
+        notifier.start()
+        for text in ("flood", "5xx", "down"):
+            notifier.send(1, text)
+        await notifier.stop()
+
+        assert sorted(text for _, text, _ in bot.sent) == ["5xx", "flood"]
+        assert notifier.delivered == 2
+        assert notifier.failed == 1
+        # 1 + 2 повтора доставленных и 3 повтора брошенного
+        assert notifier.retried == 6
+
+    asyncio.run(scenario())
+
+
+def test_stop_drains_queue_and_exports_metrics():
+    async def scenario():
+        bot = FakeBot()
+        notifier = dispatcher(bot, chat_interval=0.01)
+        delivered_before = NOTIFY_RESULTS.labels("delivered").value
+        observed_before = sum(NOTIFY_SECONDS.labels().counts)
+
+        notifier.start()
+        for i in range(30):
+            notifier.send(i % 3 + 1, f"m{i}")
+        assert NOTIFY_QUEUE_DEPTH.labels().value > 0
+        await notifier.stop()
+
+        assert len(bot.sent) == 30
+        assert NOTIFY_QUEUE_DEPTH.labels().value == 0
+        assert NOTIFY_RESULTS.labels("delivered").value - delivered_before == 30
+        assert sum(NOTIFY_SECONDS.labels().counts) - observed_before == 30
+
+    asyncio.run(scenario())
+
+def test_throttled_chat_does_not_delay_others():
+    async def scenario():
+        bot = FakeBot()
+        notifier = dispatcher(bot, workers=2, group_interval=0.5)
+        notifier.start()
+        started = time.monotonic()
+        for i in range(3):
+            notifier.send(-100, f"group{i}")
+        notifier.send(1, "private")
+        await notifier.stop()
+
+        sent = {text: at - started for _, text, at in bot.sent}
+        assert sent["private"] < 0.1
+        assert sent["group1"] >= 0.45 and sent["group2"] >= 0.95
+        assert [text for chat_id, text, _ in bot.sent if chat_id == -100] == ["group0", "group1", "group2"]
+
+    asyncio.run(scenario())
\ No newline at end of file
@@ -0,0 +1,32 @@
+import pytest
+
+from services.order_ids import OrderIdGenerator, decode_order_id
+
+_NODE_MASK = (1 << 10) - 1
+
+
+def node_of(order_id: str) -> int:
+    return decode_order_id(order_id) >> 12 & _NODE_MASK
+
+
+def test_workers_get_distinct_nodes():
+    generators = [OrderIdGenerator() for _ in range(4)]
+    for worker_index, generator in enumerate(generators):
+        generator.set_node(worker_index + 1)
+
+    ids = [generator() for _ in range(1000) for generator in generators]
+    assert len(set(ids)) == len(ids)
+    assert {node_of(order_id) for order_id in ids} == {1, 2, 3, 4}
+
+
+def test_ids_are_ordered_within_a_node():
+    generator = OrderIdGenerator()
+    ids = [generator() for _ in range(10000)]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+
+
+def test_migration_node_is_reserved():
+    with pytest.raises(ValueError):
+        OrderIdGenerator().set_node(0)
+    with pytest.raises(ValueError):
+        OrderIdGenerator().set_node(1024)
\ No newline at end of file
@@ -0,0 +1,60 @@
+import asyncio
+import sqlite3
+
+from models.user import User
+from services.database import AsyncDatabase
+from services.order_index import ActiveOrderIndex
+from tests.test_database import make_order
+
+
+def test_refresh_applies_other_worker_changes(db_path):
+    async def scenario():
+        db_a, db_b = AsyncDatabase(db_path), AsyncDatabase(db_path)
+        index_a, index_b = ActiveOrderIndex(), ActiveOrderIndex()
+        try:
+            await db_a.add_user(User(1, "client", "Иван", None))
+            old = make_order(subject="Физика")
+            await db_a.add_order(old)
+            await index_a.rebuild(db_a)
+            await index_b.rebuild(db_b)
+
+            # Заказ создан и взят в работу в воркере A
+            new = make_order(subject="Химия")
+            await db_a.add_order(new)
+            index_a.add(new)
+            await db_a.update_order(old.order_id, {"status": "in_progress", "executor_id": 2})
+            index_a.remove(old.order_id)
+
+            assert old.order_id in index_b and new.order_id not in index_b
+            assert await index_b.refresh(db_b) == 2
+            assert [order.order_id for order in index_b.search(subject="химия")] == [new.order_id]
+            assert old.order_id not in index_b
+            assert await index_b.refresh(db_b) == 0
+        finally:
+            await db_a.close()
+            await db_b.close()
+
+    asyncio.run(scenario())
+
+
+def test_refresh_rebuilds_after_log_was_pruned(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        index = ActiveOrderIndex()
+        try:
+            await db.add_user(User(1, "client", "Иван", None))
+            await index.rebuild(db)
+            order = make_order()
+            await db.add_order(order)
+
+            conn = sqlite3.connect(db_path)
+            conn.execute("DELETE FROM order_changes")
+            conn.commit()
+            conn.close()
+
+            await index.refresh(db)
+            assert order.order_id in index
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
\ No newline at end of file
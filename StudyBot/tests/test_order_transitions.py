@@ -0,0 +1,129 @@
+import asyncio
+
+from config.constants import OrderStatus
+from models.user import User
+from services.database import AsyncDatabase
+from services.message_editor import MessageEditor
+from services.order_index import ActiveOrderIndex
+from services.order_service import OrderService
+from tests.test_database import make_order
+from tests.test_notifications import FakeBot, dispatcher
+
+EXECUTORS = range(2, 202)
+
+
+async def setup(db: AsyncDatabase, orders: int) -> list:
+    await db.add_user(User(1, "client", "Иван", None))
+    for user_id in EXECUTORS:
+        await db.add_user(User(user_id, f"executor{user_id}", "Петр", None))
+    created = [make_order() for _ in range(orders)]
+    for order in created:
+        await db.add_order(order)
+    return created
+
+
+def service(db: AsyncDatabase, bot: FakeBot) -> OrderService:
+    notifier = dispatcher(bot, chat_interval=0, group_interval=0)
+    notifier.start()
+    return OrderService(bot, db, notifier, MessageEditor(bot), ActiveOrderIndex())
+
+
+def test_concurrent_accepts_have_one_winner(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        bot = FakeBot()
+        orders = service(db, bot)
+        try:
+            [order] = await setup(db, 1)
+            await orders.index.rebuild(db)
+
+            results = await asyncio.gather(*(orders.accept_order(order.order_id, user_id) for user_id in EXECUTORS))
+            assert results.count(True) == 1
+            winner = EXECUTORS[results.index(True)]
+
+            stored = await db.get_order(order.order_id)
+            assert stored.status == OrderStatus.TAKEN.value and stored.executor_id == winner
+            assert order.order_id not in orders.index
+            await orders.notifier.stop()
+            assert sorted(chat_id for chat_id, _, _ in bot.sent) == [1, winner]
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_accepts_across_workers(db_path):
+    async def scenario():
+        dbs = [AsyncDatabase(db_path), AsyncDatabase(db_path)]
+        services = [service(db, FakeBot()) for db in dbs]
+        try:
+            [order] = await setup(dbs[0], 1)
+
+            results = await asyncio.gather(*(
+                services[user_id % 2].accept_order(order.order_id, user_id) for user_id in EXECUTORS
+            ))
+            assert results.count(True) == 1
+            assert (await dbs[1].get_order(order.order_id)).executor_id == EXECUTORS[results.index(True)]
+        finally:
+            for item in services:
+                await item.notifier.stop()
+            for db in dbs:
+                await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_accept_and_cancel_race(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        orders = service(db, FakeBot())
+        try:
+            created = await setup(db, 50)
+            await orders.index.rebuild(db)
+
+            races = await asyncio.gather(*(
+                asyncio.gather(orders.accept_order(order.order_id, 2), orders.cancel_order(order.order_id, 1))
+                for order in created
+            ))
+            for order, (accepted, canceled) in zip(created, races):
+                stored = await db.get_order(order.order_id)
+                # Отмена разрешена и из active, и из taken, поэтому она всегда проходит;
+                # принятие проходит, только если успело раньше отмены
+                assert canceled and stored.status == OrderStatus.CANCELED.value
+                assert (stored.executor_id == 2) == accepted
+            assert len(orders.index) == 0
+            assert await db.get_active_order_count(1) == 0
+        finally:
+            await orders.notifier.stop()
+            await db.close()
+
+    asyncio.run(scenario())
+
+def test_transition_query_counts(db_path):
+    async def scenario():
+        db = AsyncDatabase(db_path)
+        orders = service(db, FakeBot())
+        try:
+            first, second = await setup(db, 2)
+
+            # Пользователей нет в кэше: UPDATE ... RETURNING и один JOIN за участниками
+            db.users.clear()
+            async with db.count_queries() as counter:
+                assert await orders.accept_order(first.order_id, 2)
+            assert counter.count == 2, counter.statements
+
+            # Участники уже в кэше: только сам переход, срабатывания триггеров не считаются
+            async with db.count_queries() as counter:
+                assert await orders.accept_order(second.order_id, 2)
+                assert await orders.cancel_order(second.order_id, 1)
+            assert counter.count == 2, counter.statements
+
+            # Завершение сбрасывает исполнителя в кэше (вырос completed_orders), он догружается JOIN
+            async with db.count_queries() as counter:
+                assert await orders.complete_order(first.order_id)
+            assert counter.count == 2, counter.statements
+        finally:
+            await orders.notifier.stop()
+            await db.close()
+
+    asyncio.run(scenario())
\ No newline at end of file
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message, Update
+
+from middlewares.profiler_middleware import ProfilerMiddleware
+from services.profiler import StackProfiler
+
+def busy(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def slow_handler(message: Message):
+    busy(0.1)
+
+
+def message_update(update_id: int) -> Update:
+    user = {"id": 1, "is_bot": False, "first_name": "Иван"}
+    message = {"message_id": 1, "date": datetime.now(), "chat": {"id": 1, "type": "private"}, "from": user, "text": "x"}
+    return Update.model_validate({"update_id": update_id, "message": message})
+
+
+def registered(dp: Dispatcher, middleware) -> list:
+    return [
+        event_name for event_name, observer in dp.observers.items()
+        if middleware in observer.middleware
+    ]
+
+
+def test_enable_disable_round_trip_writes_profile(tmp_path):
+    async def scenario():
+        router = Router()
+        router.message()(slow_handler)
+        dp = Dispatcher()
+        dp.include_router(router)
+        bot = Bot("123:abc")
+        profiler = ProfilerMiddleware(dp, StackProfiler(interval=0.001, logs_dir=tmp_path))
+        try:
+            assert registered(dp, profiler) == []
+            assert profiler.enable(sample_rate=1.0)
+            assert not profiler.enable()
+            assert "message" in registered(dp, profiler) and "update" not in registered(dp, profiler)
+
+            await dp.feed_update(bot, message_update(1))
+            path = profiler.disable()
+            assert not profiler.enabled and profiler.disable() is None
+            assert registered(dp, profiler) == []
+            assert not profiler.profiler._thread
+
+            # Выключенный профайлер не учитывает апдейты
+            await dp.feed_update(bot, message_update(2))
+            assert not profiler.profiler._tasks
+            return path
+        finally:
+            await bot.session.close()
+
+    path = asyncio.run(scenario())
+    assert path.parent == tmp_path and path.suffix == ".folded"
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines
+    for line in lines:
+        stack, _, count = line.rpartition(" ")
+        assert int(count) > 0
+        assert stack.startswith("test_profiler.slow_handler;")
+    assert any(line.split(" ")[0].endswith("test_profiler.busy") for line in lines)
\ No newline at end of file
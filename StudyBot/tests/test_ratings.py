@@ -0,0 +1,103 @@
+import asyncio
+import logging
+
+from config.constants import OrderStatus
+from models.user import User
+from services import migrations
+from services.database import Database
+from services.rating_service import RatingService
+from services.order_ids import new_order_id
+from tests.test_database import make_order
+
+
+def rating_columns(db: Database, user_id: int) -> tuple:
+    return db.conn.execute(
+        "SELECT rating_sum, rating_count, rating, completed_orders FROM users WHERE user_id = ?", (user_id,)
+    ).fetchone()
+
+
+def completed_order(db: Database, executor_id: int) -> str:
+    order = make_order()
+    db.add_order(order)
+    db.transition_order(order.order_id, OrderStatus.TAKEN, {"executor_id": executor_id})
+    db.transition_order(order.order_id, OrderStatus.IN_PROGRESS)
+    db.transition_order(order.order_id, OrderStatus.COMPLETED)
+    return order.order_id
+
+
+def test_ratings_accumulate_and_recompute_fixes_drift(db_path):
+    db = Database(db_path)
+    try:
+        db.add_user(User(1, "client", "Иван", None))
+        db.add_user(User(2, "executor", "Петр", None))
+        first, second = completed_order(db, 2), completed_order(db, 2)
+        assert db.add_rating(first, 1, 5) == 2
+        assert db.add_rating(second, 1, 2) == 2
+        # Повторная оценка того же заказа не учитывается
+        assert db.add_rating(second, 1, 1) is None
+        assert rating_columns(db, 2) == (7, 2, 3.5, 2)
+        assert db.recompute_ratings() == 0
+
+        db.conn.execute("UPDATE users SET rating_sum = 100, completed_orders = 0 WHERE user_id = 2")
+        db.conn.commit()
+        assert db.recompute_ratings() == 1
+        assert rating_columns(db, 2) == (7, 2, 3.5, 2)
+    finally:
+        db.close()
+
+
+def test_recompute_loop_survives_errors(caplog):
+    class FlakyDatabase:
+        def __init__(self):
+            self.calls = 0
+
+        async def recompute_ratings(self):
+            self.calls += 1
+            if self.calls == 1:
+                raise RuntimeError("database is locked")
+            return 0
+
+    async def scenario():
+        db = FlakyDatabase()
+        ratings = RatingService(db, notifier=None, recompute_interval=0)
+        ratings.start()
+        while db.calls < 3:
+            await asyncio.sleep(0)
+        await ratings.stop()
+        return db.calls
+
+    with caplog.at_level(logging.ERROR, logger="services.rating_service"):
+        assert asyncio.run(scenario()) >= 3
+    assert [record.getMessage() for record in caplog.records] == ["Не удалось пересчитать рейтинги"]
+
+
+def test_migration_7_backfills_rating_columns(db_path, monkeypatch):
+    monkeypatch.setattr(migrations, "MIGRATIONS", [m for m in migrations.MIGRATIONS if m[0] < 7])
+    db = Database(db_path)
+    assert migrations.get_schema_version(db.conn) == 6
+    order_ids = [new_order_id() for _ in range(3)]
+    db.conn.executemany(
+        "INSERT INTO users (user_id, role, first_name) VALUES (?, ?, ?)", [(1, "client", "Иван"), (2, "executor", "Петр")]
+    )
+    db.conn.executemany(
+        "INSERT INTO orders (order_id, client_id, executor_id, status) VALUES (?, 1, 2, ?)",
+        [(order_ids[0], "completed"), (order_ids[1], "completed"), (order_ids[2], "in_progress")]
+    )
+    # До миграции 7 заказ можно было оценить дважды: учитывается первая оценка
+    db.conn.executemany(
+        "INSERT INTO ratings (order_id, executor_id, customer_id, rating) VALUES (?, 2, 1, ?)",
+        [(order_ids[0], 4), (order_ids[0], 1), (order_ids[1], 5)]
+    )
+    db.conn.commit()
+    db.close()
+    monkeypatch.undo()
+
+    db = Database(db_path)
+    try:
+        assert rating_columns(db, 2) == (9, 2, 4.5, 2)
+        assert rating_columns(db, 1) == (0, 0, 0, 0)
+        assert db.conn.execute("SELECT COUNT(*) FROM ratings").fetchone()[0] == 2
+        user = db.get_user(2)
+        assert (user.rating, user.completed_orders) == (4.5, 2)
+    finally:
+        db.close()
\ No newline at end of file
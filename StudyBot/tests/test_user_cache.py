@@ -0,0 +1,63 @@
+from models.user import User
+from services import user_cache
+from services.user_cache import UserCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def user(user_id: int, role: str = "client") -> User:
+    return User(user_id, f"user{user_id}", "Иван", None, role=role)
+
+
+def test_hit_and_miss_are_counted():
+    cache = UserCache(max_size=10, ttl=60)
+    assert cache.get(1) is None
+    cache.put(user(1))
+    assert cache.get(1).user_id == 1
+    assert cache.get(2) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(user_cache.time, "monotonic", clock)
+    cache = UserCache(max_size=10, ttl=60)
+    cache.put(user(1))
+
+    clock.now += 59
+    assert cache.get(1) is not None
+    clock.now += 2
+    assert cache.get(1) is None
+    assert len(cache) == 0
+    # Повторный put продлевает срок
+    cache.put(user(1, role="admin"))
+    clock.now += 59
+    assert cache.get(1).role == "admin"
+
+
+def test_least_recently_used_is_evicted():
+    cache = UserCache(max_size=2, ttl=60)
+    cache.put(user(1))
+    cache.put(user(2))
+    cache.get(1)
+    cache.put(user(3))
+    assert len(cache) == 2
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+
+
+def test_invalidate_and_clear():
+    cache = UserCache(max_size=10, ttl=60)
+    for user_id in (1, 2, 3):
+        cache.put(user(user_id))
+    cache.invalidate(2)
+    cache.invalidate(42)
+    assert cache.get(2) is None and cache.get(1) is not None
+    cache.clear()
+    assert len(cache) == 0
\ No newline at end of file